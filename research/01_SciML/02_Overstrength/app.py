@@ -1,99 +1,379 @@
-import joblib
+import time
+_import_start = time.perf_counter()
+
+import io
+import logging
+import numpy as np
 import pandas as pd
-from flask import Flask, jsonify, render_template, request
-import tensorflow as tf
+from flask import Flask, Response, g, jsonify, render_template, request
 import os
 
+from batching import RequestCoalescer
+from lookup_tables import LookupTables
+from metrics import BATCH_SIZE_BUCKETS, MetricsRegistry
+from model_registry import ModelRegistry
+from prediction_cache import PredictionCache
+
 app = Flask(__name__)
+logger = logging.getLogger(__name__)
+
+# Models and scalers are loaded per section type on first use (or up front, see gunicorn.conf.py)
+registry = ModelRegistry()
+if os.environ.get("OVERSTRENGTH_PRELOAD", "0") == "1":
+    registry.preload()
+
+# Per-stage latencies, request counts and batch sizes, exposed on /metrics
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "overstrength_stage_seconds",
+    "Duration of a request stage (parse, frame, predict, forward, serialize) per section type.",
+    ["stage", "section"])
+request_seconds = metrics.histogram(
+    "overstrength_request_seconds", "End-to-end duration of a prediction request.", ["section"])
+requests_total = metrics.counter(
+    "overstrength_requests_total", "Prediction requests per section type and HTTP status.", ["section", "status"])
+profiles_total = metrics.counter(
+    "overstrength_profiles_total", "Predicted profiles per section type.", ["section"])
+request_batch_size = metrics.histogram(
+    "overstrength_request_batch_size", "Profiles per request and section type.", ["section"], BATCH_SIZE_BUCKETS)
+forward_batch_size = metrics.histogram(
+    "overstrength_forward_batch_size", "Profiles per NN forward pass (after coalescing).", ["section"],
+    BATCH_SIZE_BUCKETS)
+
+# Section type label of the prediction endpoints
+ENDPOINT_SECTIONS = {"predict": "mixed",
+                     "predict_circ": "circ", "predict_circ_batch": "circ",
+                     "predict_rhsshs": "rhsshs", "predict_rhsshs_batch": "rhsshs",
+                     "predict_ih": "ih", "predict_ih_batch": "ih"}
+
+
+def forward(section, X):
+    """Runs the NN forward pass of a section type, recording its duration and batch size."""
+    with stage_seconds.time(stage="forward", section=section):
+        s_pred = registry.get(section).model.predict(X)
+    forward_batch_size.observe(len(s_pred), section=section)
+    return s_pred
+
+
+class ForwardPass:
+    """The (uncoalesced) NN of a section type as a predictor, see `forward`."""
+
+    def __init__(self, section):
+        self.section = section
 
-# Load the best model
-circular_model_fin = tf.keras.models.load_model("DL_files/circular_model_fin.h5")
-RHSSHS_model_fin = tf.keras.models.load_model("DL_files/RHSSHS_model_fin.h5")
-IH_model_fin = tf.keras.models.load_model("DL_files/IH_model_fin.h5")
+    def predict(self, X):
+        return forward(self.section, X)
 
-scaler_circ_x = joblib.load("DL_files/scaler_circ_x.joblib")
-scaler_circ_s = joblib.load("DL_files/scaler_circ_s.joblib")
-scaler_rhsshs_x = joblib.load("DL_files/scaler_rhsshs_x.joblib")
-scaler_rhsshs_s = joblib.load("DL_files/scaler_rhsshs_s.joblib")
-scaler_ih_x = joblib.load("DL_files/scaler_ih_x.joblib")
-scaler_ih_s = joblib.load("DL_files/scaler_ih_s.joblib") 
 
+# Concurrent requests per section type are coalesced into one forward pass (max_wait_ms=0 disables it)
+coalescer = RequestCoalescer(registry,
+                             max_batch_size=int(os.environ.get("OVERSTRENGTH_MAX_BATCH_SIZE", "64")),
+                             max_wait_ms=float(os.environ.get("OVERSTRENGTH_MAX_WAIT_MS", "2")),
+                             predict_fn=forward)
 
-def predict_s(X_html,keras_model,X_scaler,s_scaler):
+# Repeated profiles are answered from an LRU/TTL cache (size 0 disables it)
+cache = PredictionCache(registry,
+                        maxsize=int(os.environ.get("OVERSTRENGTH_CACHE_SIZE", "10000")),
+                        ttl=float(os.environ.get("OVERSTRENGTH_CACHE_TTL", "3600")))
+
+# Standard catalogue profiles are answered from precomputed tables (build_lookup_tables.py)
+lookup_tables = LookupTables(registry)
+
+metrics.callback("overstrength_cache_hits_total", "Profiles answered from the prediction cache.",
+                 lambda: cache.hits, kind="counter")
+metrics.callback("overstrength_cache_misses_total", "Profiles not found in the prediction cache.",
+                 lambda: cache.misses, kind="counter")
+metrics.callback("overstrength_cache_entries", "Predictions held in the prediction cache.",
+                 lambda: cache.stats()["size"])
+metrics.callback("overstrength_lookup_hits_total", "Profiles answered from the catalogue lookup tables.",
+                 lambda: lookup_tables.hits, kind="counter")
+
+# Section type names accepted in the 'section' field of /predict records
+SECTION_ALIASES = {"circ": "circ", "chs": "circ",
+                   "rhsshs": "rhsshs", "rhs": "rhsshs", "shs": "rhsshs",
+                   "ih": "ih", "i": "ih", "h": "ih"}
+
+# Time to import the app (including any preloading), tracked to keep worker startup fast
+startup_time = time.perf_counter() - _import_start
+logger.info(f"Overstrength app ready in {startup_time * 1e3:.1f} ms.")
+
+
+def predict_s(X_html, model, section):
     """
     Predicts the overstrength of a profil using the trained NN model.
 
     Args:
-    X_html (pandas DataFrame): The (unscaled) input data from the Flask app form as a pandas DataFrame.
-    keras_model (keras.models.Sequential): The Keras model to use for making predictions.
-    X_scaler (sklearn.preprocessing.StandardScaler): The scaler used to preprocess the input data.
-    s_scaler (sklearn.preprocessing.StandardScaler): The scaler used to preprocess the output data.
+    X_html (numpy.ndarray): The (unscaled) input data from the Flask app, one profile per row.
+    model (DenseInferenceEngine): The NN model with the input and output scalers folded in.
+    section (str): The section type, used to label the metrics.
 
     Returns:
     postprocessed_prediction (numpy.ndarray): The predicted overstrength (corrctly scaled) as a numpy array.
     """
+    n_profiles = len(np.atleast_2d(X_html))
+    request_batch_size.observe(n_profiles, section=section)
+    profiles_total.inc(n_profiles, section=section)
 
-    # Preprocess the input data
-    X_scaled = X_scaler.transform(X_html)
-    
-    # Use the model to make a prediction
-    prediction_unscaled = keras_model.predict(X_scaled)
-    
-    # Postprocess the prediction
-    postprocessed_prediction = s_scaler.inverse_transform(prediction_unscaled)
+    # Scaling, all layers and the inverse output scaling run in a single forward pass
+    # (catalogue lookup, cache and coalescing included in this stage, see 'forward' for the NN alone)
+    with stage_seconds.time(stage="predict", section=section):
+        postprocessed_prediction = model.predict(X_html)
 
     return postprocessed_prediction
 
 
+def section_model(section, coalesce=True):
+    """
+    Returns the predictor of a section type: catalogue lookup, then cache, then the NN
+    (coalesced with concurrent requests unless `coalesce` is False). Reloads the model first
+    if its files changed on disk.
+    """
+    registry.check(section)
+    model = coalescer.get(section) if coalesce else ForwardPass(section)
+    return lookup_tables.get(section, cache.get(section, model))
+
+
+def read_batch(section):
+    """
+    Reads a batch of profiles from the request, either as a JSON array of records
+    or as a CSV upload (multipart file or text/csv body) with one profile per row.
+
+    Returns:
+    df (pandas DataFrame): The (unscaled) input data, one row per profile.
+    """
+    with stage_seconds.time(stage="parse", section=section):
+        if request.files:
+            return pd.read_csv(next(iter(request.files.values())))
+        if request.mimetype == 'text/csv':
+            return pd.read_csv(io.StringIO(request.get_data(as_text=True)))
+        data = request.get_json()
+
+    with stage_seconds.time(stage="frame", section=section):
+        if isinstance(data, dict):
+            data = [data]
+        return pd.DataFrame.from_records(data)
+
+
+def predict_frame(section, df, coalesce=True):
+    """
+    Predicts the overstrength for a DataFrame of profiles of one section type.
+
+    Returns:
+    s_pred (numpy.ndarray): The predicted overstrength with shape (n, 1).
+    """
+    if df.empty:
+        raise ValueError("Empty batch.")
+
+    # Order the columns as seen during training if the records are keyed by feature name;
+    # rows without names (JSON arrays) must have the features in that order
+    with stage_seconds.time(stage="frame", section=section):
+        feature_names = list(getattr(registry.get(section).X_scaler, 'feature_names_in_', []))
+        if isinstance(df.columns, pd.RangeIndex):
+            if feature_names and len(df.columns) != len(feature_names):
+                raise ValueError(f"Expected {len(feature_names)} features per profile, got {len(df.columns)}.")
+        elif feature_names:
+            unknown = [str(name) for name in df.columns if name not in feature_names]
+            missing = [name for name in feature_names if name not in df.columns]
+            if unknown:
+                raise ValueError(f"Unknown features {unknown} (expected {feature_names}).")
+            if missing:
+                raise ValueError(f"Missing features {missing}.")
+            df = df[feature_names]
+        X = df.to_numpy(dtype=np.float64)
+        if not np.isfinite(X).all():
+            raise ValueError("Non-finite feature values (missing values or rows of different length?).")
+
+    return predict_s(X, section_model(section, coalesce), section)
+
+
+def predict_batch(section):
+    """
+    Predicts the overstrength for a batch of profiles and returns a JSON array
+    with one prediction per input row (in input order).
+    """
+    try:
+        s_pred = predict_frame(section, read_batch(section))
+    except Exception as e:
+        return jsonify({"error": f"DL model execution error. Correct your inputs. ({e})"}), 400
+
+    with stage_seconds.time(stage="serialize", section=section):
+        return jsonify(s_pred[:, 0].tolist())
+
+
+def group_by_head(records):
+    """
+    Groups mixed-section records by model head.
+
+    Each record has a 'section' field (e.g. 'CHS', 'RHS', 'IH') and either the named
+    features of that section or a positional 'features' list.
+
+    Returns:
+    groups (dict): section -> (list of record indices, (n, d) numpy array of features).
+    """
+    groups = {}
+    for i, record in enumerate(records):
+        section = SECTION_ALIASES.get(str(record.get("section", "")).lower())
+        if section is None:
+            raise ValueError(f"Record {i}: unknown section type {record.get('section')!r}.")
+        if "features" in record:
+            row = record["features"]
+        else:
+            feature_names = registry.get(section).X_scaler.feature_names_in_
+            missing = [name for name in feature_names if name not in record]
+            if missing:
+                raise ValueError(f"Record {i}: missing features {missing}.")
+            row = [record[name] for name in feature_names]
+        indices, rows = groups.setdefault(section, ([], []))
+        indices.append(i)
+        rows.append(row)
+    groups = {section: (indices, np.asarray(rows, dtype=np.float64)) for section, (indices, rows) in groups.items()}
+    for section, (_, X) in groups.items():
+        if not np.isfinite(X).all():
+            raise ValueError(f"Non-finite feature values in the {section} records.")
+    return groups
+
+
+def predict_records(records, coalesce=True):
+    """
+    Predicts the overstrength for a mixed batch of CHS, RHS/SHS and I/H records with one
+    forward pass per head. The heads run one after another on the request thread: a shared
+    pool would make concurrent requests queue behind each other's (coalesced) forward passes.
+
+    Returns:
+    s_pred (numpy.ndarray): The predicted overstrength per record, in input order.
+    """
+    if isinstance(records, dict):
+        records = [records]
+    if not records:
+        raise ValueError("Empty batch.")
+
+    with stage_seconds.time(stage="frame", section="mixed"):
+        groups = group_by_head(records)
+
+    s_pred = np.empty(len(records))
+    for section, (indices, X) in groups.items():
+        s_pred[indices] = predict_s(X, section_model(section, coalesce), section)[:, 0]
+    return s_pred
+
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    """Mixed-section batch prediction, returns a JSON array in input order."""
+    try:
+        with stage_seconds.time(stage="parse", section="mixed"):
+            records = request.get_json()
+        s_pred = predict_records(records)
+    except Exception as e:
+        return jsonify({"error": f"DL model execution error. Correct your inputs. ({e})"}), 400
+
+    with stage_seconds.time(stage="serialize", section="mixed"):
+        return jsonify(s_pred.tolist())
+
+
 @app.route('/predict_circ', methods=['POST'])
 def predict_circ():
     error = None  # initialize error message to None
+    s_circ_pred = None
 
     try:
-        data = request.json
-        df = pd.DataFrame(data, index=[0])
+        with stage_seconds.time(stage="parse", section="circ"):
+            data = request.json
+        with stage_seconds.time(stage="frame", section="circ"):
+            df = pd.DataFrame(data, index=[0])
     
         # Pass the input values to the trained model to get the predicted values
-        s_circ_pred = predict_s(df.values, circular_model_fin, scaler_circ_x, scaler_circ_s)
+        s_circ_pred = predict_s(df.values, section_model('circ'), 'circ')
             
-    except:
+    except Exception:
+        logger.exception("circ prediction failed")
         error = "DL model execution error. Correct your inputs."
 
     # Render the response HTML
-    return render_template('input.html', s_circ_pred=s_circ_pred, error=error,)
+    with stage_seconds.time(stage="serialize", section="circ"):
+        return render_template('input.html', s_circ_pred=s_circ_pred, error=error,)
 
 @app.route('/predict_RHSSHS', methods=['POST'])
 def predict_rhsshs():
     error = None  # initialize error message to None
+    s_rhsshs_pred = None
 
     try:
-        data_rhsshs = request.json
-        df_rhsshs = pd.DataFrame(data_rhsshs, index=[0])
+        with stage_seconds.time(stage="parse", section="rhsshs"):
+            data_rhsshs = request.json
+        with stage_seconds.time(stage="frame", section="rhsshs"):
+            df_rhsshs = pd.DataFrame(data_rhsshs, index=[0])
     
         # Pass the input values to the trained model to get the predicted values
-        s_rhsshs_pred = predict_s(df_rhsshs.values, RHSSHS_model_fin, scaler_rhsshs_x, scaler_rhsshs_s)
+        s_rhsshs_pred = predict_s(df_rhsshs.values, section_model('rhsshs'), 'rhsshs')
     
-    except:
+    except Exception:
+        logger.exception("rhsshs prediction failed")
         error = "DL model execution error. Correct your inputs."
 
     # Render the response HTML
-    return render_template('input.html', s_rhsshs_pred=s_rhsshs_pred, error=error,)
+    with stage_seconds.time(stage="serialize", section="rhsshs"):
+        return render_template('input.html', s_rhsshs_pred=s_rhsshs_pred, error=error,)
 
 @app.route('/predict_ih', methods=['POST'])
 def predict_ih():
     error = None  # initialize error message to None
+    s_ih_pred = None
 
     try:
-        data_ih = request.json
-        df_ih = pd.DataFrame(data_ih, index=[0])
+        with stage_seconds.time(stage="parse", section="ih"):
+            data_ih = request.json
+        with stage_seconds.time(stage="frame", section="ih"):
+            df_ih = pd.DataFrame(data_ih, index=[0])
     
         # Pass the input values to the trained model to get the predicted values
-        s_ih_pred = predict_s(df_ih.values, IH_model_fin, scaler_ih_x, scaler_ih_s)
+        s_ih_pred = predict_s(df_ih.values, section_model('ih'), 'ih')
             
-    except:
+    except Exception:
+        logger.exception("ih prediction failed")
         error = "DL model execution error. Correct your inputs."
 
     # Render the response HTML
-    return render_template('input.html', s_ih_pred=s_ih_pred, error=error,)
+    with stage_seconds.time(stage="serialize", section="ih"):
+        return render_template('input.html', s_ih_pred=s_ih_pred, error=error,)
+
+
+@app.route('/predict_circ_batch', methods=['POST'])
+def predict_circ_batch():
+    return predict_batch('circ')
+
+@app.route('/predict_RHSSHS_batch', methods=['POST'])
+def predict_rhsshs_batch():
+    return predict_batch('rhsshs')
+
+@app.route('/predict_ih_batch', methods=['POST'])
+def predict_ih_batch():
+    return predict_batch('ih')
+
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(dict(cache.stats(), lookup_hits=lookup_tables.hits))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.content_type)
+
+
+@app.route('/liveness_check', methods=['GET'])
+def liveness_check():
+    return "ok"
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
 
 
+@app.after_request
+def record_request(response):
+    section = ENDPOINT_SECTIONS.get(request.endpoint)
+    if section is not None and "request_start" in g:
+        request_seconds.observe(time.perf_counter() - g.request_start, section=section)
+        requests_total.inc(section=section, status=response.status_code)
+    return response
@@ -0,0 +1,158 @@
+"""
+ASGI serving mode of the overstrength app with the same routes and responses as app.py.
+
+Requests are parsed on the event loop, while inference runs on a dedicated thread pool
+sized to the number of cores (OVERSTRENGTH_INFERENCE_THREADS), so I/O, JSON parsing and
+model execution overlap without one OS thread per in-flight request. Run it with
+
+    gunicorn -k uvicorn.workers.UvicornWorker -b :$PORT asgi:app --timeout 500
+
+(requires starlette, uvicorn and python-multipart). See locustfile.py for a load test
+against both serving modes.
+"""
+import asyncio
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from flask import render_template
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+import app as wsgi_app
+
+inference_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("OVERSTRENGTH_INFERENCE_THREADS", os.cpu_count() or 1)),
+    thread_name_prefix="inference")
+
+
+async def run_inference(fn, *args):
+    """Runs a (blocking) prediction on the inference thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, fn, *args)
+
+
+async def read_batch(request):
+    """Async counterpart of app.read_batch: JSON array of records or CSV upload/body."""
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = next(iter(form.values()))
+        return pd.read_csv(io.BytesIO(await upload.read()))
+
+    body = await request.body()
+    if content_type.startswith("text/csv"):
+        return pd.read_csv(io.BytesIO(body))
+
+    data = json.loads(body)
+    if isinstance(data, dict):
+        data = [data]
+    return pd.DataFrame.from_records(data)
+
+
+def record_request(section, start, status):
+    wsgi_app.request_seconds.observe(time.perf_counter() - start, section=section)
+    wsgi_app.requests_total.inc(section=section, status=status)
+
+
+ERROR_MESSAGE = "DL model execution error. Correct your inputs."
+
+
+def error_response(e):
+    return JSONResponse({"error": f"{ERROR_MESSAGE} ({e})"}, status_code=400)
+
+
+def batch_route(section):
+    async def endpoint(request):
+        start = time.perf_counter()
+        try:
+            with wsgi_app.stage_seconds.time(stage="parse", section=section):
+                df = await read_batch(request)
+            # The inference pool already bounds the parallelism, so requests are not coalesced here
+            s_pred = await run_inference(wsgi_app.predict_frame, section, df, False)
+        except Exception as e:
+            record_request(section, start, 400)
+            return error_response(e)
+        with wsgi_app.stage_seconds.time(stage="serialize", section=section):
+            response = JSONResponse(s_pred[:, 0].tolist())
+        record_request(section, start, 200)
+        return response
+    return endpoint
+
+
+def single_route(section, result_name):
+    def render(df):
+        """The form with the prediction, or with the error message like app.py when the
+        input could not be parsed (df is None) or the prediction failed."""
+        s_pred, error = None, ERROR_MESSAGE
+        if df is not None:
+            try:
+                s_pred = wsgi_app.predict_s(df.values, wsgi_app.section_model(section, coalesce=False), section)
+                error = None
+            except Exception:
+                wsgi_app.logger.exception(f"{section} prediction failed")
+        with wsgi_app.stage_seconds.time(stage="serialize", section=section), wsgi_app.app.app_context():
+            return render_template('input.html', error=error, **{result_name: s_pred})
+
+    async def endpoint(request):
+        start = time.perf_counter()
+        try:
+            with wsgi_app.stage_seconds.time(stage="parse", section=section):
+                data = json.loads(await request.body())
+            with wsgi_app.stage_seconds.time(stage="frame", section=section):
+                df = pd.DataFrame(data, index=[0])
+        except Exception:
+            wsgi_app.logger.exception(f"{section} prediction failed")
+            df = None
+        status = 500
+        try:
+            response = HTMLResponse(await run_inference(render, df))
+            status = 200
+            return response
+        finally:
+            record_request(section, start, status)
+    return endpoint
+
+
+async def predict(request):
+    start = time.perf_counter()
+    try:
+        with wsgi_app.stage_seconds.time(stage="parse", section="mixed"):
+            records = json.loads(await request.body())
+        s_pred = await run_inference(wsgi_app.predict_records, records, False)
+    except Exception as e:
+        record_request("mixed", start, 400)
+        return error_response(e)
+    with wsgi_app.stage_seconds.time(stage="serialize", section="mixed"):
+        response = JSONResponse(s_pred.tolist())
+    record_request("mixed", start, 200)
+    return response
+
+
+async def cache_stats(request):
+    return JSONResponse(dict(wsgi_app.cache.stats(), lookup_hits=wsgi_app.lookup_tables.hits))
+
+
+async def metrics(request):
+    return Response(wsgi_app.metrics.render(), media_type=wsgi_app.metrics.content_type)
+
+
+async def liveness_check(request):
+    return PlainTextResponse("ok")
+
+
+app = Starlette(routes=[
+    Route('/predict', predict, methods=['POST']),
+    Route('/predict_circ', single_route('circ', 's_circ_pred'), methods=['POST']),
+    Route('/predict_RHSSHS', single_route('rhsshs', 's_rhsshs_pred'), methods=['POST']),
+    Route('/predict_ih', single_route('ih', 's_ih_pred'), methods=['POST']),
+    Route('/predict_circ_batch', batch_route('circ'), methods=['POST']),
+    Route('/predict_RHSSHS_batch', batch_route('rhsshs'), methods=['POST']),
+    Route('/predict_ih_batch', batch_route('ih'), methods=['POST']),
+    Route('/cache_stats', cache_stats, methods=['GET']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/liveness_check', liveness_check, methods=['GET']),
+])
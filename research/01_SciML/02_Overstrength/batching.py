@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predictions for one model into a single forward pass.
+
+    Callers block in `predict(X)` while a background thread collects queued requests for
+    at most `max_wait_ms` milliseconds (or until `max_batch_size` rows are queued), stacks
+    them into one matrix, runs `predict_fn` once and hands every caller its own rows back.
+    It is a drop-in for the model in `predict_s`.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def predict(self, X):
+        """
+        Predicts a (n, d) block of rows, coalesced with other concurrent callers.
+
+        Args:
+        X (numpy.ndarray): The (unscaled) input data with one profile per row.
+
+        Returns:
+        prediction (numpy.ndarray): The rows of the batched prediction belonging to X.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.max_wait <= 0 or self.max_batch_size <= 1:
+            return self.predict_fn(X)
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((X, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        # Threads do not survive a fork, so (re)start the worker in every gunicorn worker process
+        if self._worker_pid != os.getpid():
+            with self._lock:
+                if self._worker_pid != os.getpid():
+                    self._queue = queue.Queue()
+                    threading.Thread(target=self._run, args=(self._queue,), daemon=True).start()
+                    self._worker_pid = os.getpid()
+
+    def _run(self, requests):
+        while True:
+            batch = [requests.get()]
+            n_rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while n_rows < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                n_rows += len(batch[-1][0])
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        try:
+            prediction = self.predict_fn(np.vstack([X for X, _ in batch]))
+        except Exception:
+            # Isolate the failing request(s) instead of failing the whole batch
+            for X, future in batch:
+                try:
+                    future.set_result(self.predict_fn(X))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for X, future in batch:
+            future.set_result(prediction[offset:offset + len(X)])
+            offset += len(X)
+
+
+class RequestCoalescer:
+    """
+    Holds one MicroBatcher per section type on top of the model registry.
+
+    `predict_fn(section, X)` runs one forward pass; by default the model of the section
+    type is taken from the registry.
+    """
+
+    def __init__(self, registry, max_batch_size=64, max_wait_ms=2.0, predict_fn=None):
+        self.registry = registry
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def get(self, section):
+        """Returns the MicroBatcher of a section type."""
+        batcher = self._batchers.get(section)
+        if batcher is None:
+            # Resolve the model per batch, so that models reloaded by the registry are picked up
+            def predict_fn(X):
+                if self.predict_fn is not None:
+                    return self.predict_fn(section, X)
+                return self.registry.get(section).model.predict(X)
+
+            with self._lock:
+                batcher = self._batchers.setdefault(
+                    section, MicroBatcher(predict_fn, self.max_batch_size, self.max_wait_ms))
+        return batcher
@@ -0,0 +1,59 @@
+"""
+Measures prediction throughput under many concurrent single-profile clients, with and
+without request coalescing.
+
+Usage:
+    python benchmark_coalescing.py [--clients 128] [--requests 50] [--max-wait-ms 2]
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from batching import MicroBatcher
+from model_registry import ModelRegistry
+
+
+def run_clients(predict, X, n_clients, n_requests):
+    """Returns the throughput in predictions per second."""
+    barrier = threading.Barrier(n_clients + 1)
+
+    def client():
+        barrier.wait()
+        for i in range(n_requests):
+            predict(X[i % len(X)][None, :])
+
+    threads = [threading.Thread(target=client) for _ in range(n_clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return n_clients * n_requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=128)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    entry = ModelRegistry().get("ih")
+    rng = np.random.default_rng(0)
+    X = entry.X_scaler.mean_ + entry.X_scaler.scale_ * rng.standard_normal((256, entry.X_scaler.n_features_in_))
+
+    direct = run_clients(entry.model.predict, X, args.clients, args.requests)
+    batcher = MicroBatcher(entry.model.predict, args.max_batch_size, args.max_wait_ms)
+    coalesced = run_clients(batcher.predict, X, args.clients, args.requests)
+
+    print(f"{args.clients} clients x {args.requests} requests")
+    print(f"direct:    {direct:10.0f} predictions/s")
+    print(f"coalesced: {coalesced:10.0f} predictions/s ({coalesced / direct:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Compares the latency of the Keras `model.predict` path with the NumPy inference engine.
+
+Usage:
+    python benchmark_inference.py [--repeats 200] [--batch-size 1]
+"""
+import argparse
+import time
+
+import joblib
+import numpy as np
+import tensorflow as tf
+
+from inference import DenseInferenceEngine
+
+MODELS = {
+    "circ": ("DL_files/circular_model_fin.h5", "DL_files/scaler_circ_x.joblib", "DL_files/scaler_circ_s.joblib"),
+    "rhsshs": ("DL_files/RHSSHS_model_fin.h5", "DL_files/scaler_rhsshs_x.joblib", "DL_files/scaler_rhsshs_s.joblib"),
+    "ih": ("DL_files/IH_model_fin.h5", "DL_files/scaler_ih_x.joblib", "DL_files/scaler_ih_s.joblib"),
+}
+
+
+def keras_predict_s(X, keras_model, X_scaler, s_scaler):
+    """The previous request path: scaler transform, Keras predict, inverse transform."""
+    return s_scaler.inverse_transform(keras_model.predict(X_scaler.transform(X), verbose=0))
+
+
+def time_calls(fn, X, repeats):
+    """Returns the per-call latencies in milliseconds."""
+    fn(X)  # warm-up
+    latencies = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        latencies[i] = (time.perf_counter() - start) * 1e3
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'model':<8}{'path':<8}{'p50 [ms]':>10}{'p99 [ms]':>10}{'max |diff|':>12}")
+    for name, (model_path, x_path, s_path) in MODELS.items():
+        X_scaler, s_scaler = joblib.load(x_path), joblib.load(s_path)
+        keras_model = tf.keras.models.load_model(model_path)
+        engine = DenseInferenceEngine.from_h5(model_path, X_scaler, s_scaler)
+
+        X = X_scaler.mean_ + X_scaler.scale_ * rng.standard_normal((args.batch_size, X_scaler.n_features_in_))
+        diff = np.abs(keras_predict_s(X, keras_model, X_scaler, s_scaler) - engine.predict(X)).max()
+
+        for path, fn in [("keras", lambda X: keras_predict_s(X, keras_model, X_scaler, s_scaler)),
+                         ("numpy", engine.predict)]:
+            latencies = time_calls(fn, X, args.repeats)
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{name:<8}{path:<8}{p50:>10.3f}{p99:>10.3f}{diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
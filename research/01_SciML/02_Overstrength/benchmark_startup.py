@@ -0,0 +1,53 @@
+"""
+Measures the startup time of the overstrength app in fresh interpreters: the time to
+import `app` and the latency of the first prediction per section type, both with lazy
+loading and with OVERSTRENGTH_PRELOAD=1.
+
+Usage:
+    python benchmark_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+result = {"import": time.perf_counter() - start, "reported": app.startup_time}
+client = app.app.test_client()
+for section, route in [("circ", "/predict_circ_batch"), ("rhsshs", "/predict_RHSSHS_batch"), ("ih", "/predict_ih_batch")]:
+    n = {"circ": 4, "rhsshs": 8, "ih": 9}[section]
+    start = time.perf_counter()
+    client.post(route, json=[list(range(1, n + 1))])
+    result[section] = time.perf_counter() - start
+print("RESULT" + json.dumps(result))
+"""
+
+
+def run_probe(preload):
+    env = dict(os.environ, OVERSTRENGTH_PRELOAD="1" if preload else "0")
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+    return json.loads(next(line for line in out.splitlines() if line.startswith("RESULT"))[6:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'import [ms]':>12}{'circ [ms]':>12}{'rhsshs [ms]':>12}{'ih [ms]':>12}")
+    for preload in (False, True):
+        runs = [run_probe(preload) for _ in range(args.runs)]
+        medians = {key: 1e3 * np.median([r[key] for r in runs]) for key in ("import", "circ", "rhsshs", "ih")}
+        print(f"{'preload' if preload else 'lazy':<10}{medians['import']:>12.1f}{medians['circ']:>12.1f}"
+              f"{medians['rhsshs']:>12.1f}{medians['ih']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
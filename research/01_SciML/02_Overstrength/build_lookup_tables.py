@@ -0,0 +1,51 @@
+"""
+Offline build step: evaluates the overstrength models over the full catalogue x grade x
+shear length grids (catalogues.py), within the range of its training data, and writes one
+memory-mappable table per section type to DL_files/lookup/. Re-run it whenever a model or
+scaler file changes.
+
+Usage:
+    python build_lookup_tables.py [--out DL_files/lookup]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from catalogues import CATALOGUE_GRIDS, in_training_range, training_stats
+from lookup_tables import LOOKUP_DIR, source_hashes, table_paths
+from model_registry import ModelRegistry
+
+
+def build_table(registry, section, table_dir):
+    """Writes the lookup table of one section type and returns its number of rows."""
+    entry = registry.get(section)
+    X = np.array(list(CATALOGUE_GRIDS[section](training_stats(entry.X_scaler))), dtype=np.float64)
+    X = X[in_training_range(X, entry.X_scaler)]
+    values = np.hstack([X, entry.model.predict(X)])
+
+    values_path, meta_path = table_paths(table_dir, section)
+    np.save(values_path, values)
+    with open(meta_path, "w") as f:
+        json.dump({"section": section,
+                   "columns": list(entry.X_scaler.feature_names_in_) + ["s"],
+                   "rows": len(values),
+                   "source_hashes": source_hashes(registry, section)}, f, indent=2)
+    return len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=LOOKUP_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    registry = ModelRegistry()
+    for section in CATALOGUE_GRIDS:
+        n_rows = build_table(registry, section, args.out)
+        print(f"{section}: {n_rows} catalogue profiles -> {table_paths(args.out, section)[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Standard steel catalogue sections and grades used to precompute the overstrength lookup
+tables (see build_lookup_tables.py). All dimensions in mm, strengths in MPa.
+
+The models were trained on a limited range of each feature, so only the catalogue rows
+within MAX_Z standard deviations of the training mean are tabulated (the input scaler of a
+model holds the mean and standard deviation of its training data), and the parameters
+that are not catalogue properties (hardening, corner radius) are taken from the training data.
+"""
+import itertools
+
+import numpy as np
+
+# Nominal yield strengths of the common structural steel grades (EN 10025, t <= 16 mm)
+GRADES = {"S235": 235.0, "S275": 275.0, "S355": 355.0, "S460": 460.0}
+
+# Shear lengths L_v covered by the tables
+SHEAR_LENGTHS = (500.0, 750.0, 1000.0, 1250.0, 1500.0, 2000.0, 2500.0, 3000.0)
+
+# Rows further than this from the training mean in any feature (in standard deviations) are
+# extrapolations of the model and left out of the tables
+MAX_Z = 3.0
+
+# CHS (EN 10210): outer diameter D x wall thickness t
+CHS_DIAMETERS = (48.3, 60.3, 76.1, 88.9, 114.3, 139.7, 168.3, 219.1, 273.0, 323.9)
+CHS_THICKNESSES = (3.2, 4.0, 5.0, 6.3, 8.0, 10.0)
+
+# SHS / RHS (EN 10210): width b x depth d; the inside corner radius r is the training mean
+# of r / t times t
+HOLLOW_SIZES = ((40.0, 40.0), (50.0, 50.0), (60.0, 60.0), (80.0, 80.0), (100.0, 100.0),
+                (120.0, 120.0), (150.0, 150.0), (200.0, 200.0),
+                (50.0, 100.0), (60.0, 120.0), (80.0, 120.0), (80.0, 160.0), (100.0, 150.0),
+                (100.0, 200.0), (120.0, 200.0), (150.0, 250.0), (150.0, 300.0), (200.0, 300.0))
+HOLLOW_THICKNESSES = (3.2, 4.0, 5.0, 6.3, 8.0, 10.0)
+
+# I / H profiles: name -> (b_f, d, t_f, t_w)
+IH_PROFILES = {
+    "IPE 100": (55.0, 100.0, 5.7, 4.1), "IPE 120": (64.0, 120.0, 6.3, 4.4),
+    "IPE 140": (73.0, 140.0, 6.9, 4.7), "IPE 160": (82.0, 160.0, 7.4, 5.0),
+    "IPE 180": (91.0, 180.0, 8.0, 5.3), "IPE 200": (100.0, 200.0, 8.5, 5.6),
+    "IPE 220": (110.0, 220.0, 9.2, 5.9), "IPE 240": (120.0, 240.0, 9.8, 6.2),
+    "IPE 270": (135.0, 270.0, 10.2, 6.6), "IPE 300": (150.0, 300.0, 10.7, 7.1),
+    "IPE 330": (160.0, 330.0, 11.5, 7.5), "IPE 360": (170.0, 360.0, 12.7, 8.0),
+    "IPE 400": (180.0, 400.0, 13.5, 8.6), "IPE 450": (190.0, 450.0, 14.6, 9.4),
+    "IPE 500": (200.0, 500.0, 16.0, 10.2), "IPE 550": (210.0, 550.0, 17.2, 11.1),
+    "IPE 600": (220.0, 600.0, 19.0, 12.0),
+    "HEA 100": (100.0, 96.0, 8.0, 5.0), "HEA 120": (120.0, 114.0, 8.0, 5.0),
+    "HEA 140": (140.0, 133.0, 8.5, 5.5), "HEA 160": (160.0, 152.0, 9.0, 6.0),
+    "HEA 180": (180.0, 171.0, 9.5, 6.0), "HEA 200": (200.0, 190.0, 10.0, 6.5),
+    "HEA 220": (220.0, 210.0, 11.0, 7.0), "HEA 240": (240.0, 230.0, 12.0, 7.5),
+    "HEA 260": (260.0, 250.0, 12.5, 7.5), "HEA 280": (280.0, 270.0, 13.0, 8.0),
+    "HEA 300": (300.0, 290.0, 14.0, 8.5),
+    "HEB 100": (100.0, 100.0, 10.0, 6.0), "HEB 120": (120.0, 120.0, 11.0, 6.5),
+    "HEB 140": (140.0, 140.0, 12.0, 7.0), "HEB 160": (160.0, 160.0, 13.0, 8.0),
+    "HEB 180": (180.0, 180.0, 14.0, 8.5), "HEB 200": (200.0, 200.0, 15.0, 9.0),
+    "HEB 220": (220.0, 220.0, 16.0, 9.5), "HEB 240": (240.0, 240.0, 17.0, 10.0),
+    "HEB 260": (260.0, 260.0, 17.5, 10.0), "HEB 280": (280.0, 280.0, 18.0, 10.5),
+    "HEB 300": (300.0, 300.0, 19.0, 11.0),
+}
+
+
+def training_stats(X_scaler):
+    """Feature name -> (mean, standard deviation) of the training data of a model."""
+    return dict(zip(X_scaler.feature_names_in_, zip(X_scaler.mean_, X_scaler.scale_)))
+
+
+def in_training_range(X, X_scaler, max_z=MAX_Z):
+    """Mask of the rows of X within max_z standard deviations of the training mean in every feature."""
+    return np.all(np.abs((X - X_scaler.mean_) / X_scaler.scale_) <= max_z, axis=1)
+
+
+def hardening(stats):
+    """E/E_h and eps_h/eps_y: the training means (rounded, as clients send them)."""
+    return round(stats["EzuEsh"][0], 1), round(stats["epsihzuepsii"][0], 1)
+
+
+def circ_grid(stats):
+    """Rows (D, t, Lv, fy) of all CHS catalogue sections x grades x shear lengths."""
+    for D, t in itertools.product(CHS_DIAMETERS, CHS_THICKNESSES):
+        if D / t < 10:
+            continue
+        for Lv, fy in itertools.product(SHEAR_LENGTHS, GRADES.values()):
+            yield (D, t, Lv, fy)
+
+
+def rhsshs_grid(stats):
+    """Rows (b, d, t, r, Lv, fy, E/E_h, eps_h/eps_y) of all SHS/RHS catalogue sections."""
+    e, eps = hardening(stats)
+    r_to_t = round(stats["r"][0] / stats["t"][0], 2)
+    for (b, d), t in itertools.product(HOLLOW_SIZES, HOLLOW_THICKNESSES):
+        if b / t < 8:
+            continue
+        for Lv, fy in itertools.product(SHEAR_LENGTHS, GRADES.values()):
+            yield (b, d, t, round(r_to_t * t, 1), Lv, fy, e, eps)
+
+
+def ih_grid(stats):
+    """Rows (b_f, d, t_f, t_w, Lv, fy_flange, fy_web, E/E_h, eps_h/eps_y) of all I/H profiles."""
+    e, eps = hardening(stats)
+    for bf, d, tf, tw in IH_PROFILES.values():
+        for Lv, fy in itertools.product(SHEAR_LENGTHS, GRADES.values()):
+            yield (bf, d, tf, tw, Lv, fy, fy, e, eps)
+
+
+CATALOGUE_GRIDS = {"circ": circ_grid, "rhsshs": rhsshs_grid, "ih": ih_grid}
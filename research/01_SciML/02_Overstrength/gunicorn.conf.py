@@ -0,0 +1,9 @@
+import os
+
+# Set OVERSTRENGTH_PRELOAD=1 to import the app (and load all models) once in the master
+# process; the forked workers then share the model weights copy-on-write.
+preload_app = os.environ.get("OVERSTRENGTH_PRELOAD", "0") == "1"
+
+# Threaded workers, so that concurrent requests can be coalesced into one forward pass
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
@@ -0,0 +1,139 @@
+import json
+
+import h5py
+import numpy as np
+
+
+class DenseInferenceEngine:
+    """
+    Pure-NumPy forward pass of a trained overstrength model.
+
+    The Keras models are plain chains of Dense, BatchNormalization and Dropout layers
+    (input head -> latent layer -> shared regression tail). At inference time dropout is
+    the identity and batch normalisation is an affine map, so the whole network (together
+    with the input and output StandardScalers) collapses into a short list of
+    (kernel, bias, relu) layers that are evaluated with one matmul each.
+    """
+
+    def __init__(self, layers, n_features):
+        self.layers = layers
+        self.n_features = n_features
+
+    @classmethod
+    def from_h5(cls, model_path, X_scaler=None, s_scaler=None):
+        """
+        Builds the engine from a Keras .h5 file without importing TensorFlow.
+
+        Args:
+        model_path (str): Path to the Keras .h5 model file.
+        X_scaler (sklearn.preprocessing.StandardScaler): The scaler used to preprocess the input data.
+        s_scaler (sklearn.preprocessing.StandardScaler): The scaler used to preprocess the output data.
+
+        Returns:
+        engine (DenseInferenceEngine): The engine predicting the (correctly scaled) overstrength.
+        """
+        with h5py.File(model_path, "r") as f:
+            config = json.loads(f.attrs["model_config"])
+            ops = _read_chain(config, f["model_weights"], scope=None)
+
+        n_features = config["config"]["layers"][0]["config"]["batch_input_shape"][-1]
+
+        if X_scaler is not None:
+            ops.insert(0, ("affine", 1.0 / X_scaler.scale_, -X_scaler.mean_ / X_scaler.scale_))
+        if s_scaler is not None:
+            ops.append(("affine", s_scaler.scale_, s_scaler.mean_))
+
+        return cls(_fold(ops), n_features)
+
+    def predict(self, X):
+        """
+        Predicts the overstrength for a batch of (unscaled) profiles.
+
+        Args:
+        X (numpy.ndarray): The (unscaled) input data with one profile per row.
+
+        Returns:
+        prediction (numpy.ndarray): The predicted overstrength with shape (n, 1).
+        """
+        h = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if h.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features per profile, got {h.shape[1]}.")
+        for kernel, bias, relu in self.layers:
+            h = h @ kernel + bias
+            if relu:
+                np.maximum(h, 0.0, out=h)
+        return h
+
+
+def _layer_weights(group, scope, name):
+    """Collects the weights of layer `name` stored in the h5 `group` as {"kernel": ..., "bias": ...}."""
+    layer_group = group[scope] if scope else group[name]
+    weights = {}
+    for weight_name in layer_group.attrs["weight_names"]:
+        weight_name = weight_name.decode() if isinstance(weight_name, bytes) else weight_name
+        layer, param = weight_name.split("/")[-2:]
+        if layer == name:
+            weights[param.split(":")[0]] = np.asarray(layer_group[weight_name], dtype=np.float64)
+    return weights
+
+
+def _read_chain(config, group, scope):
+    """Translates a (possibly nested) sequential Keras model config into a list of ops."""
+    ops = []
+    for layer in config["config"]["layers"]:
+        kind, cfg = layer["class_name"], layer["config"]
+        if kind in ("InputLayer", "Dropout"):
+            continue
+        if kind in ("Functional", "Sequential", "Model"):
+            ops.extend(_read_chain(layer, group, scope=cfg["name"]))
+        elif kind == "Dense":
+            if cfg["activation"] not in ("relu", "linear"):
+                raise ValueError(f"Unsupported activation: {cfg['activation']}")
+            w = _layer_weights(group, scope, cfg["name"])
+            bias = w.get("bias", np.zeros(w["kernel"].shape[1]))
+            ops.append(("dense", w["kernel"], bias, cfg["activation"] == "relu"))
+        elif kind == "BatchNormalization":
+            w = _layer_weights(group, scope, cfg["name"])
+            n = w["moving_mean"].shape[0]
+            gamma = w.get("gamma", np.ones(n))
+            beta = w.get("beta", np.zeros(n))
+            a = gamma / np.sqrt(w["moving_variance"] + cfg["epsilon"])
+            ops.append(("affine", a, beta - a * w["moving_mean"]))
+        else:
+            raise ValueError(f"Unsupported layer type: {kind}")
+    return ops
+
+
+def _fold(ops):
+    """
+    Folds affine maps into the neighbouring dense layers and merges consecutive linear
+    dense layers, so that only (kernel, bias, relu) layers remain.
+    """
+    layers = []
+    pending = None  # affine map (a, c) waiting to be folded into the next dense layer
+    for op in ops:
+        if op[0] == "affine":
+            _, a, c = op
+            if pending is not None:
+                a, c = pending[0] * a, pending[1] * a + c
+            pending = (a, c)
+            continue
+
+        _, kernel, bias, relu = op
+        if pending is not None:
+            a, c = pending
+            kernel, bias = a[:, None] * kernel, bias + c @ kernel
+            pending = None
+        if layers and not layers[-1][2]:
+            prev_kernel, prev_bias, _ = layers.pop()
+            kernel, bias = prev_kernel @ kernel, prev_bias @ kernel + bias
+        layers.append((kernel, bias, relu))
+
+    if pending is not None:
+        a, c = pending
+        if layers and not layers[-1][2]:
+            kernel, bias, _ = layers.pop()
+            layers.append((kernel * a, bias * a + c, False))
+        else:
+            layers.append((np.diag(a), c, False))
+    return layers
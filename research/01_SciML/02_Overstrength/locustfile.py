@@ -0,0 +1,60 @@
+"""
+Load test of the overstrength service, to compare the sync (gunicorn/Flask) and the async
+(uvicorn/ASGI) serving modes under the same traffic.
+
+    # sync mode
+    gunicorn -c gunicorn.conf.py -b :8080 app:app
+    # async mode
+    gunicorn -k uvicorn.workers.UvicornWorker -b :8080 asgi:app
+
+    locust -f locustfile.py --host http://localhost:8080 --headless -u 200 -r 50 -t 60s
+
+Every request uses a fresh random profile, so the prediction cache does not short-circuit
+the comparison. Set LOADTEST_CATALOGUE=1 to send catalogue profiles instead.
+"""
+import os
+import random
+
+from locust import FastHttpUser, between, task
+
+CATALOGUE = os.environ.get("LOADTEST_CATALOGUE", "0") == "1"
+
+
+def circ_record():
+    if CATALOGUE:
+        return {"D": 168.3, "t": 6.3, "Lv": 1000.0, "fy": 355.0}
+    return {"D": random.uniform(50, 300), "t": random.uniform(2, 10),
+            "Lv": random.uniform(300, 2000), "fy": random.uniform(235, 460)}
+
+
+def rhsshs_record():
+    t = random.uniform(2, 8)
+    return {"b": random.uniform(40, 200), "d": random.uniform(60, 300), "t": t, "r": t,
+            "Lv": random.uniform(300, 2000), "fy": random.uniform(235, 460),
+            "EzuEsh": random.uniform(45, 50), "epsihzuepsii": random.uniform(9.5, 10.5)}
+
+
+def ih_record():
+    fy = random.uniform(235, 460)
+    return {"bf": random.uniform(50, 300), "d": random.uniform(100, 600), "tf": random.uniform(5, 20),
+            "tw": random.uniform(4, 12), "Lv": random.uniform(500, 3000), "fy_flange": fy, "fy_web": fy,
+            "EzuEsh": random.uniform(40, 50), "epsihzuepsii": random.uniform(9, 11)}
+
+
+class OverstrengthUser(FastHttpUser):
+    wait_time = between(0.0, 0.01)
+
+    @task(6)
+    def single_profile(self):
+        self.client.post("/predict_circ_batch", json=[circ_record()], name="/predict_*_batch (1 row)")
+
+    @task(3)
+    def mixed_portfolio(self):
+        records = [dict(circ_record(), section="CHS"), dict(rhsshs_record(), section="RHS"),
+                   dict(ih_record(), section="IH")]
+        self.client.post("/predict", json=records, name="/predict (mixed)")
+
+    @task(1)
+    def screening_batch(self):
+        self.client.post("/predict_ih_batch", json=[ih_record() for _ in range(100)],
+                         name="/predict_*_batch (100 rows)")
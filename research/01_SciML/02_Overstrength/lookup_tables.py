@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from prediction_cache import canonical_features
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DL_files", "lookup")
+
+
+def source_hashes(registry, section):
+    """SHA-256 of the model and scaler files a table of `section` is computed from."""
+    hashes = []
+    for f in registry.section_files[section]:
+        with open(os.path.join(registry.base_dir, f), "rb") as fh:
+            hashes.append(hashlib.sha256(fh.read()).hexdigest())
+    return hashes
+
+
+def table_paths(table_dir, section):
+    return os.path.join(table_dir, f"{section}.npy"), os.path.join(table_dir, f"{section}.json")
+
+
+def path_signature(path):
+    """(mtime, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class LookupTables:
+    """
+    Precomputed overstrength tables for standard catalogue sections (build_lookup_tables.py).
+
+    Each table is a memory-mapped (n, d + 1) array of feature rows plus the predicted s,
+    indexed by the canonical feature row, so catalogue profiles are answered with a dict
+    lookup. A table is only used if it was built from the model and scaler files currently
+    on disk; rows that are not in the table fall through to the wrapped predictor.
+
+    The model, scaler and table files are checked at most every `check_interval` seconds,
+    also while a section has no valid table, so a table (re)built by build_lookup_tables.py
+    is picked up without a restart.
+    """
+
+    def __init__(self, registry, table_dir=LOOKUP_DIR, check_interval=5.0):
+        self.registry = registry
+        self.table_dir = table_dir
+        self.check_interval = check_interval
+        self.hits = 0
+        self._tables = {}
+        self._last_check = {}
+        self._lock = threading.Lock()
+        self._hits_lock = threading.Lock()
+
+    def get(self, section, predictor):
+        """Wraps `predictor` (anything with .predict) with the lookup table of `section`."""
+        return _LookupPredictor(self, section, predictor)
+
+    def table(self, section):
+        """Returns (values, index) of a section type, or None if there is no valid table."""
+        self._check_files(section)
+        if section not in self._tables:
+            with self._lock:
+                if section not in self._tables:
+                    self._tables[section] = self._load(section)
+        return self._tables[section]
+
+    def predict(self, section, X, predict_fn):
+        """
+        Answers the catalogue rows of X from the table and the others with `predict_fn`.
+
+        Returns:
+        prediction (numpy.ndarray): The predicted overstrength with shape (n, 1).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        table = self.table(section)
+        if table is None:
+            return predict_fn(X)
+
+        values, index = table
+        rows = np.array([index.get(canonical_features(row), -1) for row in X], dtype=np.int64)
+        found = rows >= 0
+        with self._hits_lock:
+            self.hits += int(found.sum())
+        if found.all():
+            return np.asarray(values[rows, -1:])
+
+        prediction = np.empty((len(X), 1))
+        prediction[found] = values[rows[found], -1:]
+        prediction[~found] = predict_fn(X[~found])
+        return prediction
+
+    def _signature(self, section):
+        """(mtime, size) of the model and scaler files and of the table files of a section type."""
+        return self.registry.file_signature(section), tuple(map(path_signature, table_paths(self.table_dir, section)))
+
+    def _load(self, section):
+        # Recorded first, so that a missing or stale table is checked again as well
+        self._last_check[section] = (time.monotonic(), self._signature(section))
+        values_path, meta_path = table_paths(self.table_dir, section)
+        if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta["source_hashes"] != source_hashes(self.registry, section):
+            logger.warning(f"Ignoring stale {section} lookup table; rebuild it with build_lookup_tables.py.")
+            return None
+
+        values = np.load(values_path, mmap_mode="r")
+        index = {canonical_features(row): i for i, row in enumerate(values[:, :-1])}
+        logger.info(f"Loaded {section} lookup table with {len(index)} catalogue profiles.")
+        return values, index
+
+    def _check_files(self, section):
+        last = self._last_check.get(section)
+        if last is None or time.monotonic() - last[0] < self.check_interval:
+            return
+        try:
+            signature = self._signature(section)
+        except OSError:
+            return  # keep the current table while the model files are being replaced
+        self._last_check[section] = (time.monotonic(), signature)
+        if signature != last[1]:
+            with self._lock:
+                self._tables.pop(section, None)
+
+
+class _LookupPredictor:
+    def __init__(self, tables, section, predictor):
+        self.tables = tables
+        self.section = section
+        self.predictor = predictor
+
+    def predict(self, X):
+        return self.tables.predict(self.section, X, self.predictor.predict)
@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+from inference import DenseInferenceEngine
+
+logger = logging.getLogger(__name__)
+
+DL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "DL_files")
+
+# Model file, input scaler and output scaler per section type
+SECTION_FILES = {
+    "circ": ("circular_model_fin.h5", "scaler_circ_x.joblib", "scaler_circ_s.joblib"),
+    "rhsshs": ("RHSSHS_model_fin.h5", "scaler_rhsshs_x.joblib", "scaler_rhsshs_s.joblib"),
+    "ih": ("IH_model_fin.h5", "scaler_ih_x.joblib", "scaler_ih_s.joblib"),
+}
+
+SectionModel = namedtuple("SectionModel", ["model", "X_scaler", "s_scaler"])
+
+
+class ModelRegistry:
+    """
+    Loads the model and scaler pair of a section type on first use and keeps it cached.
+
+    Calling `preload()` before the gunicorn workers are forked (see gunicorn.conf.py) loads
+    everything once in the master, so the workers share the weights copy-on-write.
+
+    `check(section)` looks at the model and scaler files at most every `check_interval`
+    seconds and drops the section if one changed on disk, so that it is reloaded. Each drop
+    increments the section's `generation`, which lets caches tell results of the old model
+    from those of the new one.
+    """
+
+    def __init__(self, base_dir=DL_DIR, section_files=SECTION_FILES, check_interval=5.0):
+        self.base_dir = base_dir
+        self.section_files = section_files
+        self.check_interval = check_interval
+        self.load_times = {}
+        self._entries = {}
+        self._signatures = {}
+        self._generations = {}
+        self._last_check = {}
+        self._lock = threading.Lock()
+
+    def get(self, section):
+        """
+        Returns the SectionModel of a section type, loading it if necessary.
+
+        Args:
+        section (str): The section type ('circ', 'rhsshs' or 'ih').
+
+        Returns:
+        entry (SectionModel): The NN model (scalers folded in) and its scalers.
+        """
+        entry = self._entries.get(section)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(section)
+                if entry is None:
+                    entry = self._entries[section] = self._load(section)
+        return entry
+
+    def preload(self, sections=None):
+        """Loads the given section types (default: all) up front."""
+        for section in sections or self.section_files:
+            self.get(section)
+
+    def is_loaded(self, section):
+        return section in self._entries
+
+    def file_signature(self, section):
+        """Returns (mtime, size) of the model and scaler files of a section type."""
+        signature = []
+        for f in self.section_files[section]:
+            stat = os.stat(os.path.join(self.base_dir, f))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def changed(self, section):
+        """Whether a model or scaler file of a loaded section type changed on disk since loading."""
+        if section not in self._signatures:
+            return False
+        try:
+            return self.file_signature(section) != self._signatures[section]
+        except OSError:
+            return False  # keep serving the loaded model while the files are being replaced
+
+    def check(self, section):
+        """Invalidates a section type if its files changed (checked at most every check_interval seconds)."""
+        now = time.monotonic()
+        if now - self._last_check.get(section, 0.0) < self.check_interval:
+            return
+        self._last_check[section] = now
+        if self.changed(section):
+            logger.info(f"{section} model files changed on disk, reloading (pid {os.getpid()}).")
+            self.invalidate(section)
+
+    def generation(self, section):
+        """Number of times a section type was invalidated."""
+        return self._generations.get(section, 0)
+
+    def invalidate(self, section):
+        """Drops a section type, so that it is reloaded from disk on next use."""
+        with self._lock:
+            self._entries.pop(section, None)
+            self._signatures.pop(section, None)
+            self._generations[section] = self._generations.get(section, 0) + 1
+
+    def _load(self, section):
+        import joblib  # deferred: importing scikit-learn dominates the startup time
+
+        if section not in self.section_files:
+            raise KeyError(f"Unknown section type: {section}")
+        model_file, x_file, s_file = (os.path.join(self.base_dir, f) for f in self.section_files[section])
+
+        start = time.perf_counter()
+        self._signatures[section] = self.file_signature(section)
+        X_scaler = joblib.load(x_file)
+        s_scaler = joblib.load(s_file)
+        model = DenseInferenceEngine.from_h5(model_file, X_scaler, s_scaler)
+        self.load_times[section] = time.perf_counter() - start
+
+        logger.info(f"Loaded {section} model in {self.load_times[section] * 1e3:.1f} ms (pid {os.getpid()}).")
+        return SectionModel(model, X_scaler, s_scaler)
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def canonical_features(row):
+    """Hashable canonical form of a feature row: float noise rounded away, -0.0 folded into 0.0."""
+    return tuple((np.round(np.asarray(row, dtype=np.float64), 10) + 0.0).tolist())
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with time-to-live for overstrength predictions.
+
+    Entries are keyed on the section type plus the canonicalized feature vector of a single
+    profile, so repeated catalogue profiles skip the forward pass entirely. Each entry is
+    tagged with the registry generation of its section: once the registry reloads a model
+    (ModelRegistry.check), older entries are dropped, and predictions that were computed
+    with the old model while it was reloaded are not stored.
+    """
+
+    def __init__(self, registry, maxsize=10000, ttl=3600.0):
+        self.registry = registry
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def predict(self, section, X, predict_fn):
+        """
+        Predicts the overstrength for a batch of profiles, calling `predict_fn` only for
+        the rows that are not cached.
+
+        Args:
+        section (str): The section type ('circ', 'rhsshs' or 'ih').
+        X (numpy.ndarray): The (unscaled) input data with one profile per row.
+        predict_fn (callable): Predicts the missing rows, e.g. `model.predict`.
+
+        Returns:
+        prediction (numpy.ndarray): The predicted overstrength with shape (n, 1).
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        if self.maxsize <= 0:
+            return predict_fn(X)
+        generation = self.registry.generation(section)
+        if self._generations.setdefault(section, generation) != generation:
+            self.clear(section)
+            self._generations[section] = generation
+
+        keys = [self._key(section, row) for row in X]
+        prediction = np.empty((len(X), 1))
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now and entry[2] == generation:
+                    self._entries.move_to_end(key)
+                    prediction[i] = entry[0]
+                else:
+                    missing.append(i)
+            self.hits += len(X) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = predict_fn(X[missing])
+            prediction[missing] = computed
+            expires = time.monotonic() + self.ttl
+            with self._lock:
+                if self.registry.generation(section) != generation:
+                    return prediction  # the model was reloaded meanwhile, do not store old results
+                for i, value in zip(missing, computed):
+                    self._entries[keys[i]] = (value, expires, generation)
+                    self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return prediction
+
+    def clear(self, section=None):
+        """Drops all cached predictions (of one section type)."""
+        with self._lock:
+            if section is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == section]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def get(self, section, predictor):
+        """Wraps `predictor` (anything with .predict, e.g. a MicroBatcher) with this cache."""
+        return _CachedPredictor(self, section, predictor)
+
+    @staticmethod
+    def _key(section, row):
+        return (section, canonical_features(row))
+
+
+class _CachedPredictor:
+    def __init__(self, cache, section, predictor):
+        self.cache = cache
+        self.section = section
+        self.predictor = predictor
+
+    def predict(self, X):
+        return self.cache.predict(self.section, X, self.predictor.predict)
@@ -0,0 +1,95 @@
+"""
+Compares the per-point loop signed distance with the chunked NumPy version in utils.py.
+
+The loop version is only run up to --max-reference points (it scales to minutes beyond
+that); for larger sizes its time is extrapolated linearly from the largest measured size.
+A second table compares the brute-force and the indexed (PolygonIndex) backend on wavy
+outlines with many vertices.
+
+Usage:
+    python benchmark_sdf.py [--sizes 1000 100000 1000000] [--max-reference 100000]
+                            [--vertices 1000 10000 100000] [--index-points 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils import compute_signed_distance_vectorized, is_inside_polygon
+
+# Comb polygon of 1_Fit_NN_SDF.ipynb
+x = [0, 0, 0.1, 0.1, 0.2, 0.2, 0.3, 0.3, 0.6, 0.6, 0.7, 0.7, 0.8, 0.8, 0.9, 0.9, 1, 1, 0.5, 0.5, 0.4, 0.4, 0]
+y = [1, 0.8, 0.8, 0, 0, 0.8, 0.8, 0, 0, 0.8, 0.8, 0, 0, 0.8, 0.8, 0, 0, 1, 1, 0.2, 0.2, 1, 1]
+
+
+def loop_signed_distance(points, poly_x, poly_y):
+    """The previous implementation: a Python loop over points x edges."""
+    poly_points = np.column_stack((poly_x, poly_y))
+    n = len(poly_points)
+
+    def point_to_line_segment_distance(p, a, b):
+        ab = b - a
+        ap = p - a
+        projection = np.clip(np.dot(ap, ab) / (np.dot(ab, ab) + 1e-10), 0, 1)
+        return np.linalg.norm(p - (a + projection * ab))
+
+    distances = np.array([
+        min(point_to_line_segment_distance(p, poly_points[i], poly_points[(i + 1) % n]) for i in range(n))
+        for p in points
+    ])
+    inside = np.array([is_inside_polygon(point[0], point[1], poly_x, poly_y) for point in points])
+    return np.where(inside, distances, -distances)
+
+
+def wavy_polygon(n_vertices, rng):
+    """Closed outline with n_vertices vertices, standing in for a detailed floor plan."""
+    t = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    r = 1 + 0.05 * np.sin(40 * t) + 0.01 * rng.standard_normal(n_vertices)
+    return r * np.cos(t), r * np.sin(t)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--max-reference", type=int, default=100000)
+    parser.add_argument("--vertices", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--index-points", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    reference_rate = None
+    print(f"{'points':>10}{'loop [s]':>14}{'numpy [s]':>12}{'speed-up':>10}{'identical':>11}")
+    for n_points in args.sizes:
+        points = rng.uniform(-0.1, 1.1, size=(n_points, 2))
+        sdf, t_numpy = timed(compute_signed_distance_vectorized, points, x, y)
+
+        if n_points <= args.max_reference:
+            reference, t_loop = timed(loop_signed_distance, points, x, y)
+            reference_rate = t_loop / n_points
+            identical, loop_label = str(np.array_equal(reference, sdf)), f"{t_loop:.3f}"
+        elif reference_rate is not None:
+            t_loop = reference_rate * n_points
+            identical, loop_label = "-", f"~{t_loop:.1f} (est.)"
+        else:
+            print(f"{n_points:>10}{'-':>14}{t_numpy:>12.3f}{'-':>10}{'-':>11}")
+            continue
+        print(f"{n_points:>10}{loop_label:>14}{t_numpy:>12.3f}{t_loop / t_numpy:>9.0f}x{identical:>11}")
+
+    print(f"\n{'vertices':>10}{'brute [s]':>14}{'index [s]':>12}{'speed-up':>10}{'identical':>11}")
+    points = rng.uniform(-1.2, 1.2, size=(args.index_points, 2))
+    for n_vertices in args.vertices:
+        poly_x, poly_y = wavy_polygon(n_vertices, rng)
+        brute, t_brute = timed(compute_signed_distance_vectorized, points, poly_x, poly_y, method='brute')
+        indexed, t_index = timed(compute_signed_distance_vectorized, points, poly_x, poly_y, method='index')
+        identical = str(np.array_equal(brute, indexed))
+        print(f"{n_vertices:>10}{t_brute:>14.3f}{t_index:>12.3f}{t_brute / t_index:>9.0f}x{identical:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Builds SDF training sets (sample points + signed distances) with a process pool and caches
+them on disk, so large datasets are generated once (e.g. as a background job) and then
+memory-mapped by the notebooks.
+
+The cache entry is keyed by a hash of the geometry and all sampling parameters, so
+changing the polygon, the sampling or the seed produces a new dataset. The signed
+distances are computed chunk by chunk in worker processes, which write straight into a
+memory-mapped .npy file.
+
+Usage:
+    python sdf_dataset.py polygon.json --method random --n-samples 1000000 [--seed 0] [--workers 8]
+
+polygon.json: {"x": [...], "y": [...], "holes": [{"x": [...], "y": [...]}, ...]}
+or {"regions": [<one such object per region>, ...]}.
+"""
+import argparse
+import hashlib
+import json
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import PolygonGeometry, domain_points
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sdf_cache")
+
+# Bump when the sampling or SDF code changes in a way that alters cached datasets
+DATASET_VERSION = 2
+
+_worker_geometry = None
+
+
+def _init_worker(geometry):
+    global _worker_geometry
+    _worker_geometry = geometry
+
+
+def _fill_chunk(points_path, sdf_path, start, stop):
+    """Computes the signed distances of points[start:stop] into the sdf memmap (in a worker)."""
+    points = np.load(points_path, mmap_mode='r')
+    sdf = np.load(sdf_path, mmap_mode='r+')
+    sdf[start:stop] = _worker_geometry.signed_distance(points[start:stop])
+    sdf.flush()
+    return stop - start
+
+
+def dataset_key(geometry, method='random', n_samples=500, grid_size=(50, 50), dx=0.1, dy=0.1, seed=0):
+    """Hash of the geometry and the sampling parameters, used as the cache key."""
+    params = {"version": DATASET_VERSION, "geometry": geometry.fingerprint(), "method": method, "dx": dx, "dy": dy}
+    if method in ('random', 'adaptive'):
+        params.update(n_samples=n_samples, seed=seed)
+    else:
+        params.update(grid_size=list(grid_size))
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16], params
+
+
+def build_sdf_dataset(geometry, method='random', n_samples=500, grid_size=(50, 50), dx=0.1, dy=0.1, seed=0,
+                      cache_dir=CACHE_DIR, n_workers=None, chunk_size=65536, verbose=False):
+    """
+    Returns the sample points and signed distances of a domain, from the cache if available.
+
+    Parameters:
+    - geometry: The PolygonGeometry of the domain.
+    - method, n_samples, grid_size, dx, dy: As in `sample_domain`.
+    - seed: Seed of the random sampling (the dataset is reproducible and cacheable).
+    - cache_dir: Directory of the cached datasets.
+    - n_workers: Number of worker processes (default: all cores, 0 or 1: in-process).
+    - chunk_size: Number of points per task.
+
+    Returns:
+    - sample_points: A (n, 2) read-only memory-mapped array of sampled points.
+    - signed_distances: A (n,) read-only memory-mapped array of their signed distances.
+    """
+    key, params = dataset_key(geometry, method, n_samples, grid_size, dx, dy, seed)
+    points_path = os.path.join(cache_dir, f"{key}.points.npy")
+    sdf_path = os.path.join(cache_dir, f"{key}.sdf.npy")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    # The metadata file is written last, so its presence marks a complete entry
+    if not os.path.exists(meta_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        _build(geometry, params, points_path, sdf_path, meta_path, n_workers, chunk_size, verbose)
+    elif verbose:
+        print(f"Reusing cached SDF dataset {key}.")
+
+    return np.load(points_path, mmap_mode='r'), np.load(sdf_path, mmap_mode='r')
+
+
+def _tmp_path(path):
+    """A unique file name next to `path`, so that concurrent builds of the same entry don't share files."""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp.npy"
+
+
+def _build(geometry, params, points_path, sdf_path, meta_path, n_workers, chunk_size, verbose):
+    tmp_points, tmp_sdf = _tmp_path(points_path), _tmp_path(sdf_path)
+    try:
+        n_points = _fill(geometry, params, tmp_points, tmp_sdf, n_workers, chunk_size, verbose)
+    except BaseException:
+        for path in (tmp_points, tmp_sdf):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    # A concurrent build of the same entry writes the same data to its own files, so
+    # whichever is replaced last is complete as well
+    os.replace(tmp_points, points_path)
+    os.replace(tmp_sdf, sdf_path)
+    with open(meta_path, "w") as f:
+        json.dump(dict(params, n_points=n_points), f, indent=2)
+
+
+def _fill(geometry, params, tmp_points, tmp_sdf, n_workers, chunk_size, verbose):
+    """Samples the points into tmp_points, computes their signed distances into tmp_sdf and returns their number."""
+    rng = np.random.default_rng(params.get("seed"))
+    sample_points = domain_points(geometry, method=params["method"], n_samples=params.get("n_samples", 500),
+                                  grid_size=params.get("grid_size", (50, 50)), dx=params["dx"], dy=params["dy"],
+                                  rng=rng)
+    np.save(tmp_points, sample_points)
+    n_points = len(sample_points)
+    del sample_points
+    np.lib.format.open_memmap(tmp_sdf, mode='w+', dtype=np.float64, shape=(n_points,)).flush()
+
+    chunks = [(start, min(start + chunk_size, n_points)) for start in range(0, n_points, chunk_size)]
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    done = 0
+    if n_workers <= 1 or len(chunks) == 1:
+        _init_worker(geometry)
+        for start, stop in chunks:
+            done += _fill_chunk(tmp_points, tmp_sdf, start, stop)
+    else:
+        with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(geometry,)) as pool:
+            futures = [pool.submit(_fill_chunk, tmp_points, tmp_sdf, start, stop) for start, stop in chunks]
+            for future in futures:
+                done += future.result()
+                if verbose:
+                    print(f"\r{done}/{n_points} points", end="", flush=True)
+        if verbose:
+            print()
+    return n_points
+
+
+def _region(spec):
+    return (spec["x"], spec["y"]), [(hole["x"], hole["y"]) for hole in spec.get("holes", [])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("polygon", help="JSON file with the domain, see the module docstring")
+    parser.add_argument("--method", default="random", choices=["random", "grid", "adaptive"])
+    parser.add_argument("--n-samples", type=int, default=1000000)
+    parser.add_argument("--grid-size", type=int, nargs=2, default=[1000, 1000])
+    parser.add_argument("--dx", type=float, default=0.1)
+    parser.add_argument("--dy", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    with open(args.polygon) as f:
+        spec = json.load(f)
+    geometry = PolygonGeometry.from_regions([_region(region) for region in spec.get("regions", [spec])])
+
+    points, sdf = build_sdf_dataset(geometry, args.method, args.n_samples, tuple(args.grid_size), args.dx, args.dy,
+                                    args.seed, cache_dir=args.cache_dir, n_workers=args.workers, verbose=True)
+    print(f"{len(points)} points, key {dataset_key(geometry, args.method, args.n_samples, tuple(args.grid_size), args.dx, args.dy, args.seed)[0]}")
+
+
+if __name__ == "__main__":
+    main()
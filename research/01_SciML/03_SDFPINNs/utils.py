@@ -1,3 +1,7 @@
+import hashlib
+import itertools
+from collections import OrderedDict
+
 import numpy as np
 
 def is_inside_polygon(x, y, poly_x, poly_y):
@@ -16,55 +20,527 @@ def is_inside_polygon(x, y, poly_x, poly_y):
         p1x, p1y = p2x, p2y
     return inside
 
-def compute_signed_distance_vectorized(points, poly_x, poly_y):
+def _polygon_edges(poly_x, poly_y):
+    """Start and end points of the polygon edges (closing edge included)."""
+    a = np.column_stack((np.asarray(poly_x, dtype=float), np.asarray(poly_y, dtype=float)))
+    return a, np.roll(a, -1, axis=0)
+
+
+def _segment_distances(px, py, a, b):
+    """Distances of points (px, py) to segments a-b (broadcast: points x segments or pairwise)."""
+    abx, aby = b[..., 0] - a[..., 0], b[..., 1] - a[..., 1]
+    # Projection of the point onto the segment, clamped to its end points
+    projection = ((px - a[..., 0]) * abx + (py - a[..., 1]) * aby) / (abx * abx + aby * aby + 1e-10)
+    np.clip(projection, 0, 1, out=projection)
+    dx = px - (a[..., 0] + projection * abx)
+    dy = py - (a[..., 1] + projection * aby)
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def _ray_crossings(px, py, a, b):
+    """Whether the ray from (px, py) towards +x crosses segment a-b (the rule of `is_inside_polygon`)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Horizontal edges give inf/nan here but never pass the y test below
+        x_inters = (py - a[..., 1]) * (b[..., 0] - a[..., 0]) / (b[..., 1] - a[..., 1]) + a[..., 0]
+    return ((py > np.minimum(a[..., 1], b[..., 1])) & (py <= np.maximum(a[..., 1], b[..., 1]))
+            & (px <= np.maximum(a[..., 0], b[..., 0])) & ((a[..., 0] == b[..., 0]) | (px <= x_inters)))
+
+
+def points_inside_polygon(points, poly_x, poly_y, chunk_size=None):
+    """
+    Array version of `is_inside_polygon` (same crossing-number rule, same result per point).
+
+    Parameters:
+    - points: (n, 2) array of query points.
+    - poly_x, poly_y: Coordinates of the polygon vertices.
+    - chunk_size: Number of points tested at once (default: about 2**18 point-edge pairs per chunk).
+
+    Returns:
+    - inside: Boolean array of shape (n,).
+    """
+    return _edges_inside(points, *_polygon_edges(poly_x, poly_y), chunk_size)
+
+
+def _edges_inside(points, a, b, chunk_size=None):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    chunk_size = chunk_size or max(1, 2**18 // len(a))
+
+    inside = np.empty(len(points), dtype=bool)
+    for start in range(0, len(points), chunk_size):
+        px = points[start:start + chunk_size, 0:1]
+        py = points[start:start + chunk_size, 1:2]
+        inside[start:start + chunk_size] = np.count_nonzero(_ray_crossings(px, py, a, b), axis=1) % 2 == 1
+    return inside
+
+
+def unsigned_distance_to_polygon(points, poly_x, poly_y, chunk_size=None):
+    """
+    Distance of every point to the closest polygon edge, evaluated for chunks of points
+    against all edges at once.
+
+    Returns:
+    - distances: Array of shape (n,).
+    """
+    return _edges_distance(points, *_polygon_edges(poly_x, poly_y), chunk_size)
+
+
+def _edges_distance(points, a, b, chunk_size=None):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    chunk_size = chunk_size or max(1, 2**18 // len(a))
+
+    distances = np.empty(len(points))
+    for start in range(0, len(points), chunk_size):
+        px = points[start:start + chunk_size, 0:1]
+        py = points[start:start + chunk_size, 1:2]
+        distances[start:start + chunk_size] = _segment_distances(px, py, a, b).min(axis=1)
+    return distances
+
+
+def _csr(keys, values, n_keys):
+    """Groups `values` by integer `keys` into (start offsets, grouped values)."""
+    order = np.argsort(keys, kind='stable')
+    starts = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=starts[1:])
+    return starts, values[order]
+
+
+def _morton_codes(points, lo, hi, bits=16):
+    """Z-order codes of 2D points within the box lo-hi (points outside are clamped to it)."""
+    scaled = np.clip((points - lo) / np.where(hi > lo, hi - lo, 1.0), 0.0, 1.0) * (2**bits - 1)
+    codes = np.zeros(len(points), dtype=np.int64)
+    for axis in range(2):
+        v = scaled[:, axis].astype(np.int64)
+        for bit in range(bits):
+            codes |= ((v >> bit) & 1) << (2 * bit + axis)
+    return codes
+
+
+class PolygonIndex:
+    """
+    Spatial index over polygon edges (start points `a`, end points `b`) for signed-distance
+    queries on polygons with many vertices (detailed floor plans, wall outlines).
+
+    Distances use a bounding-volume hierarchy: the edges are sorted along a Z-order curve,
+    grouped into leaves of `leaf_size` edges and the leaves into an implicit binary tree of
+    bounding boxes. All query points descend the tree level by level; a node is dropped as
+    soon as its bounding box is farther away than the closest edge found so far (seeded with
+    the edges next to the point along the Z-order curve), so a query costs about
+    O(log edges). The inside test only checks the edges overlapping the
+    horizontal band of the point (`edges_per_band` edges per band on average).
+
+    All queries use the same per-edge arithmetic as the brute-force functions, so the
+    results are identical.
+    """
+
+    def __init__(self, a, b, leaf_size=8, edges_per_band=4):
+        midpoints = (a + b) / 2
+        self.code_box = midpoints.min(axis=0), midpoints.max(axis=0)
+        codes = _morton_codes(midpoints, *self.code_box)
+        order = np.argsort(codes, kind='stable')
+        self.codes = codes[order]
+        self.a, self.b = a[order], b[order]
+        self.n_edges = len(a)
+        self.leaf_size = leaf_size
+        lo, hi = np.minimum(self.a, self.b), np.maximum(self.a, self.b)
+        # Margin for rounding in the pruning tests
+        self.tol = 1e-9 * max(1.0, np.abs(np.concatenate([lo, hi])).max())
+
+        # Bounding boxes (x_lo, y_lo, x_hi, y_hi) per tree level, root first; padding nodes get inverted boxes
+        self.depth = int(np.ceil(np.log2(max(1, -(-self.n_edges // leaf_size)))))
+        n_padded = leaf_size * 2**self.depth
+        box_lo = np.full((n_padded, 2), np.inf)
+        box_hi = np.full((n_padded, 2), -np.inf)
+        box_lo[:self.n_edges], box_hi[:self.n_edges] = lo, hi
+        box_lo = box_lo.reshape(-1, leaf_size, 2).min(axis=1)
+        box_hi = box_hi.reshape(-1, leaf_size, 2).max(axis=1)
+        self.boxes = [np.hstack([box_lo, box_hi])]
+        while len(box_lo) > 1:
+            box_lo = np.minimum(box_lo[0::2], box_lo[1::2])
+            box_hi = np.maximum(box_hi[0::2], box_hi[1::2])
+            self.boxes.insert(0, np.hstack([box_lo, box_hi]))
+
+        # Edges overlapping every horizontal band, for the inside test
+        self.y0 = lo[:, 1].min()
+        n_bands = int(np.clip(self.n_edges // edges_per_band, 1, 4096))
+        height = hi[:, 1].max() - self.y0
+        self.band_height = height / n_bands if height > 0 else 1.0
+        self.n_bands = n_bands + 1  # the top edge of the polygon falls into an extra band
+        band_lo, band_hi = self._band(lo[:, 1]), self._band(hi[:, 1])
+        counts = band_hi - band_lo + 1
+        edge = np.repeat(np.arange(self.n_edges), counts)
+        bands = band_lo[edge] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.band_starts, self.band_edges = _csr(bands, edge, self.n_bands)
+
+    def _band(self, y):
+        return np.floor((y - self.y0) / self.band_height).astype(np.int64)
+
+    def distance(self, points, n_seeds=8):
+        """Distance of every point to the closest polygon edge."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+        # Upper bound from the edges around the point along the Z-order curve
+        position = np.searchsorted(self.codes, _morton_codes(points, *self.code_box))
+        seeds = np.clip(position[:, None] + np.arange(-n_seeds // 2, n_seeds // 2), 0, self.n_edges - 1)
+        best = _segment_distances(points[:, 0:1], points[:, 1:2], self.a[seeds], self.b[seeds]).min(axis=1)
+
+        owner = np.arange(len(points))
+        node = np.zeros(len(points), dtype=np.int64)
+        for level, boxes in enumerate(self.boxes):
+            px, py = points[owner, 0], points[owner, 1]
+            box = boxes[node]
+            gap_x = np.maximum(np.maximum(box[:, 0] - px, px - box[:, 2]), 0.0)
+            gap_y = np.maximum(np.maximum(box[:, 1] - py, py - box[:, 3]), 0.0)
+
+            # Near the leaves, the first edge of every node tightens the upper bound
+            if level > self.depth - 4:
+                first = node * self.leaf_size * 2**(self.depth - level)
+                real = first < self.n_edges
+                first = np.where(real, first, 0)
+                upper = np.where(real, _segment_distances(px, py, self.a[first], self.b[first]), np.inf)
+                np.minimum.at(best, owner, upper)
+
+            bound = best[owner] + self.tol
+            keep = gap_x * gap_x + gap_y * gap_y <= bound * bound
+            owner, node = owner[keep], node[keep]
+            if level < self.depth:
+                owner = np.repeat(owner, 2)
+                node = (2 * node[:, None] + np.arange(2)).ravel()
+
+        edges = (node[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        owner = np.repeat(owner, self.leaf_size)
+        real = edges < self.n_edges
+        edges, owner = edges[real], owner[real]
+        d = _segment_distances(points[owner, 0], points[owner, 1], self.a[edges], self.b[edges])
+        np.minimum.at(best, owner, d)
+        return best
+
+    def inside(self, points):
+        """Array version of `is_inside_polygon`, testing only the edges in the band of every point."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        bands = self._band(points[:, 1])
+        inside = np.zeros(len(points), dtype=bool)
+        # Points below or above the polygon cannot satisfy the y test of any edge
+        in_range = np.nonzero((bands >= 0) & (bands < self.n_bands))[0]
+        order = in_range[np.argsort(bands[in_range], kind='stable')]
+        band_ids, first = np.unique(bands[order], return_index=True)
+        for band, group in zip(band_ids, np.split(order, first[1:])):
+            edges = self.band_edges[self.band_starts[band]:self.band_starts[band + 1]]
+            crossings = _ray_crossings(points[group, 0:1], points[group, 1:2], self.a[edges], self.b[edges])
+            inside[group] = np.count_nonzero(crossings, axis=1) % 2 == 1
+        return inside
+
+    def signed_distance(self, points, chunk_size=65536):
+        """Signed distance (positive inside), processed in chunks of points."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        signed = np.empty(len(points))
+        for start in range(0, len(points), chunk_size):
+            chunk = points[start:start + chunk_size]
+            distances = self.distance(chunk)
+            signed[start:start + chunk_size] = np.where(self.inside(chunk), distances, -distances)
+        return signed
+
+
+_polygon_indices = OrderedDict()
+
+
+def polygon_index(poly_x, poly_y):
+    """Returns the (cached) PolygonIndex of a polygon, so repeated queries reuse the index."""
+    a, b = _polygon_edges(poly_x, poly_y)
+    key = a.tobytes()
+    index = _polygon_indices.get(key)
+    if index is None:
+        index = _polygon_indices[key] = PolygonIndex(a, b)
+        if len(_polygon_indices) > 16:
+            _polygon_indices.popitem(last=False)
+    else:
+        _polygon_indices.move_to_end(key)
+    return index
+
+
+def compute_signed_distance_vectorized(points, poly_x, poly_y, chunk_size=None, method='auto'):
+    """
+    Signed distance of points to a polygon (positive inside, negative outside).
+
+    Parameters:
+    - points: (n, 2) array of query points.
+    - poly_x, poly_y: Coordinates of the polygon vertices.
+    - chunk_size: Number of points processed at once, bounds the memory to
+      chunk_size x (number of edges) temporaries (default: about 2**18 point-edge pairs).
+    - method: 'brute' (all edges per point), 'index' (PolygonIndex, cached per polygon) or
+      'auto' ('index' for polygons with more than 256 vertices). Both give identical results.
+
+    Returns:
+    - signed_distances: Array of shape (n,).
+    """
     # Ensure poly_x and poly_y have the same length
     min_len = min(len(poly_x), len(poly_y))
     poly_x = poly_x[:min_len]
     poly_y = poly_y[:min_len]
-    
-    poly_points = np.column_stack((poly_x, poly_y))
-    n = len(poly_points)
-    
-    def point_to_line_segment_distance(p, a, b):
-        ab = b - a
-        ap = p - a
-        epsilon = 1e-10
-        projection = np.dot(ap, ab) / (np.dot(ab, ab) + epsilon)
-        projection = np.clip(projection, 0, 1)
-        closest = a + projection * ab
-        return np.linalg.norm(p - closest)
-    
-    distances = np.array([
-        min(point_to_line_segment_distance(p, poly_points[i], poly_points[(i + 1) % n])
-            for i in range(n))
-        for p in points
-    ])
-    
-    inside = np.array([is_inside_polygon(point[0], point[1], poly_x, poly_y) for point in points])
-    
+
+    if method == 'auto':
+        method = 'index' if min_len > 256 else 'brute'
+    if method == 'index':
+        return polygon_index(poly_x, poly_y).signed_distance(points, chunk_size or 65536)
+    if method != 'brute':
+        raise ValueError("Method must be 'auto', 'brute' or 'index'.")
+
+    distances = unsigned_distance_to_polygon(points, poly_x, poly_y, chunk_size)
+    inside = points_inside_polygon(points, poly_x, poly_y, chunk_size)
+
     return np.where(inside, distances, -distances)
 
-def sample_domain(x, y, method='random', n_samples=500, grid_size=(50, 50), dx = 0.1, dy = 0.1):
+
+class PolygonGeometry:
     """
-    Sample points in a domain using either random sampling or grid sampling.
+    Polygonal domain, preprocessed once and then queried many times (e.g. when collocation
+    points are resampled every epoch).
+
+    The domain consists of one or more disjoint regions, each an outer ring with optional
+    holes. A ring is given by its vertex coordinates (x, y); it is closed implicitly, as in
+    `compute_signed_distance_vectorized`. A point is inside if it lies inside an outer ring
+    and not inside one of its holes (even-odd rule over all rings), and the distance is
+    taken to the closest edge of any ring. Polygons with more than 256 edges in total are
+    queried through a (lazily built) PolygonIndex.
+
+    Example:
+        geometry = PolygonGeometry(x, y)                                  # one simple polygon
+        geometry = PolygonGeometry(x, y, holes=[(hx, hy)])                # polygon with a hole
+        geometry = PolygonGeometry.from_regions([((x1, y1), []), ((x2, y2), [(hx, hy)])])
+    """
+
+    def __init__(self, x, y, holes=()):
+        self.regions = []
+        self.rings = []
+        self._add_region((x, y), holes)
+        self._finalize()
+
+    @classmethod
+    def from_regions(cls, regions):
+        """Builds a geometry from a list of ((x, y), [(hole_x, hole_y), ...]) regions."""
+        geometry = cls.__new__(cls)
+        geometry.regions = []
+        geometry.rings = []
+        for outer, holes in regions:
+            geometry._add_region(outer, holes)
+        geometry._finalize()
+        return geometry
+
+    def _add_region(self, outer, holes):
+        rings = [outer] + list(holes)
+        for ring_x, ring_y in rings:
+            if len(ring_x) != len(ring_y):
+                raise ValueError(f"Ring with {len(ring_x)} x but {len(ring_y)} y coordinates.")
+            if len(ring_x) == 0:
+                raise ValueError("Empty ring.")
+        first = len(self.rings)
+        self.rings += [np.column_stack((np.asarray(rx, dtype=float), np.asarray(ry, dtype=float))) for rx, ry in rings]
+        self.regions.append((first, list(range(first + 1, len(self.rings)))))
+
+    def _finalize(self):
+        edges = [_polygon_edges(ring[:, 0], ring[:, 1]) for ring in self.rings]
+        self.a = np.concatenate([a for a, _ in edges])
+        self.b = np.concatenate([b for _, b in edges])
+        vertices = np.concatenate(self.rings)
+        self.bbox = (vertices.min(axis=0), vertices.max(axis=0))
+
+        lengths = np.hypot(*(self.b - self.a).T)
+        self.edge_ends = np.cumsum(lengths)
+        self.perimeter = self.edge_ends[-1]
+        self._index = None
+
+    def fingerprint(self):
+        """SHA-256 of the rings and their grouping into regions, e.g. to key cached datasets."""
+        h = hashlib.sha256(repr(self.regions).encode())
+        for ring in self.rings:
+            h.update(np.ascontiguousarray(ring).tobytes())
+            h.update(b'|')
+        return h.hexdigest()
+
+    @property
+    def n_edges(self):
+        return len(self.a)
+
+    @property
+    def index(self):
+        """The PolygonIndex of all edges, built on first use."""
+        if self._index is None:
+            self._index = PolygonIndex(self.a, self.b)
+        return self._index
+
+    def _use_index(self, method):
+        if method == 'auto':
+            return self.n_edges > 256
+        if method not in ('brute', 'index'):
+            raise ValueError("Method must be 'auto', 'brute' or 'index'.")
+        return method == 'index'
+
+    def inside(self, points, method='auto'):
+        """Whether the points lie inside the domain (inside an outer ring, outside its holes)."""
+        if self._use_index(method):
+            return self.index.inside(points)
+        return _edges_inside(points, self.a, self.b)
+
+    def distance(self, points, method='auto'):
+        """Distance of the points to the closest boundary edge."""
+        if self._use_index(method):
+            return self.index.distance(points)
+        return _edges_distance(points, self.a, self.b)
+
+    def signed_distance(self, points, method='auto', chunk_size=None):
+        """
+        Signed distance of points to the domain boundary (positive inside, negative outside).
+        For a single ring, identical to `compute_signed_distance_vectorized`.
+        """
+        if self._use_index(method):
+            return self.index.signed_distance(points, chunk_size or 65536)
+        distances = _edges_distance(points, self.a, self.b, chunk_size)
+        return np.where(_edges_inside(points, self.a, self.b, chunk_size), distances, -distances)
+
+    def sample_boundary(self, n_samples, method='uniform'):
+        """
+        Samples points on the boundary (all rings), uniformly in arc length.
+
+        Parameters:
+        - n_samples: Number of boundary points.
+        - method: 'uniform' (evenly spaced along the boundary, starting at the first vertex)
+          or 'random' (uniformly distributed at random).
+
+        Returns:
+        - boundary_points: A (n_samples, 2) array of points on the boundary.
+        """
+        if method == 'uniform':
+            s = np.linspace(0, 1, n_samples, endpoint=False) * self.perimeter
+        elif method == 'random':
+            s = np.random.uniform(0, self.perimeter, n_samples)
+        else:
+            raise ValueError("Method must be 'uniform' or 'random'.")
+        return self._at_arc_length(s)[0]
+
+    def _at_arc_length(self, s):
+        """Boundary points at arc lengths s and the indices of the edges they lie on."""
+        # Zero-length edges (e.g. explicitly closed rings) are never selected
+        edge = np.minimum(np.searchsorted(self.edge_ends, s, side='right'), self.n_edges - 1)
+        ab = self.b[edge] - self.a[edge]
+        lengths = np.hypot(ab[:, 0], ab[:, 1])
+        fraction = np.clip((s - (self.edge_ends[edge] - lengths)) / np.where(lengths > 0, lengths, 1.0), 0, 1)
+        return self.a[edge] + fraction[:, None] * ab, edge
+
+    def corners(self, min_angle=30):
+        """
+        Vertices at which the boundary turns by at least min_angle degrees (convex or
+        concave), e.g. to refine the sampling around them. Repeated vertices are skipped.
+
+        Returns:
+        - corner_points: A (n_corners, 2) array of vertices.
+        """
+        corner_points = []
+        for ring in self.rings:
+            keep = np.any(ring != np.roll(ring, 1, axis=0), axis=1)
+            ring = ring[keep] if keep.any() else ring[:1]
+            if len(ring) < 3:
+                continue
+            d_in = ring - np.roll(ring, 1, axis=0)
+            d_out = np.roll(ring, -1, axis=0) - ring
+            cos_turn = np.sum(d_in * d_out, axis=1) / (np.hypot(*d_in.T) * np.hypot(*d_out.T))
+            corner_points.append(ring[cos_turn <= np.cos(np.radians(min_angle))])
+        return np.concatenate(corner_points) if corner_points else np.empty((0, 2))
+
+
+def adaptive_points(geometry, n_samples=500, dx=0.1, dy=0.1, rng=None, bandwidth=None, uniform_fraction=0.5,
+                    corner_fraction=0.05):
+    """
+    Samples points concentrated near the boundary (the zero level set) and its sharp corners,
+    where the SDF has its kinks, so the boundary is resolved with fewer points than uniform
+    sampling needs.
+
+    The points are a mix of
+    - a regular grid over the box (uniform_fraction), so the far field stays covered as
+      evenly as with grid sampling,
+    - points near the corners (corner_fraction), normally distributed around them,
+    - points near the boundary: stratified in arc length and shifted along the edge normal
+      by a Laplace distributed offset, i.e. with a density proportional to
+      exp(-2 |SDF| / bandwidth) near each edge (importance sampling on |SDF| without
+      evaluating the SDF of rejected candidates).
 
     Parameters:
-    - x, y: Lists or arrays of coordinates defining the domain.
-    - method: 'random' or 'grid' to specify the sampling method.
-    - n_samples: Number of random samples (used only if method='random').
-    - grid_size: Tuple specifying the grid size (used only if method='grid').
+    - geometry: The PolygonGeometry of the domain.
+    - n_samples: Total number of samples.
+    - dx, dy: Enlargement of the sampled box beyond the bounding box of the domain.
+    - rng: numpy Generator (default: the global np.random state).
+    - bandwidth: Width of the refined band around the boundary (default: the mean point
+      spacing, so the band narrows as n_samples grows).
 
     Returns:
-    - sample_points: A 2D array of sampled points.
+    - sample_points: A (n_samples, 2) array of sampled points (without their SDF, which
+      e.g. build_sdf_dataset computes in parallel; see `adaptive_sample`).
+    """
+    rng = np.random if rng is None else rng
+    (x_min, y_min), (x_max, y_max) = geometry.bbox
+    lo, hi = np.array([x_min - dx, y_min - dy]), np.array([x_max + dx, y_max + dy])
+    if bandwidth is None:
+        bandwidth = np.sqrt(np.prod(hi - lo) / n_samples)
+
+    # Grid of about uniform_fraction * n_samples points with the aspect ratio of the box
+    width, height = hi - lo
+    grid_x = max(1, int(round(np.sqrt(uniform_fraction * n_samples * width / height))))
+    grid_y = max(1, int(round(uniform_fraction * n_samples / grid_x))) if uniform_fraction > 0 else 0
+    grid_points = domain_points(geometry, method='grid', grid_size=(grid_x, grid_y), dx=dx, dy=dy)[:n_samples]
+
+    corners = geometry.corners()
+    n_corner = min(int(round(corner_fraction * n_samples)), n_samples - len(grid_points)) if len(corners) else 0
+    n_band = n_samples - len(grid_points) - n_corner
+
+    arc_length = (np.arange(n_band) + rng.uniform(size=n_band)) * geometry.perimeter / max(n_band, 1)
+    on_boundary, edge = geometry._at_arc_length(arc_length)
+    ab = geometry.b[edge] - geometry.a[edge]
+    normals = np.column_stack((ab[:, 1], -ab[:, 0])) / np.hypot(ab[:, 0], ab[:, 1])[:, None]
+    near_boundary = on_boundary + normals * rng.laplace(scale=bandwidth / 2, size=n_band)[:, None]
+
+    near_corners = corners[(rng.uniform(size=n_corner) * len(corners)).astype(int)] if n_corner else np.empty((0, 2))
+    near_corners = near_corners + rng.normal(scale=bandwidth, size=near_corners.shape)
+
+    sample_points = np.clip(np.vstack((near_boundary, near_corners)), lo, hi)
+    return np.vstack((sample_points, grid_points))
+
+
+def adaptive_sample(geometry, n_samples=500, dx=0.1, dy=0.1, rng=None, **kwargs):
+    """
+    Samples points with `adaptive_points` and evaluates their SDF.
+
+    Returns:
+    - sample_points: A (n_samples, 2) array of sampled points.
     - signed_distances: Signed distances of the sampled points.
     """
-    x_min, x_max = min(x) - dx, max(x) + dx
-    y_min, y_max = min(y) - dy, max(y) + dy
+    sample_points = adaptive_points(geometry, n_samples, dx, dy, rng, **kwargs)
+    return sample_points, geometry.signed_distance(sample_points)
+
+
+def domain_points(x, y=None, method='random', n_samples=500, grid_size=(50, 50), dx = 0.1, dy = 0.1, rng=None):
+    """
+    Sample points in the bounding box of a domain (enlarged by dx, dy), see `sample_domain`.
+
+    Parameters:
+    - rng: numpy Generator for random and adaptive sampling (default: the global np.random state).
+
+    Returns:
+    - sample_points: A 2D array of sampled points.
+    """
+    if method == 'adaptive':
+        geometry = x if isinstance(x, PolygonGeometry) else PolygonGeometry(x, y)
+        return adaptive_points(geometry, n_samples, dx, dy, rng)
+
+    if isinstance(x, PolygonGeometry):
+        (x_min, y_min), (x_max, y_max) = x.bbox
+    else:
+        x_min, x_max, y_min, y_max = min(x), max(x), min(y), max(y)
+    x_min, x_max = x_min - dx, x_max + dx
+    y_min, y_max = y_min - dy, y_max + dy
 
     if method == 'random':
         # Random sampling
-        x_samples = np.random.uniform(x_min, x_max, n_samples)
-        y_samples = np.random.uniform(y_min, y_max, n_samples)
+        rng = np.random if rng is None else rng
+        x_samples = rng.uniform(x_min, x_max, n_samples)
+        y_samples = rng.uniform(y_min, y_max, n_samples)
         sample_points = np.column_stack((x_samples, y_samples))
     elif method == 'grid':
         # Grid sampling
@@ -74,9 +550,88 @@ def sample_domain(x, y, method='random', n_samples=500, grid_size=(50, 50), dx =
         x_mesh, y_mesh = np.meshgrid(x_grid, y_grid)
         sample_points = np.column_stack((x_mesh.ravel(), y_mesh.ravel()))
     else:
-        raise ValueError("Method must be 'random' or 'grid'.")
+        raise ValueError("Method must be 'random', 'grid' or 'adaptive'.")
+
+    return sample_points
+
+
+def sample_domain(x, y=None, method='random', n_samples=500, grid_size=(50, 50), dx = 0.1, dy = 0.1):
+    """
+    Sample points in a domain using either random sampling or grid sampling.
+
+    Parameters:
+    - x, y: Lists or arrays of coordinates defining the domain, or a PolygonGeometry as x
+      (preprocessed once, e.g. for resampling every epoch).
+    - method: 'random', 'grid' or 'adaptive' (refined near the boundary and its corners,
+      see `adaptive_points`) to specify the sampling method.
+    - n_samples: Number of samples (used only if method='random' or 'adaptive').
+    - grid_size: Tuple specifying the grid size (used only if method='grid').
+
+    Returns:
+    - sample_points: A 2D array of sampled points.
+    - signed_distances: Signed distances of the sampled points.
+    """
+    sample_points = domain_points(x, y, method, n_samples, grid_size, dx, dy)
 
     # Compute signed distances using the vectorized function
-    signed_distances = compute_signed_distance_vectorized(sample_points, x, y)
+    if isinstance(x, PolygonGeometry):
+        signed_distances = x.signed_distance(sample_points)
+    else:
+        signed_distances = compute_signed_distance_vectorized(sample_points, x, y)
 
     return sample_points, signed_distances
+
+
+def collocation_dataset(geometry, batch_size=1024, batches_per_epoch=1, method='random', dx=0.1, dy=0.1,
+                        with_sdf=True, seed=None, num_parallel_calls=None):
+    """
+    tf.data.Dataset streaming fresh collocation batches every epoch, e.g. to train a PINN on
+    an effectively unbounded point set without holding it in memory.
+
+    A Python generator only hands out batch seeds; sampling and the signed distances run in
+    NumPy on tf.data's worker threads (in parallel with each other and, through prefetch,
+    with the training step). The seed counter persists across iterations of the dataset,
+    so every epoch draws new points, while a fixed seed reproduces the whole sequence.
+
+    Parameters:
+    - geometry: The PolygonGeometry of the domain.
+    - batch_size: Number of points per batch.
+    - batches_per_epoch: Number of batches per iteration over the dataset (None: endless).
+    - method: 'random' or 'adaptive' (see `sample_domain`).
+    - with_sdf: Also yield the signed distances of the points.
+    - seed: Seed of the batch sequence (default: fresh entropy).
+    - num_parallel_calls: Number of batches sampled concurrently (default: tf.data.AUTOTUNE).
+
+    Returns:
+    - dataset: Yields float32 (batch_size, 2) points, or (points, (batch_size, 1) signed
+      distances) if with_sdf.
+    """
+    # Imported here, so the NumPy utilities (and the dataset workers) do not need TensorFlow
+    import tensorflow as tf
+
+    if method not in ('random', 'adaptive'):
+        raise ValueError("Method must be 'random' or 'adaptive'.")
+    entropy = np.random.SeedSequence(seed).entropy
+    batch_index = itertools.count()
+
+    def batch_seeds():
+        for _ in range(batches_per_epoch) if batches_per_epoch is not None else itertools.repeat(None):
+            yield next(batch_index)
+
+    def sample(index):
+        rng = np.random.default_rng([int(index), entropy])
+        points = domain_points(geometry, method=method, n_samples=batch_size, dx=dx, dy=dy, rng=rng)
+        if not with_sdf:
+            return points.astype(np.float32)
+        return points.astype(np.float32), geometry.signed_distance(points).astype(np.float32)[:, None]
+
+    def sample_batch(index):
+        if not with_sdf:
+            points = tf.numpy_function(sample, [index], tf.float32)
+            return tf.ensure_shape(points, (batch_size, 2))
+        points, sdf = tf.numpy_function(sample, [index], (tf.float32, tf.float32))
+        return tf.ensure_shape(points, (batch_size, 2)), tf.ensure_shape(sdf, (batch_size, 1))
+
+    dataset = tf.data.Dataset.from_generator(batch_seeds, output_signature=tf.TensorSpec((), tf.int64))
+    dataset = dataset.map(sample_batch, num_parallel_calls=num_parallel_calls or tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,54 @@
+"""
+Per-request cost of building the fill_rfem_template function specification: regenerated
+from RFEMTemplate for every request (the previous behaviour) versus built once at import
+(llm_processor.FUNCTION_SPEC). Also times whole requests against the mock API with zero
+latency, so the savings show relative to the client overhead.
+
+Usage:
+    python benchmark_function_spec.py [--requests 200]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from llm_processor import DEFAULT_INSTRUCTION, FUNCTION_NAME, FUNCTION_SPEC_VERSION, LLMProcessor
+from mock_openai_server import start_mock_server
+from models import RFEMTemplate
+
+
+class RebuildingProcessor(LLMProcessor):
+    """Builds the function specification per request, as before."""
+
+    def _completion_request(self, content):
+        request = super()._completion_request(content)
+        request["functions"] = [{"name": FUNCTION_NAME, "parameters": RFEMTemplate.model_json_schema()}]
+        return request
+
+
+def per_call(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(0, chat_latency=0.0, transcription_latency=0.0)
+    print(f"Function specification version {FUNCTION_SPEC_VERSION}\n")
+    print(f"{'':>12}{'build [ms]':>12}{'request [ms]':>14}")
+    for label, cls in (("per request", RebuildingProcessor), ("cached", LLMProcessor)):
+        processor = cls("test", base_url=base_url)
+        build = per_call(lambda: processor._completion_request("text"), args.requests)
+        with contextlib.redirect_stdout(io.StringIO()):  # the raw responses are printed
+            request = per_call(lambda: processor.extract_entities_from_text(DEFAULT_INSTRUCTION), args.requests)
+        print(f"{label:>12}{build:>12.3f}{request:>14.3f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
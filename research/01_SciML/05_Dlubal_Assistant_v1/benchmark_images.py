@@ -0,0 +1,95 @@
+"""
+Bytes sent and latency per image input with and without image preprocessing
+(image_preprocessing.py), on the figures in figs/, against the local mock API with a
+limited upload bandwidth:
+
+- original: the files as they are (the previous behaviour),
+- API resolution: downscaled to the resolution the model works with,
+- budget: downscaled further to --token-budget tokens per image.
+
+Each input is first sent on its own (per-input latency, including the preprocessing), then
+all of them as one batch through run_studies, where the preprocessing stage prepares the
+images in its worker pool: once from scratch and once more with the prepared images in the
+cache (a rerun of the study; the API is called again in both).
+
+Usage:
+    python benchmark_images.py [--token-budget 765] [--upload-mbit 20] [--chat-latency 0.5]
+"""
+import argparse
+import contextlib
+import glob
+import io
+import logging
+import os
+import tempfile
+import time
+
+from image_preprocessing import ImagePreprocessor
+from llm_processor import LLMProcessor
+from mock_openai_server import start_mock_server
+from response_cache import ResponseCache
+
+FIGURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "figs", "*.png")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--token-budget", type=int, default=765)
+    parser.add_argument("--upload-mbit", type=float, default=20.0)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    import main as study  # configures logging on import
+
+    server, base_url = start_mock_server(0, args.chat_latency, 0.0, upload_bandwidth=args.upload_mbit * 1e6 / 8)
+    modes = [("original", None), ("API resolution", None), (f"budget {args.token_budget}", args.token_budget)]
+    per_input, batch = {}, {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)  # generated_rfem_*.py files and the image cache
+        try:
+            for i, (label, token_budget) in enumerate(modes):
+                def new_processor(cache=None):
+                    preprocessor = ImagePreprocessor(token_budget, cache=cache) if i > 0 else None
+                    return LLMProcessor("test", base_url=base_url, image_preprocessor=preprocessor)
+
+                rows = []
+                for path in FIGURES:
+                    processor = new_processor()
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):  # the raw responses are printed
+                        processor.extract_entities_from_image(path)
+                    elapsed = time.perf_counter() - start
+                    image = processor._load_image(path)
+                    rows.append((image.bytes_sent, image.seconds, elapsed))
+                per_input[label] = rows
+
+                cache = ResponseCache(f"images_{i}.sqlite")
+                batch[label] = []
+                for _ in ("cold", "warm"):
+                    processor = new_processor(cache)
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        results = study.run_studies(processor, [(FIGURES, "image")], max_attempts=1,
+                                                    max_concurrency=len(FIGURES))
+                    batch[label].append(time.perf_counter() - start)
+                    assert all(result is not None for result in results)
+                cache.close()
+        finally:
+            os.chdir(cwd)
+    server.shutdown()
+
+    print(f"Upload {args.upload_mbit:g} Mbit/s, model latency {args.chat_latency} s\n")
+    print(f"{'input':>12}" + "".join(f"{label:>30}" for label, _ in modes))
+    print(f"{'':>12}" + f"{'kB sent':>10}{'prep [s]':>10}{'total [s]':>10}" * len(modes))
+    for j, path in enumerate(FIGURES):
+        print(f"{os.path.basename(path):>12}" + "".join(
+            f"{per_input[label][j][0] / 1e3:>10.0f}{per_input[label][j][1]:>10.2f}{per_input[label][j][2]:>10.2f}"
+            for label, _ in modes))
+    print(f"\n{'batch [s]':>12}" + "".join(f"{batch[label][0]:>30.2f}" for label, _ in modes))
+    print(f"{'rerun [s]':>12}" + "".join(f"{batch[label][1]:>30.2f}" for label, _ in modes))
+
+
+if __name__ == "__main__":
+    main()
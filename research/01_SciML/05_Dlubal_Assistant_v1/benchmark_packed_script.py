@@ -0,0 +1,86 @@
+"""
+Size, compile time and run time of the RFEM script of a large synthetic model (--elements
+nodes, lines, members and loads; see benchmark_template_validation.py), run against the
+stub RFEM API (rfem_stub.py):
+
+- lines: one line of code per node and member (write_rfem_script),
+- packed: nodes and members as packed arrays created in loops (packed=True).
+
+Both scripts are checked to make the same API calls with the same values (the packed one
+passes end sections and hinges explicitly). The API calls per object are the same in both
+modes; --call-latency adds a delay per call to see how much of a real run that leaves.
+
+Usage:
+    python benchmark_packed_script.py [--elements 100000] [--call-latency 0]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import os
+import tempfile
+import time
+
+from benchmark_template_validation import synthetic_template
+from models import RFEMTemplate
+from rfem_script_generator import write_rfem_script
+from rfem_stub import run_script
+
+MEMBER_DEFAULTS = {"start_member_hinge_no": 0, "end_member_hinge_no": 0}
+
+
+def normalized(call):
+    """A stub call with the Member arguments member_lines leaves out filled in."""
+    name, args, kwargs = call
+    if name == "Member":
+        kwargs = {"end_section_no": kwargs["start_section_no"], **MEMBER_DEFAULTS, **kwargs}
+    return name, args, kwargs
+
+
+def compile_time(path):
+    with open(path) as f:
+        source = f.read()
+    gc.collect()
+    start = time.perf_counter()
+    compile(source, path, "exec")
+    return time.perf_counter() - start
+
+
+def run_time(path, call_latency):
+    gc.collect()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # the script's progress messages
+        stub = run_script(path, call_latency)
+    return time.perf_counter() - start, sum(stub.counts.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--call-latency", type=float, default=0.0, help="Seconds per stub API call")
+    args = parser.parse_args()
+
+    template = RFEMTemplate.model_validate_json(synthetic_template(args.elements, applied_to=3))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {mode: os.path.join(directory, f"{mode}.py") for mode in ("lines", "packed")}
+        print(f"{'mode':>8}{'write [s]':>11}{'size [MB]':>11}{'compile [s]':>13}{'run [s]':>9}{'calls':>9}")
+        for mode, path in paths.items():
+            start = time.perf_counter()
+            write_rfem_script(template, path, packed=mode == "packed")
+            write_seconds = time.perf_counter() - start
+            seconds, calls = run_time(path, args.call_latency)
+            print(f"{mode:>8}{write_seconds:>11.2f}{os.path.getsize(path) / 1e6:>11.1f}"
+                  f"{compile_time(path):>13.2f}{seconds:>9.2f}{calls:>9}")
+
+        recorded = {}
+        for mode, path in paths.items():
+            # Sorted, as members with a comment come after the packed ones
+            with contextlib.redirect_stdout(io.StringIO()):
+                calls = run_script(path, record=True).calls
+            recorded[mode] = sorted(map(normalized, calls), key=repr)
+        assert recorded["lines"] == recorded["packed"], "the scripts make different API calls"
+        print(f"\nSame {len(recorded['lines'])} API calls in both modes")
+
+
+if __name__ == "__main__":
+    main()
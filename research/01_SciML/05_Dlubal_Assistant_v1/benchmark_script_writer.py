@@ -0,0 +1,64 @@
+"""
+Peak memory and time of writing the RFEM script of a large synthetic model (--elements
+nodes, lines, members and loads; see benchmark_template_validation.py):
+
+- string: generate_rfem_script, then one write of the whole script,
+- streaming: write_rfem_script, chunks of --chunk-lines lines written as they are generated.
+
+Both files are checked to be byte-identical. Peak memory is measured with tracemalloc (on
+top of the template, which both need), the times without it.
+
+Usage:
+    python benchmark_script_writer.py [--elements 100000] [--chunk-lines 1000]
+"""
+import argparse
+import filecmp
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmark_template_validation import synthetic_template
+from models import RFEMTemplate
+from rfem_script_generator import generate_rfem_script, write_rfem_script
+
+
+def write_string(template, path, chunk_lines):
+    with open(path, "w") as f:
+        f.write(generate_rfem_script(template))
+
+
+def measure(fn, *args):
+    """(seconds, peak bytes) of fn(*args)."""
+    gc.collect()
+    start = time.perf_counter()
+    fn(*args)
+    seconds = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--chunk-lines", type=int, default=1000)
+    args = parser.parse_args()
+
+    template = RFEMTemplate.model_validate_json(synthetic_template(args.elements, applied_to=3))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {mode: os.path.join(directory, f"{mode}.py") for mode in ("string", "streaming")}
+        print(f"{'mode':>10}{'time [s]':>10}{'peak [MB]':>11}")
+        for mode, fn in (("string", write_string), ("streaming", write_rfem_script)):
+            seconds, peak = measure(fn, template, paths[mode], args.chunk_lines)
+            print(f"{mode:>10}{seconds:>10.2f}{peak / 1e6:>11.1f}")
+        assert filecmp.cmp(paths["string"], paths["streaming"], shallow=False), "the scripts differ"
+        print(f"\n{os.path.getsize(paths['string']) / 1e6:.1f} MB script, byte-identical")
+
+
+if __name__ == "__main__":
+    main()
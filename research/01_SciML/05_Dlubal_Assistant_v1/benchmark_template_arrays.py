@@ -0,0 +1,76 @@
+"""
+Memory and construction time of a large synthetic template (--elements nodes, lines,
+members and loads; see benchmark_template_validation.py) as an RFEMTemplate and as
+TemplateArrays:
+
+- construction from the function call arguments (RFEMTemplate.model_validate_json vs.
+  TemplateArrays.from_json): best time, and memory held by the result (and peak) with
+  tracemalloc, for the full template and without its lines (which stay models),
+- conversion between the two (from_template, to_template),
+- generating the RFEM script from each.
+
+The round trip is checked to give the same template, and the scripts to be identical.
+
+Usage:
+    python benchmark_template_arrays.py [--elements 100000] [--repeat 3]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmark_template_validation import best_time, synthetic_template
+from models import RFEMTemplate
+from rfem_script_generator import stream_rfem_script
+from template_arrays import TemplateArrays
+
+
+def memory(fn):
+    """(result, bytes held by the result, peak bytes) of fn()."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def script_size(template) -> int:
+    return sum(map(len, stream_rfem_script(template)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    full = synthetic_template(args.elements, applied_to=3)
+    without_lines = json.dumps({**json.loads(full), "lines": []})
+    print(f"{args.elements} nodes/lines/members/loads, {len(full) / 1e6:.1f} MB of JSON\n")
+    print(f"{'construction':<30}{'time [s]':>10}{'held [MB]':>11}{'peak [MB]':>11}")
+    for label, data in (("full", full), ("without lines", without_lines)):
+        for name, construct in (("RFEMTemplate", RFEMTemplate.model_validate_json),
+                                ("TemplateArrays", TemplateArrays.from_json)):
+            seconds = best_time(lambda: construct(data), args.repeat)
+            _, held, peak = memory(lambda: construct(data))
+            print(f"{name + ', ' + label:<30}{seconds:>10.2f}{held / 1e6:>11.1f}{peak / 1e6:>11.1f}")
+
+    template = RFEMTemplate.model_validate_json(full)
+    arrays = TemplateArrays.from_json(full)
+    assert TemplateArrays.from_template(template).to_template() == template, "from_template loses data"
+    assert arrays.to_template() == template, "from_json differs from RFEMTemplate"
+    print(f"\n{'conversion':<30}{'time [s]':>10}")
+    print(f"{'from_template':<30}{best_time(lambda: TemplateArrays.from_template(template), args.repeat):>10.2f}")
+    print(f"{'to_template':<30}{best_time(arrays.to_template, args.repeat):>10.2f}")
+
+    assert "".join(stream_rfem_script(template)) == "".join(stream_rfem_script(arrays)), "the scripts differ"
+    print(f"\n{'script generation':<30}{'time [s]':>10}")
+    for name, source in (("RFEMTemplate", template), ("TemplateArrays", arrays)):
+        print(f"{name:<30}{best_time(lambda: script_size(source), args.repeat):>10.2f}")
+    print("\nRound trip lossless, scripts identical")
+
+
+if __name__ == "__main__":
+    main()
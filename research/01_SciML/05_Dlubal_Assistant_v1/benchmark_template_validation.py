@@ -0,0 +1,135 @@
+"""
+Conversion of fill_rfem_template function call arguments into an RFEMTemplate, on synthetic
+templates with --elements nodes, lines, members and loads:
+
+- legacy: json.loads, then sections and loads one by one through create_section and
+  create_*_load (applied_to joined into a string and split again), then model_validate
+  (the previous LLMProcessor._process_function_arguments),
+- single pass: RFEMTemplate.model_validate_json on the raw JSON (the current one).
+
+Both results are checked to be equal. --profile prints the cProfile of the single pass.
+
+Usage:
+    python benchmark_template_validation.py [--elements 10000] [--applied-to 3] [--repeat 5] [--profile]
+"""
+import argparse
+import cProfile
+import gc
+import json
+import pstats
+import random
+import time
+
+from llm_processor import LLMProcessor
+from models import *
+
+LOAD_DIRECTIONS = {
+    "NODAL": NodalLoadDirection.LOAD_DIRECTION_GLOBAL_Z_OR_USER_DEFINED_W.value,
+    "MEMBER": MemberLoadDirection.LOAD_DIRECTION_GLOBAL_Z_OR_USER_DEFINED_W_TRUE.value,
+    "LINE": LineLoadDirection.LOAD_DIRECTION_GLOBAL_Z_OR_USER_DEFINED_W_TRUE.value,
+}
+
+
+def synthetic_template(n_elements, applied_to=3, seed=0) -> str:
+    """Function call arguments (JSON) of a frame with n_elements nodes, lines, members and loads."""
+    rng = random.Random(seed)
+    loads = []
+    for i in range(n_elements):
+        load_type = ("NODAL", "MEMBER", "LINE", "SURFACE")[i % 4]
+        load = {"no": i + 1, "load_case_no": i % 3 + 1, "load_type": load_type.lower() if i % 7 == 0 else load_type,
+                "magnitude": round(rng.uniform(1e3, 1e4), 1),
+                "applied_to": [rng.randint(1, n_elements - 1) for _ in range(applied_to)]}
+        details = {"load_direction": LOAD_DIRECTIONS[load_type]} if load_type in LOAD_DIRECTIONS else {}
+        load[f"{load_type.lower()}_load"] = details
+        loads.append(load)
+    template = {
+        "project_name": "Synthetic frame",
+        "filename": "synthetic",
+        "input_type": "text",
+        "materials": [{"no": 1, "name": "C30/37"}],
+        "sections": [{"no": 1, "section_type": "rectangular", "material_no": 1, "width": 0.3, "height": 0.5},
+                     {"no": 2, "section_type": "CIRCULAR", "diameter": 0.4}],
+        "thicknesses": [{"no": 1, "name": "Slab", "material_no": 1, "uniform_thickness_d": 0.2}],
+        "nodes": [{"no": i + 1, "coordinate_X": rng.uniform(0, 100), "coordinate_Y": rng.uniform(0, 100),
+                   "coordinate_Z": 0.0} for i in range(n_elements)],
+        "lines": [{"no": i + 1, "nodes_no": f"{i + 1} {i + 2}"} for i in range(n_elements - 1)],
+        "members": [{"no": i + 1, "start_node_no": i + 1, "end_node_no": i + 2, "start_section_no": 1,
+                     "end_section_no": 1 + i % 2, "line": i + 1} for i in range(n_elements - 1)],
+        "surfaces": [{"no": 1, "thickness_no": 1, "boundary_lines": [1, 2, 3, 4]}],
+        "supports": [{"no": i + 1, "nodes_no": str(i * 100 + 1), "support": "HINGED"}
+                     for i in range(n_elements // 100)],
+        "loads": loads,
+    }
+    return json.dumps(template)
+
+
+def legacy_convert(function_call_args: str) -> RFEMTemplate:
+    """The previous conversion path, step by step."""
+    data = json.loads(function_call_args)
+    for field in ['sections', 'nodes', 'members', 'supports', 'lines']:
+        if data.get(field) is None:
+            data[field] = []
+    data["sections"] = [SectionDefinition.create_section(
+        no=s.get("no", 1), section_type=SectionType(s.get("section_type", "STANDARD").upper()),
+        material_no=s.get("material_no", 1), name=s.get("name"), width=s.get("width"), height=s.get("height"),
+        diameter=s.get("diameter"), comment=s.get("comment", "")) for s in data["sections"]]
+    data["loads"] = [legacy_load(load) for load in data["loads"]]
+    return RFEMTemplate.model_validate(data)
+
+
+def legacy_load(load_data) -> LoadDefinition:
+    load_type = LoadType(load_data.get("load_type").upper())
+    kwargs = dict(no=load_data.get("no", 1), load_case_no=load_data.get("load_case_no", 1),
+                  magnitude=load_data.get("magnitude"), comment=load_data.get("comment", ""))
+    # Joined with ',' before, which the create_*_load methods then failed to split for more than one tag
+    tags = ' '.join(map(str, load_data.get("applied_to")))
+    details = load_data.get(f"{load_type.value.lower()}_load")
+    if load_type == LoadType.NODAL:
+        return LoadDefinition.create_nodal_load(nodes_no=tags, load_direction=NodalLoadDirection(details.get("load_direction")), **kwargs)
+    elif load_type == LoadType.MEMBER:
+        return LoadDefinition.create_member_load(members_no=tags, load_direction=MemberLoadDirection(details.get("load_direction")), **kwargs)
+    elif load_type == LoadType.SURFACE:
+        return LoadDefinition.create_surface_load(surface_no=tags, **kwargs)
+    return LoadDefinition.create_line_load(lines_no=tags, load_direction=LineLoadDirection(details.get("load_direction")), **kwargs)
+
+
+def best_time(fn, repeat):
+    """Best of repeat calls; the results are dropped, so that earlier ones do not slow the
+    garbage collector down in later calls."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--elements", type=int, default=10000)
+    parser.add_argument("--applied-to", type=int, default=3, help="Tags per load")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    function_call_args = synthetic_template(args.elements, args.applied_to)
+    processor = LLMProcessor("test")
+    print(f"{args.elements} nodes/lines/members/loads, {len(function_call_args) / 1e6:.1f} MB of JSON\n")
+
+    assert (processor._process_function_arguments(function_call_args).model_dump()
+            == legacy_convert(function_call_args).model_dump()), "the conversion paths disagree"
+    legacy_time = best_time(lambda: legacy_convert(function_call_args), args.repeat)
+    single_time = best_time(lambda: processor._process_function_arguments(function_call_args), args.repeat)
+    print(f"{'legacy':>12}{legacy_time * 1e3:>10.1f} ms")
+    print(f"{'single pass':>12}{single_time * 1e3:>10.1f} ms  ({legacy_time / single_time:.1f}x)")
+
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.runcall(processor._process_function_arguments, function_call_args)
+        print()
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+End-to-end throughput of the study runner on a batch of mixed text/image/audio inputs,
+against the local mock API (mock_openai_server.py) with fixed per-request latencies:
+
+- sequential: run_studies with one input at a time (the original behaviour),
+- threads: run_studies with a bounded thread pool and the sync client,
+- async: arun_studies with the shared async client.
+
+Usage:
+    python benchmark_throughput.py [--inputs 100] [--concurrency 16] [--chat-latency 0.2]
+                                   [--transcription-latency 0.1] [--modes sequential threads async]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import time
+
+from llm_processor import LLMProcessor
+from mock_openai_server import start_mock_server
+
+
+def mixed_studies(n_inputs, directory):
+    """n_inputs inputs, split evenly into text, image and audio studies (dummy files)."""
+    image_path, audio_path = os.path.join(directory, "sketch.png"), os.path.join(directory, "voice.mp3")
+    with open(image_path, "wb") as f:
+        f.write(os.urandom(200_000))
+    with open(audio_path, "wb") as f:
+        f.write(os.urandom(100_000))
+
+    n_text, n_image = n_inputs - 2 * (n_inputs // 3), n_inputs // 3
+    return [
+        ([f"Design a concrete beam {i} of C30/37, length 10 m, with a uniform load of 10 kN/m." for i in range(n_text)], "text"),
+        ([image_path] * n_image, "image"),
+        ([audio_path] * (n_inputs - n_text - n_image), "audio"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--inputs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--chat-latency", type=float, default=0.2)
+    parser.add_argument("--transcription-latency", type=float, default=0.1)
+    parser.add_argument("--modes", nargs="+", default=["sequential", "threads", "async"],
+                        choices=["sequential", "threads", "async"])
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    import main as study  # configures logging on import
+
+    server, base_url = start_mock_server(0, args.chat_latency, args.transcription_latency)
+    with tempfile.TemporaryDirectory() as directory:
+        studies = mixed_studies(args.inputs, directory)
+        cwd = os.getcwd()
+        os.chdir(directory)  # generated_rfem_*.py files
+        try:
+            print(f"{'mode':>12}{'time [s]':>10}{'inputs/s':>10}{'succeeded':>11}")
+            for mode in args.modes:
+                processor = LLMProcessor("test", base_url=base_url, max_concurrent_requests=args.concurrency)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):  # the sync methods print the raw responses
+                    if mode == "async":
+                        results = asyncio.run(study.arun_studies(processor, studies, max_attempts=1))
+                    else:
+                        concurrency = 1 if mode == "sequential" else args.concurrency
+                        results = study.run_studies(processor, studies, max_attempts=1, max_concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+                succeeded = sum(result is not None for result in results)
+                print(f"{mode:>12}{elapsed:>10.2f}{len(results) / elapsed:>10.1f}{succeeded:>8}/{len(results)}")
+        finally:
+            os.chdir(cwd)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
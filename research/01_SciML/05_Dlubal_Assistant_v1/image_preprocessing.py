@@ -0,0 +1,211 @@
+"""
+Preprocessing of image inputs before they are sent to the vision model.
+
+The API scales every image to fit 2048 x 2048 and then its shortest side to 768 pixels, and
+bills (and processes) it in 512 x 512 tiles. Full-resolution sketches therefore mostly add
+upload size: prepare_image downscales an image to that effective resolution, or further to
+a token budget, re-encodes it as PNG or JPEG (whichever is smaller; transparency is
+flattened onto white) and detects the MIME type from the magic bytes instead of assuming
+JPEG. Without Pillow, images are sent unchanged with their detected MIME type.
+
+ImagePreprocessor runs this in a worker pool, so a batch can prepare its images while
+other inputs wait for the API (Pillow releases the GIL while decoding, resizing and
+encoding), and can keep the results in a ResponseCache, so a rerun of a study does not
+decode the full-resolution files again.
+"""
+import base64
+import io
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from response_cache import ResponseCache, content_key
+
+try:
+    from PIL import Image
+except ImportError:  # optional: without Pillow images are sent as they are
+    Image = None
+
+MIME_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+MAX_SIDE = 2048  # the API fits images into MAX_SIDE x MAX_SIDE ...
+MAX_SHORT_SIDE = 768  # ... and then scales the shortest side down to MAX_SHORT_SIDE
+TILE_SIZE = 512
+BASE_TOKENS = 85
+TILE_TOKENS = 170
+
+PREPROCESSING_VERSION = "1"  # part of the cache keys; bump when prepare_image changes its output
+
+
+class PreparedImage(NamedTuple):
+    """An image ready to be sent, with the numbers for the preprocessing report."""
+    data: bytes
+    mime_type: str
+    data_url: str
+    original_bytes: int
+    size: Optional[Tuple[int, int]] = None  # (width, height) sent, None if unknown
+    original_size: Optional[Tuple[int, int]] = None
+    seconds: float = 0.0  # spent reading, resizing and encoding
+
+    @property
+    def bytes_sent(self) -> int:
+        """Size of the base64 payload in the request."""
+        return len(self.data_url)
+
+    @property
+    def tokens(self) -> Optional[int]:
+        return image_tokens(*self.size) if self.size else None
+
+    @property
+    def original_tokens(self) -> Optional[int]:
+        return image_tokens(*self.original_size) if self.original_size else None
+
+
+def detect_mime_type(data: bytes) -> str:
+    """MIME type of PNG, JPEG, GIF or WebP image data, from its magic bytes."""
+    for signature, mime_type in MIME_SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    raise ValueError("Unsupported image format (expected PNG, JPEG, GIF or WebP)")
+
+
+def image_tokens(width: int, height: int) -> int:
+    """Input tokens of a high-detail image of the given size."""
+    scale = min(1.0, MAX_SIDE / max(width, height))
+    scale *= min(1.0, MAX_SHORT_SIDE / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / TILE_SIZE) * math.ceil(height * scale / TILE_SIZE)
+    return BASE_TOKENS + TILE_TOKENS * tiles
+
+
+def target_size(width: int, height: int, token_budget: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Size an image is downscaled to: the resolution the API works with, and at most
+    token_budget tokens (at least one tile) if given. Images are never upscaled.
+    """
+    scale = min(1.0, MAX_SIDE / max(width, height))
+    scale *= min(1.0, MAX_SHORT_SIDE / (min(width, height) * scale))
+    if token_budget is not None:
+        max_tiles = max(1, (token_budget - BASE_TOKENS) // TILE_TOKENS)
+        # The tile count only changes where a side crosses a multiple of TILE_SIZE
+        candidates = [scale] + [TILE_SIZE * k / side for side in (width, height)
+                                for k in range(1, math.ceil(side * scale / TILE_SIZE) + 1)
+                                if TILE_SIZE * k / side < scale]
+        scale = max(s for s in candidates
+                    if math.ceil(width * s / TILE_SIZE) * math.ceil(height * s / TILE_SIZE) <= max_tiles)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def encode_image(data: bytes, original_bytes: Optional[int] = None, size=None, original_size=None,
+                 seconds: float = 0.0) -> PreparedImage:
+    """Wraps image data as it is (MIME type detected, base64 data URL)."""
+    mime_type = detect_mime_type(data)
+    data_url = f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+    return PreparedImage(data, mime_type, data_url, len(data) if original_bytes is None else original_bytes,
+                         size, original_size, seconds)
+
+
+def prepare_image(data: bytes, token_budget: Optional[int] = None, jpeg_quality: int = 85) -> PreparedImage:
+    """
+    Downscales and re-encodes image data (see the module docstring). The original data is
+    kept if it is already small enough and not larger than its re-encodings.
+    """
+    start = time.perf_counter()
+    detect_mime_type(data)
+    if Image is None:
+        return encode_image(data, seconds=time.perf_counter() - start)
+
+    image = Image.open(io.BytesIO(data))
+    original_size = image.size
+    size = target_size(*original_size, token_budget)
+    if image.format == "JPEG":
+        image.draft("RGB", size)  # decode JPEGs at a reduced scale right away
+    image.load()
+
+    candidates = [] if size != original_size else [data]
+    # Box-reduce by an integer factor to at least 1.5 times the target size first: much
+    # cheaper than resampling (and flattening) the full-resolution image
+    factor = int(min(image.width / size[0], image.height / size[1]) / 1.5)
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.mode in ("RGBA", "LA", "P"):
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+
+    for fmt, options in (("PNG", {}), ("JPEG", {"quality": jpeg_quality})):
+        buffer = io.BytesIO()
+        image.save(buffer, fmt, **options)
+        candidates.append(buffer.getvalue())
+    smallest = min(candidates, key=len)
+    return encode_image(smallest, len(data), size, original_size, time.perf_counter() - start)
+
+
+class ImagePreprocessor:
+    """
+    Prepares image files (prepare_image) in a pool of max_workers threads. Each path is
+    prepared once; submit() starts it and returns a Future, prepare() waits for it, so a
+    batch can submit all its images up front (prefetch) and pick them up when it sends
+    them. The prepared images are kept in `reports` for the preprocessing report and, if a
+    cache is given, in its "image" namespace, keyed by the file content and the settings.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, max_workers: Optional[int] = None,
+                 jpeg_quality: int = 85, cache: Optional[ResponseCache] = None):
+        self.token_budget = token_budget
+        self.jpeg_quality = jpeg_quality
+        self.cache = cache if Image is not None else None  # without Pillow there is nothing to save
+        self.reports: Dict[str, PreparedImage] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, path: str) -> Future:
+        """Starts preparing an image file unless it is prepared already (failures are retried)."""
+        with self._lock:
+            future = self._futures.get(path)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._futures[path] = self._executor.submit(self._prepare_file, path)
+            return future
+
+    def prefetch(self, paths: Iterable[str]):
+        for path in paths:
+            self.submit(path)
+
+    def prepare(self, path: str) -> PreparedImage:
+        return self.submit(path).result()
+
+    def _prepare_file(self, path: str) -> PreparedImage:
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        if self.cache is None:
+            prepared = prepare_image(data, self.token_budget, self.jpeg_quality)
+        else:
+            key = content_key(PREPROCESSING_VERSION, str(self.token_budget), str(self.jpeg_quality), data)
+            cached = self.cache.get("image", key)
+            if cached is None:
+                prepared = prepare_image(data, self.token_budget, self.jpeg_quality)
+                self.cache.put("image", key, prepared.data)
+            else:
+                # Opening an image only reads its header
+                prepared = encode_image(cached, len(data), Image.open(io.BytesIO(cached)).size,
+                                        Image.open(io.BytesIO(data)).size)
+        prepared = prepared._replace(seconds=time.perf_counter() - start)
+        self.reports[path] = prepared
+        return prepared
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -1,190 +1,180 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from models import *
-import base64
+from image_preprocessing import ImagePreprocessor, PreparedImage, encode_image
+from response_cache import ResponseCache, content_key
+import asyncio
+import hashlib
 import json
+import os
 from typing import Dict, Optional, Union
 
 DEFAULT_INSTRUCTION = "Extract RFEM entities from the provided text and structure them according to the RFEMTemplate. If specific elements - such as node coordinates, section types, members, support conditions, lines, or load directions—are not explicitly mentioned, infer reasonable default values. Assume the positive z-direction is downward unless stated otherwise. Loads with positive magnitudes act downward in the positive z-direction. By default, assign walls vertically and plates or slabs horizontally. Unless specified, consider geometry to extend positively in the negative z-direction."
+IMAGE_PROMPT = "Extract RFEM entities from this image:"
+EXTRACTION_MODEL = "gpt-4o"
+TRANSCRIPTION_MODEL = "whisper-1"
+
+# The function specification is built and serialized once at import (schema generation of
+# the nested RFEMTemplate takes milliseconds) and reused by every request. Its version, a
+# hash of the serialized specification, identifies it in cache keys.
+FUNCTION_NAME = "fill_rfem_template"
+FUNCTION_SPEC = {"name": FUNCTION_NAME, "parameters": RFEMTemplate.model_json_schema()}
+FUNCTION_SPEC_JSON = json.dumps(FUNCTION_SPEC, sort_keys=True, separators=(",", ":"))
+FUNCTION_SPEC_VERSION = hashlib.sha256(FUNCTION_SPEC_JSON.encode()).hexdigest()[:16]
 
 class LLMProcessor:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, max_concurrent_requests: int = 16,
+                 cache_path: Optional[str] = None, cache_max_bytes: int = 256 * 2**20,
+                 image_preprocessor: Optional[ImagePreprocessor] = None):
         self.api_key = api_key
-        self.client = OpenAI(api_key=api_key)
+        self.base_url = base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # Created on first use by the async methods; one client (and connection pool) for all of them
+        self.max_concurrent_requests = max_concurrent_requests
+        self._async_client = None
+        self._request_slots = None
+
+        # Responses are cached by a hash of everything that determines them: the model, the
+        # instruction, the function specification version and the input content.
+        # Transcriptions only depend on the audio, so a new prompt does not re-transcribe.
+        self.cache = ResponseCache(cache_path, cache_max_bytes) if cache_path else None
+        self._prompt_key = content_key(EXTRACTION_MODEL, DEFAULT_INSTRUCTION, FUNCTION_SPEC_VERSION)
+
+        # Downscales and re-encodes images in its worker pool; without one, image files are
+        # sent as they are.
+        self.image_preprocessor = image_preprocessor
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """The AsyncOpenAI client shared by all async calls of this processor."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._request_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._async_client
+
+    async def aclose(self):
+        """Closes the connection pool of the async client."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
     def process_section_data(self, section_data: Dict) -> SectionDefinition:
         """Processes the section data and creates a SectionDefinition object."""
-        no = section_data.get("no", 1)  # Default value if 'no' is missing
-        section_type_str = section_data.get("section_type", "STANDARD")  # Default section type
-
-        try:
-            section_type = SectionType(section_type_str.upper())
-        except ValueError:
-            raise ValueError(f"Invalid section_type: {section_type_str}")
-
-        material_no = section_data.get("material_no", 1)  # Default material number
-
-        # Section-specific parameters
-        name = section_data.get("name")
-        width = section_data.get("width")
-        height = section_data.get("height")
-        diameter = section_data.get("diameter")
-        comment = section_data.get("comment", "")
-
-        # Create and return the SectionDefinition object
-        return SectionDefinition.create_section(
-            no=no,
-            section_type=section_type,
-            material_no=material_no,
-            name=name,
-            width=width,
-            height=height,
-            diameter=diameter,
-            comment=comment
-        )
+        # Defaults and section names are filled in by SectionDefinition.fill_in_section
+        return SectionDefinition.model_validate(section_data)
 
     def process_load_data(self, load_data: Dict) -> LoadDefinition:
         """Processes the load data and creates a LoadDefinition object."""
-        no = load_data.get("no", 1)
-        load_case_no = load_data.get("load_case_no", 1)
-        load_type_str = load_data.get("load_type")
-        magnitude = load_data.get("magnitude")
-        applied_to = load_data.get("applied_to")
-        comment = load_data.get("comment", "")
-
+        # Defaults and load details are filled in by LoadDefinition.fill_in_load_details
         try:
-            load_type = LoadType(load_type_str.upper())
-        except ValueError:
-            raise ValueError(f"Invalid load_type: {load_type_str}")
-
-        try:
-            if load_type == LoadType.NODAL:
-                nodal_load_data = load_data.get("nodal_load")
-                if not nodal_load_data:
-                    raise ValueError("Nodal load data is missing")
-
-                load_direction_str = nodal_load_data.get("load_direction")
-                load_direction = NodalLoadDirection(load_direction_str)
-
-                return LoadDefinition.create_nodal_load(
-                    no=no,
-                    load_case_no=load_case_no,
-                    nodes_no=','.join(map(str, applied_to)),
-                    load_direction=load_direction,
-                    magnitude=magnitude,
-                    comment=comment
-                )
-            elif load_type == LoadType.MEMBER:
-                member_load_data = load_data.get("member_load")
-                if not member_load_data:
-                    raise ValueError("Member load data is missing")
-
-                load_direction_str = member_load_data.get("load_direction")
-                load_direction = MemberLoadDirection(load_direction_str)
-
-                return LoadDefinition.create_member_load(
-                    no=no,
-                    load_case_no=load_case_no,
-                    members_no=','.join(map(str, applied_to)),
-                    load_direction=load_direction,
-                    magnitude=magnitude,
-                    comment=comment
-                )
-            elif load_type == LoadType.SURFACE:
-                surface_load_data = load_data.get("surface_load")
-                if not surface_load_data:
-                    raise ValueError("Surface load data is missing")
-
-                return LoadDefinition.create_surface_load(
-                    no=no,
-                    load_case_no=load_case_no,
-                    surface_no=','.join(map(str, applied_to)),
-                    magnitude=magnitude,
-                    comment=comment
-                )
-            elif load_type == LoadType.LINE:
-                line_load_data = load_data.get("line_load")
-                if not line_load_data:
-                    raise ValueError("Line load data is missing")
-
-                load_direction_str = line_load_data.get("load_direction")
-                load_direction = LineLoadDirection(load_direction_str)
-
-                return LoadDefinition.create_line_load(
-                    no=no,
-                    load_case_no=load_case_no,
-                    lines_no=','.join(map(str, applied_to)),
-                    load_direction=load_direction,
-                    magnitude=magnitude,
-                    comment=comment
-                )
-            else:
-                raise ValueError(f"Unsupported load type: {load_type}")
-
+            return LoadDefinition.model_validate(load_data)
         except ValueError as e:
             raise ValueError(f"Error creating LoadDefinition: {e}")
 
     def _process_api_response(self, response) -> RFEMTemplate:
         """Process the API response and convert it to an RFEMTemplate object."""
+        return self._process_function_arguments(self._function_arguments(response))
+
+    def _function_arguments(self, response) -> str:
+        """The JSON arguments of the fill_rfem_template function call in the API response."""
         if not hasattr(response.choices[0].message, 'function_call'):
             raise ValueError("The response does not contain a valid function call.")
             
-        function_call_args = response.choices[0].message.function_call.arguments
-        data = json.loads(function_call_args)
-        
-        # Set empty lists for missing optional fields
-        for field in ['sections', 'nodes', 'members', 'supports', 'lines']:
-            if data.get(field) is None:
-                data[field] = []
-                
-        # Process sections to create SectionDefinition objects
-        if "sections" in data and data["sections"]:
-            data["sections"] = [self.process_section_data(section_data) for section_data in data["sections"]]
-
-        # Process loads to create LoadDefinition objects
-        if "loads" in data and data["loads"]:
-            data["loads"] = [self.process_load_data(load_data) for load_data in data["loads"]]
-
-        # Use model_validate to create the RFEMTemplate object
-        return RFEMTemplate.model_validate(data)
+        return response.choices[0].message.function_call.arguments
 
-    def extract_entities_from_text(self, text: str) -> RFEMTemplate:
-        """Extracts RFEM entities from text input."""
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
+    def _process_function_arguments(self, function_call_args: Union[str, bytes]) -> RFEMTemplate:
+        """
+        Convert the JSON arguments of the function call to an RFEMTemplate object in one pass:
+        pydantic parses and validates the raw JSON, and the model validators fill in what the
+        LLM leaves out (missing lists, section names, load details).
+        """
+        return RFEMTemplate.model_validate_json(function_call_args)
+
+    def _completion_request(self, content) -> Dict:
+        """Arguments of the chat completion that fills the RFEMTemplate from the user content."""
+        return dict(
+            model=EXTRACTION_MODEL,
             messages=[
                 {"role": "system", "content": DEFAULT_INSTRUCTION},
-                {"role": "user", "content": text}
+                {"role": "user", "content": content}
             ],
-            functions=[{"name": "fill_rfem_template", "parameters": RFEMTemplate.model_json_schema()}],
-            function_call={"name": "fill_rfem_template"}
+            functions=[FUNCTION_SPEC],
+            function_call={"name": FUNCTION_NAME}
         )
-        print("Text Response:", response)  # Debugging
-        return self._process_api_response(response)
 
-    def extract_entities_from_image(self, image_path: str) -> RFEMTemplate:
-        """Extracts RFEM entities from an image file."""
+    def _read_image(self, image_path: str) -> bytes:
         try:
-            with open(image_path, "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+            return _read_file(image_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"Image file not found: {image_path}")
         except Exception as e:
             raise ValueError(f"Error reading image file: {str(e)}")
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": DEFAULT_INSTRUCTION},
-                {"role": "user", "content": [
-                    {"type": "text", "text": "Extract RFEM entities from this image:"},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                ]}
-            ],
-            functions=[{"name": "fill_rfem_template", "parameters": RFEMTemplate.model_json_schema()}],
-            function_call={"name": "fill_rfem_template"}
-        )
+    def _load_image(self, image_path: str) -> PreparedImage:
+        """The image as it is sent: prepared by the image preprocessor, or the file as it is."""
+        if self.image_preprocessor is None:
+            return encode_image(self._read_image(image_path))
+        try:
+            return self.image_preprocessor.prepare(image_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        except Exception as e:
+            raise ValueError(f"Error preparing image file: {str(e)}")
+
+    async def _aload_image(self, image_path: str) -> PreparedImage:
+        if self.image_preprocessor is None:
+            return await asyncio.to_thread(self._load_image, image_path)
+        try:
+            return await asyncio.wrap_future(self.image_preprocessor.submit(image_path))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        except Exception as e:
+            raise ValueError(f"Error preparing image file: {str(e)}")
+
+    def _image_content(self, image: PreparedImage):
+        """User content of an image request (text prompt and base64-encoded image)."""
+        return [
+            {"type": "text", "text": IMAGE_PROMPT},
+            {"type": "image_url", "image_url": {"url": image.data_url}}
+        ]
+
+    def _extraction_key(self, kind: str, *content) -> str:
+        return content_key(self._prompt_key, kind, *content)
+
+    def _cached(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.cache.get(namespace, key) if self.cache is not None else None
+
+    def _cached_extraction(self, key: str) -> Optional[RFEMTemplate]:
+        function_call_args = self._cached("extraction", key)
+        return self._process_function_arguments(function_call_args) if function_call_args is not None else None
+
+    def _store_extraction(self, key: str, response) -> RFEMTemplate:
+        """Converts the response and caches its function call arguments once they proved valid."""
+        function_call_args = self._function_arguments(response)
+        template = self._process_function_arguments(function_call_args)
+        if self.cache is not None:
+            self.cache.put("extraction", key, function_call_args.encode())
+        return template
+
+    def extract_entities_from_text(self, text: str) -> RFEMTemplate:
+        """Extracts RFEM entities from text input."""
+        key = self._extraction_key("text", text)
+        cached = self._cached_extraction(key)
+        if cached is not None:
+            return cached
+        response = self.client.chat.completions.create(**self._completion_request(text))
+        print("Text Response:", response)  # Debugging
+        return self._store_extraction(key, response)
+
+    def extract_entities_from_image(self, image_path: str) -> RFEMTemplate:
+        """Extracts RFEM entities from an image file."""
+        image = self._load_image(image_path)
+        key = self._extraction_key("image", IMAGE_PROMPT, image.data)
+        cached = self._cached_extraction(key)
+        if cached is not None:
+            return cached
+        response = self.client.chat.completions.create(**self._completion_request(self._image_content(image)))
         print("Image Response:", response)  # Debugging
-        return self._process_api_response(response)
+        return self._store_extraction(key, response)
 
     def extract_entities_from_audio(self, audio_file_path: str) -> RFEMTemplate:
         """
@@ -204,14 +194,90 @@ class LLMProcessor:
         Transcribes an audio file to text using OpenAI's Whisper model.
         """
         try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
+            audio = _read_file(audio_file_path)
+            key = content_key(TRANSCRIPTION_MODEL, audio)
+            cached = self._cached("transcription", key)
+            if cached is not None:
+                return cached.decode()
+            transcription = self.client.audio.transcriptions.create(
+                model=TRANSCRIPTION_MODEL,
+                file=(os.path.basename(audio_file_path), audio),
+                response_format="text"
+            )
+            self._store_transcription(key, transcription)
+            return transcription
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+        except Exception as e:
+            raise ValueError(f"Error transcribing audio: {str(e)}")
+
+    def _store_transcription(self, key: str, transcription: str):
+        if self.cache is not None and transcription:
+            self.cache.put("transcription", key, transcription.encode())
+
+    # Async variants: the same requests through the shared AsyncOpenAI client. At most
+    # max_concurrent_requests API calls are in flight per processor; an audio input only
+    # holds a slot while it transcribes or extracts, so the transcription of one input
+    # overlaps the entity extraction of another. Response cache lookups and inserts (SQLite,
+    # behind a lock) run in worker threads, so they don't block the event loop.
+
+    async def _acreate_completion(self, content):
+        client = self.async_client
+        async with self._request_slots:
+            return await client.chat.completions.create(**self._completion_request(content))
+
+    async def aextract_entities_from_text(self, text: str) -> RFEMTemplate:
+        """Async version of `extract_entities_from_text`."""
+        key = self._extraction_key("text", text)
+        cached = await asyncio.to_thread(self._cached_extraction, key)
+        if cached is not None:
+            return cached
+        response = await self._acreate_completion(text)
+        return await asyncio.to_thread(self._store_extraction, key, response)
+
+    async def aextract_entities_from_image(self, image_path: str) -> RFEMTemplate:
+        """Async version of `extract_entities_from_image` (the image is prepared in a worker thread)."""
+        image = await self._aload_image(image_path)
+        key = self._extraction_key("image", IMAGE_PROMPT, image.data)
+        cached = await asyncio.to_thread(self._cached_extraction, key)
+        if cached is not None:
+            return cached
+        response = await self._acreate_completion(self._image_content(image))
+        return await asyncio.to_thread(self._store_extraction, key, response)
+
+    async def aextract_entities_from_audio(self, audio_file_path: str) -> RFEMTemplate:
+        """Async version of `extract_entities_from_audio`."""
+        try:
+            text = await self.atranscribe_audio(audio_file_path)
+            if not text:
+                raise ValueError("Audio transcription yielded empty text")
+            return await self.aextract_entities_from_text(text)
+        except Exception as e:
+            raise ValueError(f"Error extracting entities from audio: {str(e)}")
+
+    async def atranscribe_audio(self, audio_file_path: str) -> str:
+        """Async version of `transcribe_audio`."""
+        try:
+            audio = await asyncio.to_thread(_read_file, audio_file_path)
+            key = content_key(TRANSCRIPTION_MODEL, audio)
+            cached = await asyncio.to_thread(self._cached, "transcription", key)
+            if cached is not None:
+                return cached.decode()
+            client = self.async_client
+            async with self._request_slots:
+                transcription = await client.audio.transcriptions.create(
+                    model=TRANSCRIPTION_MODEL,
+                    file=(os.path.basename(audio_file_path), audio),
                     response_format="text"
                 )
+            await asyncio.to_thread(self._store_transcription, key, transcription)
             return transcription
         except FileNotFoundError:
             raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         except Exception as e:
-            raise ValueError(f"Error transcribing audio: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error transcribing audio: {str(e)}")
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
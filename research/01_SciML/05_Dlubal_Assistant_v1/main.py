@@ -1,9 +1,12 @@
+import asyncio
 import os
+from image_preprocessing import ImagePreprocessor
 from llm_processor import LLMProcessor
 from models import *
-from rfem_script_generator import generate_rfem_script
+from rfem_script_generator import write_rfem_script
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -11,11 +14,14 @@ load_dotenv()
 
 # Setup logging
 logging.basicConfig(level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s',
+                    format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s',
                     handlers=[logging.FileHandler("app.log"),
                               logging.StreamHandler()])
 logger = logging.getLogger(__name__)
 
+# RFEM_PACKED_ARRAYS=1 writes nodes and members of the scripts as packed arrays (see stream_rfem_script)
+PACKED_ARRAYS = os.environ.get("RFEM_PACKED_ARRAYS") == "1"
+
 def get_api_key() -> str:
     """Get API key from environment or from string."""
     # First check environment variable
@@ -26,86 +32,181 @@ def get_api_key() -> str:
     
     return api_key
 
-def process_input(processor, input_data, input_type, file_prefix, max_attempts=5):
-    """Process a single input with retry logic."""
-    log_info = {
+def _extract(processor, input_data, input_type):
+    """Select the appropriate processor method."""
+    if input_type == "text":
+        return processor.extract_entities_from_text(input_data)
+    elif input_type == "image":
+        return processor.extract_entities_from_image(input_data)
+    elif input_type == "audio":
+        return processor.extract_entities_from_audio(input_data)
+    else:
+        raise ValueError(f"Unsupported input type: {input_type}")
+
+async def _aextract(processor, input_data, input_type):
+    """Async counterpart of _extract."""
+    if input_type == "text":
+        return await processor.aextract_entities_from_text(input_data)
+    elif input_type == "image":
+        return await processor.aextract_entities_from_image(input_data)
+    elif input_type == "audio":
+        return await processor.aextract_entities_from_audio(input_data)
+    else:
+        raise ValueError(f"Unsupported input type: {input_type}")
+
+def _input_log_info(input_data, input_type, file_prefix):
+    return {
         "input_type": input_type, 
         "filename": file_prefix, 
         "input_data": input_data[:50] if isinstance(input_data, str) else input_data
     }
+
+def _save_result(result, input_type, file_prefix, attempt, start_time, log_info):
+    """Generate and save the RFEM script of a successful attempt and log it."""
+    write_rfem_script(result, file_prefix, packed=PACKED_ARRAYS)
+        
+    # Log success
+    processing_time = time.time() - start_time
+    logger.info(f"{input_type.capitalize()} input processed successfully on attempt {attempt} in {processing_time:.2f}s.")
+    logger.info(f"RFEM script saved to file: {file_prefix}")
+    
+    # Update result metadata
+    result.filename = file_prefix
+    result.input_type = input_type
+    
+    # Update log info
+    log_info.update({
+        "success": True,
+        "attempts": attempt,
+        "processing_time": processing_time
+    })
+    logger.info(f"Processing details: {log_info}")
+    
+    return result
+
+def _log_failure(e, attempt, start_time, log_info, max_attempts):
+    """Log a failed attempt and return the delay before the next one (None: give up)."""
+    processing_time = time.time() - start_time
+    logger.error(f"Attempt {attempt} failed with error: {str(e)}")
+    
+    # Update log info
+    log_info.update({
+        "success": False,
+        "attempts": attempt,
+        "error": str(e),
+        "processing_time": processing_time
+    })
+    logger.info(f"Processing details: {log_info}")
+    
+    # Retry logic
+    if attempt < max_attempts:
+        retry_delay = 2 * attempt  # Exponential backoff
+        logger.info(f"Retrying in {retry_delay} seconds...")
+        return retry_delay
+    logger.error(f"Max retries reached. Giving up on this input.")
+    return None
+
+def process_input(processor, input_data, input_type, file_prefix, max_attempts=5):
+    """Process a single input with retry logic."""
+    log_info = _input_log_info(input_data, input_type, file_prefix)
     
     for attempt in range(1, max_attempts + 1):
         start_time = time.time()
         try:
-            # Select the appropriate processor method
-            if input_type == "text":
-                result = processor.extract_entities_from_text(input_data)
-            elif input_type == "image":
-                result = processor.extract_entities_from_image(input_data)
-            elif input_type == "audio":
-                result = processor.extract_entities_from_audio(input_data)
-            else:
-                raise ValueError(f"Unsupported input type: {input_type}")
-                
-            # Generate and save RFEM script
-            rfem_script = generate_rfem_script(result)
-            with open(file_prefix, "w") as f:
-                f.write(rfem_script)
-                
-            # Log success
-            processing_time = time.time() - start_time
-            logger.info(f"{input_type.capitalize()} input processed successfully on attempt {attempt} in {processing_time:.2f}s.")
-            logger.info(f"RFEM script saved to file: {file_prefix}")
-            
-            # Update result metadata
-            result.filename = file_prefix
-            result.input_type = input_type
-            
-            # Update log info
-            log_info.update({
-                "success": True,
-                "attempts": attempt,
-                "processing_time": processing_time
-            })
-            logger.info(f"Processing details: {log_info}")
-            
-            return result
-            
+            result = _extract(processor, input_data, input_type)
+            return _save_result(result, input_type, file_prefix, attempt, start_time, log_info)
         except Exception as e:
-            processing_time = time.time() - start_time
-            logger.error(f"Attempt {attempt} failed with error: {str(e)}")
-            
-            # Update log info
-            log_info.update({
-                "success": False,
-                "attempts": attempt,
-                "error": str(e),
-                "processing_time": processing_time
-            })
-            logger.info(f"Processing details: {log_info}")
-            
-            # Retry logic
-            if attempt < max_attempts:
-                retry_delay = 2 * attempt  # Exponential backoff
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                logger.error(f"Max retries reached. Giving up on this input.")
+            retry_delay = _log_failure(e, attempt, start_time, log_info, max_attempts)
+            if retry_delay is None:
                 return None
+            time.sleep(retry_delay)
 
-def run_study(processor, inputs, input_type, starting_index=0, max_attempts=5):
-    """Runs a study processing a list of inputs with a retry mechanism."""
-    study_results = []
+async def aprocess_input(processor, input_data, input_type, file_prefix, max_attempts=5):
+    """Async version of process_input: waits for the API, the script file and retries without blocking."""
+    log_info = _input_log_info(input_data, input_type, file_prefix)
     
-    for i, input_data in enumerate(inputs):
-        index = starting_index + i + 1
-        file_prefix = f"generated_rfem_{input_type}_{index}.py"
-        logger.info(f"Starting processing for {input_type.capitalize()} Input {i+1}/{len(inputs)}")
-        
-        result = process_input(processor, input_data, input_type, file_prefix, max_attempts)
-        study_results.append(result)
-        
-    return study_results
+    for attempt in range(1, max_attempts + 1):
+        start_time = time.time()
+        try:
+            result = await _aextract(processor, input_data, input_type)
+            # Writing the script of a large template takes long enough to stall the other inputs
+            return await asyncio.to_thread(_save_result, result, input_type, file_prefix, attempt, start_time, log_info)
+        except Exception as e:
+            retry_delay = _log_failure(e, attempt, start_time, log_info, max_attempts)
+            if retry_delay is None:
+                return None
+            await asyncio.sleep(retry_delay)
+
+def study_jobs(inputs, input_type, starting_index=0):
+    """Lists the (input_data, input_type, file_prefix, label) jobs of a study."""
+    return [(input_data, input_type, f"generated_rfem_{input_type}_{starting_index + i + 1}.py",
+             f"{input_type.capitalize()} Input {i+1}/{len(inputs)}")
+            for i, input_data in enumerate(inputs)]
+
+def run_jobs(processor, jobs, max_attempts=5, max_concurrency=1):
+    """
+    Processes jobs (see study_jobs) with at most max_concurrency of them in flight and
+    returns the results in the order of the jobs. Each job writes its own RFEM script, and
+    a job waiting for the API or for a retry only blocks its own worker thread.
+    """
+    def run(job):
+        input_data, input_type, file_prefix, label = job
+        logger.info(f"Starting processing for {label}")
+        return process_input(processor, input_data, input_type, file_prefix, max_attempts)
+
+    if max_concurrency <= 1:
+        return [run(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="study") as executor:
+        return list(executor.map(run, jobs))
+
+async def arun_jobs(processor, jobs, max_attempts=5):
+    """
+    Async version of run_jobs: starts all jobs at once; the processor bounds the number of
+    API requests in flight (LLMProcessor.max_concurrent_requests).
+    """
+    async def run(job):
+        input_data, input_type, file_prefix, label = job
+        logger.info(f"Starting processing for {label}")
+        return await aprocess_input(processor, input_data, input_type, file_prefix, max_attempts)
+
+    return list(await asyncio.gather(*(run(job) for job in jobs)))
+
+def prefetch_images(processor, jobs):
+    """
+    Preprocessing stage: submits the image inputs of the jobs to the processor's image
+    preprocessor, so they are downscaled and encoded in its worker pool while the first
+    jobs already wait for the API.
+    """
+    if processor.image_preprocessor is not None:
+        processor.image_preprocessor.prefetch(input_data for input_data, input_type, _, _ in jobs
+                                              if input_type == "image")
+
+def run_study(processor, inputs, input_type, starting_index=0, max_attempts=5, max_concurrency=1):
+    """Runs a study processing a list of inputs with a retry mechanism."""
+    return run_jobs(processor, study_jobs(inputs, input_type, starting_index), max_attempts, max_concurrency)
+
+def run_studies(processor, studies, max_attempts=5, max_concurrency=8):
+    """
+    Runs several studies, given as (inputs, input_type) pairs, concurrently in one pool, so
+    text, image and audio inputs share the concurrency limit. The files are numbered and the
+    results ordered as if the studies ran one after another.
+    """
+    jobs = []
+    for inputs, input_type in studies:
+        jobs += study_jobs(inputs, input_type, len(jobs))
+    prefetch_images(processor, jobs)
+    return run_jobs(processor, jobs, max_attempts, max_concurrency)
+
+async def arun_studies(processor, studies, max_attempts=5):
+    """Async version of run_studies."""
+    jobs = []
+    for inputs, input_type in studies:
+        jobs += study_jobs(inputs, input_type, len(jobs))
+    prefetch_images(processor, jobs)
+    try:
+        return await arun_jobs(processor, jobs, max_attempts)
+    finally:
+        await processor.aclose()
 
 def evaluate_results(results):
     """Evaluate the processing results."""
@@ -145,11 +246,43 @@ def print_evaluation(evaluation_metrics):
                 print(f"   {key}: {value}")
     print("---")
 
+def print_image_report(preprocessor, upload_mbit_per_s=20.0):
+    """
+    Print per image input what the preprocessing saved: request payload, image tokens and
+    the upload time at upload_mbit_per_s, against sending the file as it is.
+    """
+    if preprocessor is None or not preprocessor.reports:
+        return
+    bytes_per_s = upload_mbit_per_s * 1e6 / 8
+    print(f"\n--- Image Preprocessing (token budget: {preprocessor.token_budget or 'API resolution'}) ---")
+    total_original = total_sent = 0
+    for path, image in preprocessor.reports.items():
+        original_sent = 4 * -(-image.original_bytes // 3)  # base64 payload of the original file
+        saved_s = (original_sent - image.bytes_sent) / bytes_per_s
+        print(f"{path}: {original_sent / 1e3:.0f} kB -> {image.bytes_sent / 1e3:.0f} kB {image.mime_type}"
+              f" ({1 - image.bytes_sent / original_sent:.0%} less), {image.original_size} -> {image.size} px,"
+              f" {image.original_tokens} -> {image.tokens} tokens, prepared in {image.seconds * 1e3:.0f} ms,"
+              f" upload {saved_s * 1e3:.0f} ms faster at {upload_mbit_per_s:g} Mbit/s")
+        total_original += original_sent
+        total_sent += image.bytes_sent
+    print(f"Total: {total_original / 1e3:.0f} kB -> {total_sent / 1e3:.0f} kB")
+    print("---")
+
 def main():
     """Main function to run the processing pipeline."""
     # Initialize processor with API key
     api_key = get_api_key()
-    processor = LLMProcessor(api_key)
+    # Number of inputs processed at the same time (1: one after another)
+    max_concurrency = int(os.environ.get("RFEM_MAX_CONCURRENCY", 8))
+    # Persistent response cache, so re-running the study does not call the API again (RFEM_CACHE="" disables it)
+    cache_path = os.environ.get("RFEM_CACHE", "llm_cache.sqlite")
+    processor = LLMProcessor(api_key, max_concurrent_requests=max_concurrency, cache_path=cache_path or None)
+    # Images are downscaled to the resolution the model works with, or further to at most
+    # RFEM_IMAGE_TOKEN_BUDGET tokens each, and re-encoded (RFEM_PREPROCESS_IMAGES=0 sends the files as they are)
+    if os.environ.get("RFEM_PREPROCESS_IMAGES", "1") != "0":
+        token_budget = os.environ.get("RFEM_IMAGE_TOKEN_BUDGET")
+        processor.image_preprocessor = ImagePreprocessor(token_budget=int(token_budget) if token_budget else None,
+                                                         cache=processor.cache)
     
     # Define input data
     text_inputs = [
@@ -176,27 +309,22 @@ def main():
         "5_voice.mp3",
     ]
 
-    results = []
     max_attempts = 5
 
-    # Process text inputs
-    logger.info("Starting to process text inputs.")
-    text_results = run_study(processor, text_inputs, "text", len(results), max_attempts)
-    results.extend(text_results)
-
-    # Process image inputs
-    logger.info("Starting to process image inputs.")
-    image_results = run_study(processor, image_paths, "image", len(results), max_attempts)
-    results.extend(image_results)
-
-    # Process audio inputs
-    logger.info("Starting to process audio inputs.")
-    audio_results = run_study(processor, audio_paths, "audio", len(results), max_attempts)
-    results.extend(audio_results)
+    # Process text, image and audio inputs, with threads or (RFEM_ASYNC=1) with the async client
+    logger.info(f"Starting to process text, image and audio inputs ({max_concurrency} at a time).")
+    studies = [(text_inputs, "text"), (image_paths, "image"), (audio_paths, "audio")]
+    if os.environ.get("RFEM_ASYNC") == "1":
+        results = asyncio.run(arun_studies(processor, studies, max_attempts))
+    else:
+        results = run_studies(processor, studies, max_attempts, max_concurrency)
 
     # Evaluate and print results
     evaluation_metrics = evaluate_results(results)
     print_evaluation(evaluation_metrics)
+    print_image_report(processor.image_preprocessor)
+    if processor.image_preprocessor is not None:
+        processor.image_preprocessor.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the two OpenAI endpoints used by LLMProcessor, for tests and benchmarks
+without network access or API costs:
+
+- POST /v1/chat/completions: answers with a fill_rfem_template function call (a simply
+  supported concrete beam) after --chat-latency seconds.
+- POST /v1/audio/transcriptions: answers with a fixed text after --transcription-latency
+  seconds.
+
+With --upload-bandwidth (bytes/s), each request additionally takes as long as its body
+would take to upload, so smaller image payloads answer faster.
+
+Usage:
+    python mock_openai_server.py [--port 8765] [--chat-latency 1.0] [--transcription-latency 0.5]
+                                 [--upload-bandwidth 2500000]
+and point the processor at it with LLMProcessor("test", base_url="http://127.0.0.1:8765/v1").
+"""
+import argparse
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSCRIPTION = ("Design a concrete beam with a rectangular cross-section 30 x 50 cm made of C30/37, "
+                 "length 10 m, supported at both ends, with a uniform live load of 10 kN/m.")
+
+BEAM_TEMPLATE = {
+    "project_name": "Beam",
+    "filename": "beam",
+    "input_type": "text",
+    "materials": [{"no": 1, "name": "C30/37"}],
+    "sections": [{"no": 1, "section_type": "RECTANGULAR", "material_no": 1, "width": 0.3, "height": 0.5}],
+    "thicknesses": [],
+    "nodes": [
+        {"no": 1, "coordinate_X": 0.0, "coordinate_Y": 0.0, "coordinate_Z": 0.0},
+        {"no": 2, "coordinate_X": 10.0, "coordinate_Y": 0.0, "coordinate_Z": 0.0},
+    ],
+    "lines": [{"no": 1, "nodes_no": "1 2"}],
+    "members": [{"no": 1, "start_node_no": 1, "end_node_no": 2, "start_section_no": 1, "end_section_no": 1, "line": 1}],
+    "surfaces": [],
+    "supports": [{"no": 1, "nodes_no": "1 2", "support": "HINGED"}],
+    "loads": [{"no": 1, "load_case_no": 1, "load_type": "MEMBER", "magnitude": 10000.0, "applied_to": [1],
+               "member_load": {"load_direction": "LOAD_DIRECTION_GLOBAL_Z_OR_USER_DEFINED_W_TRUE"}}],
+}
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse their connections
+    chat_latency = 1.0
+    transcription_latency = 0.5
+    upload_bandwidth = None
+    template = BEAM_TEMPLATE
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.upload_bandwidth:
+            time.sleep(len(body) / self.upload_bandwidth)
+        self.server.request_counts[self.path.rsplit("/", 1)[-1]] += 1
+        if self.path.endswith("/chat/completions"):
+            time.sleep(self.chat_latency)
+            self._send(json.dumps(self._completion()).encode(), "application/json")
+        elif self.path.endswith("/audio/transcriptions"):
+            time.sleep(self.transcription_latency)
+            self._send(TRANSCRIPTION.encode(), "text/plain")
+        else:
+            self._send(b'{"error": {"message": "not found"}}', "application/json", status=404)
+
+    def _completion(self):
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "function_call",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "function_call": {"name": "fill_rfem_template", "arguments": json.dumps(self.template)},
+                },
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def _send(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(port=0, chat_latency=1.0, transcription_latency=0.5, upload_bandwidth=None):
+    """
+    Starts the mock server in a background thread and returns (server, base_url); stop it
+    with server.shutdown(). port=0 picks a free port. server.request_counts counts the
+    requests per endpoint ("completions", "transcriptions"). upload_bandwidth (bytes/s)
+    delays each request by the upload time of its body.
+    """
+    handler = type("Handler", (MockOpenAIHandler,), {"chat_latency": chat_latency,
+                                                      "transcription_latency": transcription_latency,
+                                                      "upload_bandwidth": upload_bandwidth})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.request_counts = collections.Counter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-latency", type=float, default=1.0)
+    parser.add_argument("--transcription-latency", type=float, default=0.5)
+    parser.add_argument("--upload-bandwidth", type=float, default=None, help="bytes/s (default: unlimited)")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.port, args.chat_latency, args.transcription_latency,
+                                         args.upload_bandwidth)
+    print(f"Mock OpenAI API listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
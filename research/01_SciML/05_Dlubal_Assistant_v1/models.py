@@ -1,5 +1,5 @@
 from enum import Enum
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, ValidationInfo, model_validator
 from typing import Union, List, Optional, Dict
 
 class MaterialDefinition(BaseModel):
@@ -24,6 +24,27 @@ class SectionDefinition(BaseModel):
     diameter: Optional[float] = Field(None, description="Diameter of circular section in m")
     comment: Optional[str] = Field("", description="Comments")
 
+    @model_validator(mode='before')
+    @classmethod
+    def fill_in_section(cls, data):
+        """
+        Completes a section as generated by the LLM, like create_section: section 1, STANDARD
+        and material 1 by default, and the RFEM names of rectangular and circular sections.
+        """
+        if not isinstance(data, dict):
+            return data
+        section_type = data.get("section_type", "STANDARD")
+        try:
+            section_type = SectionType(section_type.upper())
+        except (AttributeError, ValueError):
+            raise ValueError(f"Invalid section_type: {section_type}")
+        data = {**data, "no": data.get("no", 1), "section_type": section_type, "material_no": data.get("material_no", 1)}
+        if section_type == SectionType.RECTANGULAR:
+            data["name"] = f"R_M1 {data.get('width')}/{data.get('height')}"
+        elif section_type == SectionType.CIRCULAR:
+            data["name"] = f"CIRCLE_M1 {data.get('diameter')}"
+        return data
+
     @classmethod
     def create_section(cls, no: int, section_type: SectionType, material_no: int,
                        name: Optional[str] = None, width: Optional[float] = None,
@@ -371,6 +392,16 @@ class LineLoad(BaseModel):
     params: Optional[Dict] = Field(None, description="Any WS Parameter relevant to the object")
 
 
+# Per load type: the field with its details, the field of the details with the tags the
+# load applies to, and whether the details have a load direction
+LOAD_DETAILS = {
+    LoadType.NODAL.value: ("nodal_load", "nodes_no", True),
+    LoadType.MEMBER.value: ("member_load", "members_no", True),
+    LoadType.SURFACE.value: ("surface_load", "surface_no", False),
+    LoadType.LINE.value: ("line_load", "lines_no", True),
+}
+
+
 class LoadDefinition(BaseModel):
     no: int = Field(..., description="Load Tag")
     load_case_no: int = Field(..., description="Assigned Load Case")
@@ -384,21 +415,57 @@ class LoadDefinition(BaseModel):
     applied_to: List[int] = Field(..., description="List of Member, Surface, Node or Line Tags the load applies to")
     comment: Optional[str] = Field("", description="Comments")
 
+    @model_validator(mode='before')
+    @classmethod
+    def fill_in_load_details(cls, data, info: ValidationInfo):
+        """
+        Completes a load as generated by the LLM: load 1 of load case 1 by default, and the
+        details of its type (e.g. nodal_load) only carry the load direction; tags, magnitude
+        and comment are taken from the load itself. Details that already have their tags
+        (e.g. a dumped load) are kept as they are.
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("load_type"), str):
+            return data  # a missing load_type is reported by the field validation
+        load_type = data["load_type"].upper()
+        if load_type not in LOAD_DETAILS:
+            raise ValueError(f"Invalid load_type: {data['load_type']}")
+        details_field, tags_field, has_direction = LOAD_DETAILS[load_type]
+        details = data.get(details_field)
+        if details is None:
+            raise ValueError(f"{load_type.capitalize()} load data is missing")
+
+        if info.mode != 'json':
+            data = dict(data)  # the dicts parsed from JSON are not seen by anyone else
+        data["load_type"] = load_type
+        if isinstance(details, dict) and tags_field not in details:
+            applied_to = data.get("applied_to")
+            if isinstance(applied_to, str):  # "1 2" or "1,2" instead of [1, 2]
+                applied_to = data["applied_to"] = applied_to.replace(",", " ").split()
+            no, load_case_no = data.setdefault("no", 1), data.setdefault("load_case_no", 1)
+            comment = data.setdefault("comment", "")
+            # Other keys of the details (e.g. params) are kept
+            data[details_field] = {**details, "no": no, "load_case_no": load_case_no,
+                                   tags_field: " ".join(map(str, applied_to or ())),
+                                   "magnitude": data.get("magnitude"), "comment": comment}
+            if has_direction:
+                data[details_field]["load_direction"] = details.get("load_direction")
+        return data
+
     @classmethod
     def create_nodal_load(cls, no: int, load_case_no: int, nodes_no: str, load_direction: NodalLoadDirection, magnitude: float, comment: Optional[str] = None, params: Optional[Dict] = None):
-        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.NODAL, nodal_load=NodalLoad(no=no, load_case_no=load_case_no, nodes_no=nodes_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(n) for n in nodes_no.split()], comment=comment)
+        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.NODAL, nodal_load=NodalLoad(no=no, load_case_no=load_case_no, nodes_no=nodes_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(n) for n in nodes_no.replace(',', ' ').split()], comment=comment)
 
     @classmethod
     def create_member_load(cls, no: int, load_case_no: int, members_no: str, load_direction: MemberLoadDirection, magnitude: float, comment: Optional[str] = None, params: Optional[Dict] = None):
-         return cls(no=no, load_case_no=load_case_no, load_type=LoadType.MEMBER, member_load=MemberLoad(no=no, load_case_no=load_case_no, members_no=members_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(m) for m in members_no.split()], comment=comment)
+         return cls(no=no, load_case_no=load_case_no, load_type=LoadType.MEMBER, member_load=MemberLoad(no=no, load_case_no=load_case_no, members_no=members_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(m) for m in members_no.replace(',', ' ').split()], comment=comment)
 
     @classmethod
     def create_surface_load(cls, no: int, load_case_no: int, surface_no: str, magnitude: float, comment: Optional[str] = None, params: Optional[Dict] = None):
-        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.SURFACE, surface_load=SurfaceLoad(no=no, load_case_no=load_case_no, surface_no=surface_no, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(s) for s in surface_no.split()], comment=comment)
+        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.SURFACE, surface_load=SurfaceLoad(no=no, load_case_no=load_case_no, surface_no=surface_no, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(s) for s in surface_no.replace(',', ' ').split()], comment=comment)
 
     @classmethod
     def create_line_load(cls, no: int, load_case_no: int, lines_no: str, load_direction: LineLoadDirection, magnitude: float, comment: Optional[str] = None, params: Optional[Dict] = None):
-        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.LINE, line_load=LineLoad(no=no, load_case_no=load_case_no, lines_no=lines_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(l) for l in lines_no.split()], comment=comment)
+        return cls(no=no, load_case_no=load_case_no, load_type=LoadType.LINE, line_load=LineLoad(no=no, load_case_no=load_case_no, lines_no=lines_no, load_direction=load_direction, magnitude=magnitude, comment=comment, params=params), magnitude=magnitude, applied_to=[int(l) for l in lines_no.replace(',', ' ').split()], comment=comment)
 
 
 class RFEMTemplate(BaseModel):
@@ -413,4 +480,12 @@ class RFEMTemplate(BaseModel):
     members: Optional[List[MemberDefinition]] = Field(None, description="Definition of all structural members in this project")
     surfaces: List[SurfaceDefinition] = Field(..., description="Definition of all surfaces in this project")
     supports: Optional[List[Union[NodalSupport, LineSupport]]] = Field(None, description="Definition of all support conditions in this project")
-    loads: List[LoadDefinition] = Field(..., description="Definition of all acting loads on elements in this project")
\ No newline at end of file
+    loads: List[LoadDefinition] = Field(..., description="Definition of all acting loads on elements in this project")
+
+    @model_validator(mode='after')
+    def empty_lists_for_missing(self):
+        """Optional lists the LLM left out or set to null are empty."""
+        for field in ('sections', 'nodes', 'members', 'supports', 'lines'):
+            if getattr(self, field) is None:
+                setattr(self, field, [])
+        return self
@@ -0,0 +1,85 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+def content_key(*parts) -> str:
+    """SHA-256 over the parts (str or bytes), length-prefixed so that part boundaries count."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8") if isinstance(part, str) else part
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of API responses in a SQLite file.
+
+    Entries live in namespaces (e.g. "extraction" and "transcription") and are keyed by a
+    hash of everything that determines the response (see content_key). When the stored
+    values exceed max_bytes, the least recently used entries are evicted. The cache can be
+    shared by threads and by several processes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS entries (
+                                namespace TEXT NOT NULL,
+                                key TEXT NOT NULL,
+                                value BLOB NOT NULL,
+                                size INTEGER NOT NULL,
+                                last_access REAL NOT NULL,
+                                PRIMARY KEY (namespace, key))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """The cached value, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                                   (namespace, key)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                             (time.time(), namespace, key))
+            return row[0]
+
+    def put(self, namespace: str, key: str, value: bytes):
+        """Stores a value and evicts the least recently used entries beyond max_bytes."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                             (namespace, key, value, len(value), time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for namespace, key, size in self._db.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((namespace, key))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
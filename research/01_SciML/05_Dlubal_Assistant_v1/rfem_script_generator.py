@@ -1,12 +1,15 @@
 from models import *
-from typing import List, Optional, Union
+import base64
+import sys
+from array import array
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Union
+
+import numpy as np
 
-def generate_rfem_script(template: RFEMTemplate) -> str:
-    """Generate RFEM Python script from a template."""
-    is_member_structure = bool(template.members)
-    is_surface_structure = bool(template.surfaces)
+from template_arrays import DIRECTIONS, LOAD_TYPES, LoadArrays, MemberArrays, NodeArrays, TemplateArrays
 
-    script = f"""
+SCRIPT_HEADER = """
 import os
 import sys
 from RFEM.initModel import Model, Calculate_all
@@ -25,105 +28,182 @@ from RFEM.Loads.surfaceLoad import SurfaceLoad
 from RFEM.TypesForNodes.nodalSupport import NodalSupport, NodalSupportType
 from RFEM.TypesForLines.lineSupport import LineSupport, LineSupportType
 from RFEM.enums import NodalLoadDirection, MemberLoadDirection, LineLoadDirection
+"""
 
+# In packed mode between the imports and the model: the arrays are stored little-endian, base64-encoded
+PACKED_PRELUDE = """import base64
+from array import array
 
-# Initialize model and start modifying
-Model(model_name="{template.project_name}")
-Model.clientModel.service.begin_modification()
 
-# Define materials
-{generate_materials(template.materials)}
+def unpack(typecode, data):
+    values = array(typecode, base64.b64decode(data))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+"""
 
-# Define sections
-{generate_sections(template.sections) if template.sections else '# No sections defined'}
+MODEL_START = """
 
-# Define thicknesses
-{generate_thicknesses(template.thicknesses) if template.thicknesses else '# No thicknesses defined'}
+# Initialize model and start modifying
+Model(model_name="{project_name}")
+Model.clientModel.service.begin_modification()
+"""
 
-# Define nodes
-{generate_nodes(template.nodes) if template.nodes else '# No nodes defined'}
+SCRIPT_FOOTER = """
+Model.clientModel.service.finish_modification()
 
-# Define lines
-{generate_lines(template.lines) if template.lines else '# No lines defined'}
+print("Calculating results.")
+Calculate_all()
 
-# Define supports
-{generate_supports(template.supports, template.lines, template.nodes, template.members, template.surfaces)}
+"""
 
-# Define members
-{generate_members(template.members) if template.members else '# No members defined'}
+def generate_rfem_script(template: Union[RFEMTemplate, TemplateArrays], packed: bool = False) -> str:
+    """Generate RFEM Python script from a template (or its TemplateArrays)."""
+    return "".join(stream_rfem_script(template, packed=packed))
 
-# Define surfaces
-{generate_surfaces(template.surfaces) if template.surfaces else '# No surfaces defined'}
+def stream_rfem_script(template: Union[RFEMTemplate, TemplateArrays], chunk_lines: int = 1000, packed: bool = False) -> Iterator[str]:
+    """
+    Generate the RFEM Python script of generate_rfem_script in chunks of up to chunk_lines
+    lines, section by section, so that large models are never held as one string.
 
-# Define loads
-{generate_loads(template.loads) if template.loads else '# No loads defined'}
+    With packed=True, node coordinates and member connectivity are embedded as packed
+    arrays (packed_node_lines, packed_member_lines) that the script creates the objects
+    from in loops, instead of one line of code per object.
+    """
+    yield SCRIPT_HEADER
+    if packed:
+        yield PACKED_PRELUDE
+    yield MODEL_START.format(project_name=template.project_name)
+    sections = [
+        ("materials", material_lines(template.materials)),
+        ("sections", section_lines(template.sections)),
+        ("thicknesses", thickness_lines(template.thicknesses)),
+        ("nodes", (packed_node_lines if packed else node_lines)(template.nodes)),
+        ("lines", line_lines(template.lines)),
+        ("supports", support_lines(template.supports, template.lines, template.nodes, template.members, template.surfaces)),
+        ("members", (packed_member_lines if packed else member_lines)(template.members)),
+        ("surfaces", surface_lines(template.surfaces)),
+        ("loads", load_lines(template.loads)),
+    ]
+    for name, lines in sections:
+        yield f"\n# Define {name}\n"
+        yield from _chunks(lines, f"# No {name} defined", chunk_lines)
+        yield "\n"
+    yield SCRIPT_FOOTER
 
-Model.clientModel.service.finish_modification()
+def write_rfem_script(template: Union[RFEMTemplate, TemplateArrays], path: str, chunk_lines: int = 1000, packed: bool = False):
+    """Write the RFEM Python script of a template to a file, chunk by chunk."""
+    with open(path, "w") as f:
+        f.writelines(stream_rfem_script(template, chunk_lines, packed))
 
-print("Calculating results.")
-Calculate_all()
+def pack(typecode: str, values: Union[Iterable, np.ndarray]) -> str:
+    """Python literal of values packed into a little-endian array (decoded by the script's unpack)."""
+    if isinstance(values, np.ndarray):
+        data = values.astype({"q": "<i8", "d": "<f8"}[typecode]).tobytes()
+    else:
+        values = array(typecode, values)
+        if sys.byteorder == "big":
+            values.byteswap()
+        data = values.tobytes()
+    return f'unpack("{typecode}", "{base64.b64encode(data).decode("ascii")}")'
 
-"""
-    return script
+def _chunks(lines: Iterable[str], empty: str, chunk_lines: int) -> Iterator[str]:
+    """"\n".join(lines) in pieces of up to chunk_lines lines, or `empty` if there are no lines."""
+    lines = iter(lines)
+    separator = ""
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            break
+        yield separator + "\n".join(chunk)
+        separator = "\n"
+    if not separator:
+        yield empty
+
+# Each section has a generate_* function returning its code and a *_lines generator
+# yielding it line by line (for stream_rfem_script). Nodes, members and loads can also be
+# given as the columns of a TemplateArrays.
 
 def generate_materials(materials: List[MaterialDefinition]) -> str:
     """Generate RFEM code for materials."""
-    if not materials:
-        return "# No materials defined"
-    return "\n".join([f'Material({m.no}, "{m.name}")' for m in materials])
+    return "\n".join(material_lines(materials)) if materials else "# No materials defined"
+
+def material_lines(materials: Optional[List[MaterialDefinition]]) -> Iterator[str]:
+    for m in materials or []:
+        yield f'Material({m.no}, "{m.name}")'
 
 def generate_sections(sections: Optional[List[SectionDefinition]]) -> str:
     """Generate RFEM code for sections."""
-    if not sections:
-        return "# No sections defined"
-    return "\n".join([f'Section({s.no}, "{s.name}", {s.material_no})' for s in sections])
+    return "\n".join(section_lines(sections)) if sections else "# No sections defined"
+
+def section_lines(sections: Optional[List[SectionDefinition]]) -> Iterator[str]:
+    for s in sections or []:
+        yield f'Section({s.no}, "{s.name}", {s.material_no})'
 
 def generate_thicknesses(thicknesses: List[ThicknessDefinition]) -> str:
     """Generate RFEM code for thicknesses."""
-    if not thicknesses:
-        return "# No thicknesses defined"
-    return "\n".join([f'Thickness(no={t.no}, name="{t.name}", material_no={t.material_no}, uniform_thickness_d={t.uniform_thickness_d})' for t in thicknesses])
+    return "\n".join(thickness_lines(thicknesses)) if thicknesses else "# No thicknesses defined"
+
+def thickness_lines(thicknesses: Optional[List[ThicknessDefinition]]) -> Iterator[str]:
+    for t in thicknesses or []:
+        yield f'Thickness(no={t.no}, name="{t.name}", material_no={t.material_no}, uniform_thickness_d={t.uniform_thickness_d})'
 
-def generate_nodes(nodes: Optional[List[NodeDefinition]]) -> str:
+def generate_nodes(nodes: Optional[Union[List[NodeDefinition], NodeArrays]]) -> str:
     """Generate RFEM code for nodes."""
+    return "\n".join(node_lines(nodes)) if nodes else "# No nodes defined"
+
+def node_lines(nodes: Optional[Union[List[NodeDefinition], NodeArrays]]) -> Iterator[str]:
+    if isinstance(nodes, NodeArrays):
+        for no, (x, y, z) in zip(nodes.no.tolist(), nodes.coordinates.tolist()):
+            yield f'Node({no}, {x}, {y}, {z})'
+        return
+    for n in nodes or []:
+        yield f'Node({n.no}, {n.coordinate_X}, {n.coordinate_Y}, {n.coordinate_Z})'
+
+def packed_node_lines(nodes: Optional[Union[List[NodeDefinition], NodeArrays]]) -> Iterator[str]:
+    """Nodes as a loop over packed numbers and coordinates (the Node calls of node_lines)."""
     if not nodes:
-        return "# No nodes defined"
-    return "\n".join([f'Node({n.no}, {n.coordinate_X}, {n.coordinate_Y}, {n.coordinate_Z})' for n in nodes])
+        return
+    if isinstance(nodes, NodeArrays):
+        yield f'node_no = {pack("q", nodes.no)}'
+        yield f'node_xyz = {pack("d", nodes.coordinates)}'
+    else:
+        yield f'node_no = {pack("q", (n.no for n in nodes))}'
+        yield f'node_xyz = {pack("d", (x for n in nodes for x in (n.coordinate_X, n.coordinate_Y, n.coordinate_Z)))}'
+    yield 'for i, no in enumerate(node_no):'
+    yield '    Node(no, *node_xyz[3 * i:3 * i + 3])'
 
 def generate_lines(lines: Optional[List[Line]]) -> str:
     """Generate RFEM code for lines."""
-    if not lines:
-        return "# No lines defined"
-    
-    line_strings = []
-    for line in lines:
+    return "\n".join(line_lines(lines)) if lines else "# No lines defined"
+
+def line_lines(lines: Optional[List[Line]]) -> Iterator[str]:
+    for line in lines or []:
         if line.type == LineType.TYPE_POLYLINE:
-            line_strings.append(f'Line.Polyline(no={line.no}, nodes_no="{line.nodes_no}")')
+            yield f'Line.Polyline(no={line.no}, nodes_no="{line.nodes_no}")'
         elif line.type == LineType.TYPE_ARC:
             nodes = line.nodes_no.split() if line.nodes_no else [line.arc_first_node, line.arc_second_node]
-            line_strings.append(f'Line.Arc(no={line.no}, nodes_no={nodes}, control_point={line.control_point})')
+            yield f'Line.Arc(no={line.no}, nodes_no={nodes}, control_point={line.control_point})'
         elif line.type == LineType.TYPE_CIRCLE:
-            line_strings.append(f'Line.Circle(no={line.no}, center_of_circle={line.circle_center_coordinate}, ' +
-                              f'circle_radius={line.circle_radius}, point_of_normal_to_circle_plane={line.point_of_normal_to_circle_plane})')
+            yield (f'Line.Circle(no={line.no}, center_of_circle={line.circle_center_coordinate}, ' +
+                   f'circle_radius={line.circle_radius}, point_of_normal_to_circle_plane={line.point_of_normal_to_circle_plane})')
         elif line.type == LineType.TYPE_ELLIPTICAL_ARC:
-            line_strings.append(f'Line.EllipticalArc(no={line.no}, p1_control_point={line.elliptical_arc_first_control_point}, ' +
-                              f'p2_control_point={line.elliptical_arc_second_control_point}, ' +
-                              f'p3_control_point={line.elliptical_arc_perimeter_control_point}, ' + 
-                              f'arc_angle_alpha={line.arc_angle_alpha}, arc_angle_beta={line.arc_angle_beta})')
+            yield (f'Line.EllipticalArc(no={line.no}, p1_control_point={line.elliptical_arc_first_control_point}, ' +
+                   f'p2_control_point={line.elliptical_arc_second_control_point}, ' +
+                   f'p3_control_point={line.elliptical_arc_perimeter_control_point}, ' +
+                   f'arc_angle_alpha={line.arc_angle_alpha}, arc_angle_beta={line.arc_angle_beta})')
         elif line.type == LineType.TYPE_ELLIPSE:
             nodes = line.nodes_no.split() if line.nodes_no else [line.ellipse_first_node, line.ellipse_second_node]
-            line_strings.append(f'Line.Ellipse(no={line.no}, nodes_no={nodes}, ellipse_control_point={line.ellipse_control_point})')
+            yield f'Line.Ellipse(no={line.no}, nodes_no={nodes}, ellipse_control_point={line.ellipse_control_point})'
         elif line.type == LineType.TYPE_PARABOLA:
             nodes = line.nodes_no.split() if line.nodes_no else [line.parabola_first_node, line.parabola_second_node]
-            line_strings.append(f'Line.Parabola(no={line.no}, nodes_no={nodes}, parabola_control_point={line.parabola_control_point}, ' +
-                              f'parabola_alpha={line.parabola_alpha})')
+            yield (f'Line.Parabola(no={line.no}, nodes_no={nodes}, parabola_control_point={line.parabola_control_point}, ' +
+                   f'parabola_alpha={line.parabola_alpha})')
         elif line.type == LineType.TYPE_SPLINE:
-            line_strings.append(f'Line.Spline(no={line.no}, nodes_no="{line.nodes_no}")')
+            yield f'Line.Spline(no={line.no}, nodes_no="{line.nodes_no}")'
         elif line.type == LineType.TYPE_NURBS:
-            line_strings.append(f'Line.NURBS(no={line.no}, nodes_no="{line.nodes_no}", control_points={line.control_points}, ' +
-                              f'weights={line.weights}, order={line.order})')
-    
-    return "\n".join(line_strings)
+            yield (f'Line.NURBS(no={line.no}, nodes_no="{line.nodes_no}", control_points={line.control_points}, ' +
+                   f'weights={line.weights}, order={line.order})')
 
 def generate_supports(
     supports: Optional[List[Union[NodalSupport, LineSupport]]],
@@ -133,48 +213,63 @@ def generate_supports(
     surfaces: List[SurfaceDefinition]
 ) -> str:
     """Generate RFEM code for supports based on available structure elements."""
-    support_strings = []
-    
+    support_strings = list(support_lines(supports, lines, nodes, members, surfaces))
+    return "\n".join(support_strings) if support_strings else "# No supports defined"
+
+def support_lines(
+    supports: Optional[List[Union[NodalSupport, LineSupport]]],
+    lines: Optional[List[Line]],
+    nodes: Optional[List[NodeDefinition]],
+    members: Optional[List[MemberDefinition]],
+    surfaces: List[SurfaceDefinition]
+) -> Iterator[str]:
     # If supports are explicitly provided, use them
     if supports:
         for support in supports:
             if isinstance(support, NodalSupport):
-                support_strings.append(f'NodalSupport({support.no}, "{support.nodes_no}", NodalSupportType.{support.support})')
+                yield f'NodalSupport({support.no}, "{support.nodes_no}", {support_definition(support.support)})'
             elif isinstance(support, LineSupport):
-                support_strings.append(f'LineSupport({support.no}, "{support.lines_no}", LineSupportType.{support.support_type})')
+                yield f'LineSupport({support.no}, "{support.lines_no}", {support_definition(support.support_type)})'
     # If no explicit supports, infer from structural elements
     elif members and nodes:
         # Apply appropriate supports based on structure type
-        nodal_supports = infer_nodal_supports_from_members(members, nodes)
-        support_strings.extend(nodal_supports)
+        yield from infer_nodal_supports_from_members(members, nodes)
     elif surfaces and lines:
         # Apply hinged line support to all boundary lines of surfaces
-        line_supports = infer_line_supports_from_surfaces(surfaces)
-        support_strings.extend(line_supports)
+        yield from infer_line_supports_from_surfaces(surfaces)
     elif nodes:
         # Apply default supports if only nodes are present
         for i, node in enumerate(nodes):
             if i == 0:  # First node is fixed
-                support_strings.append(f'NodalSupport({node.no}, "{node.no}", NodalSupportType.FIXED)')
+                yield f'NodalSupport({node.no}, "{node.no}", NodalSupportType.FIXED)'
             else:  # Other nodes have appropriate supports
-                support_strings.append(f'NodalSupport({node.no}, "{node.no}", NodalSupportType.HINGED)')
+                yield f'NodalSupport({node.no}, "{node.no}", NodalSupportType.HINGED)'
 
-    return "\n".join(support_strings) if support_strings else "# No supports defined"
+def support_definition(support: Union[NodalSupportType, LineSupportType, List[float]]) -> str:
+    """RFEM support argument: the support type enum member, or the list of 6 condition values."""
+    if isinstance(support, list):
+        return str(support)
+    return f"{type(support).__name__}.{support.name}"
 
-def infer_nodal_supports_from_members(members: List[MemberDefinition], nodes: List[NodeDefinition]) -> List[str]:
+def infer_nodal_supports_from_members(members: Union[List[MemberDefinition], MemberArrays],
+                                      nodes: Union[List[NodeDefinition], NodeArrays]) -> List[str]:
     """Infer nodal supports from member structure."""
     support_strings = []
     
     # Identify all unique nodes in members
-    all_nodes = set()
-    for member in members:
-        all_nodes.add(member.start_node_no)
-        all_nodes.add(member.end_node_no)
+    if isinstance(members, MemberArrays):
+        all_nodes = set(members.nodes.ravel().tolist())
+    else:
+        all_nodes = set()
+        for member in members:
+            all_nodes.add(member.start_node_no)
+            all_nodes.add(member.end_node_no)
     
     # Determine which nodes need support (typically endpoints)
+    first_node = min(all_nodes)
     for node_no in sorted(all_nodes):
         # Simple heuristic: first node is fixed, others are roller
-        if node_no == min(all_nodes):
+        if node_no == first_node:
             support_strings.append(f'NodalSupport({node_no}, "{node_no}", NodalSupportType.FIXED)')
         else:
             support_strings.append(f'NodalSupport({node_no}, "{node_no}", NodalSupportType.ROLLER)')
@@ -194,89 +289,155 @@ def infer_line_supports_from_surfaces(surfaces: List[SurfaceDefinition]) -> List
     
     return support_strings
 
-def generate_members(members: Optional[List[MemberDefinition]]) -> str:
+def generate_members(members: Optional[Union[List[MemberDefinition], MemberArrays]]) -> str:
     """Generate RFEM code for members."""
-    if not members:
-        return "# No members defined"
+    return "\n".join(member_lines(members)) if members else "# No members defined"
+
+def member_lines(members: Optional[Union[List[MemberDefinition], MemberArrays]]) -> Iterator[str]:
+    if isinstance(members, MemberArrays):
+        columns = zip(members.no.tolist(), members.nodes.tolist(), members.rotation_angle.tolist(),
+                      members.sections.tolist(), members.hinges.tolist())
+        for i, (no, (start_node, end_node), rotation_angle, (start_section, end_section),
+                (start_hinge, end_hinge)) in enumerate(columns):
+            member = members.objects.get(i)
+            yield member_line(no, start_node, end_node, rotation_angle, start_section, end_section,
+                              start_hinge, end_hinge, member.comment if member else "")
+        return
+    for m in members or []:
+        yield member_line(m.no, m.start_node_no, m.end_node_no, m.rotation_angle, m.start_section_no, m.end_section_no,
+                          m.start_member_hinge_no, m.end_member_hinge_no, m.comment)
+
+def member_line(no, start_node_no, end_node_no, rotation_angle, start_section_no, end_section_no,
+                start_member_hinge_no, end_member_hinge_no, comment) -> str:
+    member_str = (f'Member(no={no}, start_node_no={start_node_no}, end_node_no={end_node_no}, ' +
+                 f'rotation_angle={rotation_angle}, start_section_no={start_section_no}')
     
-    member_strings = []
-    for m in members:
-        member_str = (f'Member(no={m.no}, start_node_no={m.start_node_no}, end_node_no={m.end_node_no}, ' +
-                     f'rotation_angle={m.rotation_angle}, start_section_no={m.start_section_no}')
+    # Add end section if different from start section
+    if end_section_no != start_section_no:
+        member_str += f', end_section_no={end_section_no}'
         
-        # Add end section if different from start section
-        if m.end_section_no != m.start_section_no:
-            member_str += f', end_section_no={m.end_section_no}'
-            
-        # Add hinges if present
-        if m.start_member_hinge_no:
-            member_str += f', start_member_hinge_no={m.start_member_hinge_no}'
-        if m.end_member_hinge_no:
-            member_str += f', end_member_hinge_no={m.end_member_hinge_no}'
-            
-        # Add comment if present
-        if m.comment:
-            member_str += f', comment="{m.comment}"'
-            
-        member_str += ')'
-        member_strings.append(member_str)
+    # Add hinges if present
+    if start_member_hinge_no:
+        member_str += f', start_member_hinge_no={start_member_hinge_no}'
+    if end_member_hinge_no:
+        member_str += f', end_member_hinge_no={end_member_hinge_no}'
         
-    return "\n".join(member_strings)
+    # Add comment if present
+    if comment:
+        member_str += f', comment="{comment}"'
+        
+    return member_str + ')'
+
+def packed_member_lines(members: Optional[Union[List[MemberDefinition], MemberArrays]]) -> Iterator[str]:
+    """
+    Members as a loop over packed connectivity, sections, hinges and rotation angles. Every
+    member gets its end section and hinges explicitly (member_lines leaves them out where
+    they equal the start section or are 0). Members with a comment stay single lines.
+    """
+    if isinstance(members, MemberArrays):
+        commented = sorted(i for i, m in members.objects.items() if m.comment)
+        plain = np.ones(len(members), dtype=bool)
+        plain[commented] = False
+        data = np.column_stack([members.no, members.nodes, members.sections, members.hinges])[plain]
+        rotation = members.rotation_angle[plain]
+        commented = [members.objects[i] for i in commented]
+    else:
+        plain = [m for m in members or [] if not m.comment]
+        data = [i for m in plain for i in (m.no, m.start_node_no, m.end_node_no, m.start_section_no,
+                                           m.end_section_no, m.start_member_hinge_no, m.end_member_hinge_no)]
+        rotation = [m.rotation_angle for m in plain]
+        commented = [m for m in members or [] if m.comment]
+    if len(rotation):
+        yield f'member_data = {pack("q", data)}'
+        yield f'member_rotation = {pack("d", rotation)}'
+        yield 'for i, rotation_angle in enumerate(member_rotation):'
+        yield '    no, start_node, end_node, start_section, end_section, start_hinge, end_hinge = member_data[7 * i:7 * i + 7]'
+        yield ('    Member(no=no, start_node_no=start_node, end_node_no=end_node, rotation_angle=rotation_angle, ' +
+               'start_section_no=start_section, end_section_no=end_section, ' +
+               'start_member_hinge_no=start_hinge, end_member_hinge_no=end_hinge)')
+    yield from member_lines(commented)
 
 def generate_surfaces(surfaces: List[SurfaceDefinition]) -> str:
     """Generate RFEM code for surfaces."""
-    if not surfaces:
-        return "# No surfaces defined"
-    
-    surface_strings = []
-    for s in surfaces:
+    return "\n".join(surface_lines(surfaces)) if surfaces else "# No surfaces defined"
+
+def surface_lines(surfaces: Optional[List[SurfaceDefinition]]) -> Iterator[str]:
+    for s in surfaces or []:
         boundary_lines = ",".join(map(str, s.boundary_lines))
-        surface_strings.append(f'Surface({s.no}, "{boundary_lines}", {s.thickness_no})')
-        
-    return "\n".join(surface_strings)
+        yield f'Surface({s.no}, "{boundary_lines}", {s.thickness_no})'
 
-def generate_loads(loads: List[LoadDefinition]) -> str:
+def generate_loads(loads: Union[List[LoadDefinition], LoadArrays]) -> str:
     """Generate RFEM code for loads."""
+    return "\n".join(load_lines(loads)) if loads else "# No loads defined"
+
+def load_lines(loads: Optional[Union[List[LoadDefinition], LoadArrays]]) -> Iterator[str]:
     if not loads:
-        return "# No loads defined"
-    
+        return
+    if isinstance(loads, LoadArrays):
+        for lc in np.unique(loads.load_case_no).tolist():
+            yield f'LoadCase({lc})'
+        columns = zip(loads.no.tolist(), loads.load_case_no.tolist(), loads.load_type.tolist(),
+                      loads.direction.tolist(), loads.magnitude.tolist(), loads.tags())
+        for i, (no, load_case_no, load_type, direction, magnitude, applied_to) in enumerate(columns):
+            load = loads.objects.get(i)
+            if load is not None:
+                yield generate_load(load)
+            else:
+                load_type = LOAD_TYPES[load_type]
+                directions = DIRECTIONS[load_type.value]
+                yield load_line(load_type, no, load_case_no, applied_to,
+                                directions[direction].name if directions else None, magnitude)
+        return
+
     # Extract all unique load cases
     load_cases = set(load.load_case_no for load in loads)
-    load_case_str = "\n".join([f'LoadCase({lc})' for lc in sorted(load_cases)])
+    for lc in sorted(load_cases):
+        yield f'LoadCase({lc})'
     
     # Generate load statements
-    load_str = "\n".join([generate_load(load) for load in loads])
-    
-    return f"{load_case_str}\n{load_str}"
+    for load in loads:
+        yield generate_load(load)
 
 def generate_load(load: LoadDefinition) -> str:
     """Generate RFEM code for a specific load."""
-    applied_to_str = ", ".join(map(str, load.applied_to))
-    
+    direction = None
     if load.load_type == LoadType.NODAL:
-        return (f'NodalLoad(no={load.no}, load_case_no={load.load_case_no}, ' +
+        direction = load.nodal_load.load_direction.name
+    elif load.load_type == LoadType.MEMBER:
+        direction = load.member_load.load_direction.name
+    elif load.load_type == LoadType.LINE:
+        direction = load.line_load.load_direction.name
+    return load_line(load.load_type, load.no, load.load_case_no, load.applied_to, direction, load.magnitude)
+
+def load_line(load_type: LoadType, no: int, load_case_no: int, applied_to: List[int], direction: Optional[str],
+              magnitude: float) -> str:
+    """RFEM code for a load, given its load direction name (None for surface loads)."""
+    applied_to_str = ", ".join(map(str, applied_to))
+    
+    if load_type == LoadType.NODAL:
+        return (f'NodalLoad(no={no}, load_case_no={load_case_no}, ' +
                f'nodes_no="{applied_to_str}", ' +
-               f'load_direction=NodalLoadDirection.{load.nodal_load.load_direction.name}, ' +
-               f'magnitude={load.magnitude})')
+               f'load_direction=NodalLoadDirection.{direction}, ' +
+               f'magnitude={magnitude})')
     
-    elif load.load_type == LoadType.MEMBER:
-        return (f'MemberLoad(no={load.no}, load_case_no={load.load_case_no}, ' +
+    elif load_type == LoadType.MEMBER:
+        return (f'MemberLoad(no={no}, load_case_no={load_case_no}, ' +
                f'members_no="{applied_to_str}", ' +
-               f'load_direction=MemberLoadDirection.{load.member_load.load_direction.name}, ' +
-               f'magnitude={load.magnitude})')
+               f'load_direction=MemberLoadDirection.{direction}, ' +
+               f'magnitude={magnitude})')
     
-    elif load.load_type == LoadType.SURFACE:
-        return (f'SurfaceLoad(no={load.no}, load_case_no={load.load_case_no}, ' +
-               f'surface_no="{applied_to_str}", magnitude={load.magnitude})')
+    elif load_type == LoadType.SURFACE:
+        return (f'SurfaceLoad(no={no}, load_case_no={load_case_no}, ' +
+               f'surface_no="{applied_to_str}", magnitude={magnitude})')
     
-    elif load.load_type == LoadType.LINE:
-        return (f'LineLoad(no={load.no}, load_case_no={load.load_case_no}, ' +
+    elif load_type == LoadType.LINE:
+        return (f'LineLoad(no={no}, load_case_no={load_case_no}, ' +
                f'lines_no="{applied_to_str}", ' +
-               f'load_direction=LineLoadDirection.{load.line_load.load_direction.name}, ' +
-               f'magnitude={load.magnitude})')
+               f'load_direction=LineLoadDirection.{direction}, ' +
+               f'magnitude={magnitude})')
     
     else:
-        return f"# Unsupported load type: {load.load_type}"
+        return f"# Unsupported load type: {load_type}"
 
 def format_nodes_no(nodes_no: str) -> str:
     """Format nodes string with proper spacing."""
@@ -0,0 +1,139 @@
+"""
+Local stand-in for the Dlubal RFEM Python API (the `RFEM` package) as far as the generated
+scripts use it, to run them without RFEM: every API call (object creation, modification
+block, calculation) is counted, and with call_latency takes as long as a web-service round
+trip would.
+
+Usage:
+    python rfem_stub.py generated_rfem_text_1.py [--call-latency 0.001]
+"""
+import argparse
+import collections
+import runpy
+import sys
+import time
+import types
+
+# Module -> names the generated scripts import from it
+API = {
+    "RFEM.initModel": ["Model", "Calculate_all"],
+    "RFEM.BasicObjects.material": ["Material"],
+    "RFEM.BasicObjects.section": ["Section"],
+    "RFEM.BasicObjects.thickness": ["Thickness"],
+    "RFEM.BasicObjects.node": ["Node"],
+    "RFEM.BasicObjects.member": ["Member"],
+    "RFEM.BasicObjects.surface": ["Surface"],
+    "RFEM.BasicObjects.line": ["Line"],
+    "RFEM.LoadCasesAndCombinations.loadCase": ["LoadCase"],
+    "RFEM.Loads.memberLoad": ["MemberLoad"],
+    "RFEM.Loads.nodalLoad": ["NodalLoad"],
+    "RFEM.Loads.lineLoad": ["LineLoad"],
+    "RFEM.Loads.surfaceLoad": ["SurfaceLoad"],
+    "RFEM.TypesForNodes.nodalSupport": ["NodalSupport", "NodalSupportType"],
+    "RFEM.TypesForLines.lineSupport": ["LineSupport", "LineSupportType"],
+    "RFEM.enums": ["NodalLoadDirection", "MemberLoadDirection", "LineLoadDirection"],
+}
+ENUMS = {"NodalSupportType", "LineSupportType", "NodalLoadDirection", "MemberLoadDirection", "LineLoadDirection"}
+LINE_TYPES = ["Polyline", "Arc", "Circle", "EllipticalArc", "Ellipse", "Parabola", "Spline", "NURBS"]
+
+
+class StubEnum:
+    """Any member name is valid (RFEM has more than models.py); members are their names."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, member):
+        return f"{self._name}.{member}"
+
+
+class RFEMStub:
+    """
+    The stub API. install() puts it into sys.modules as the `RFEM` package; counts holds
+    the number of calls per API function, and calls (with record=True) the calls with
+    their arguments in order.
+    """
+
+    def __init__(self, call_latency=0.0, record=False):
+        self.call_latency = call_latency
+        self.record = record
+        self.counts = collections.Counter()
+        self.calls = []
+
+    def call(self, function, /, *args, **kwargs):
+        self.counts[function] += 1
+        if self.record:
+            self.calls.append((function, args, kwargs))
+        if self.call_latency:
+            time.sleep(self.call_latency)
+
+    def _function(self, name):
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def _object(self, name):
+        stub = self
+
+        class ApiObject:
+            def __init__(self, *args, **kwargs):
+                stub.call(name, *args, **kwargs)
+
+        ApiObject.__name__ = name
+        return ApiObject
+
+    def _api(self, name):
+        if name in ENUMS:
+            return StubEnum(name)
+        if name == "Calculate_all":
+            return self._function(name)
+        api_object = self._object(name)
+        if name == "Model":
+            service = types.SimpleNamespace(begin_modification=self._function("begin_modification"),
+                                            finish_modification=self._function("finish_modification"))
+            api_object.clientModel = types.SimpleNamespace(service=service)
+        elif name == "Line":
+            for line_type in LINE_TYPES:
+                setattr(api_object, line_type, staticmethod(self._function(f"Line.{line_type}")))
+        return api_object
+
+    def install(self):
+        for module_name, names in API.items():
+            parts = module_name.split(".")
+            for i in range(1, len(parts)):  # the packages
+                sys.modules.setdefault(".".join(parts[:i]), types.ModuleType(".".join(parts[:i])))
+            module = types.ModuleType(module_name)
+            for name in names:
+                setattr(module, name, self._api(name))
+            sys.modules[module_name] = module
+
+    def uninstall(self):
+        for module_name in list(sys.modules):
+            if module_name == "RFEM" or module_name.startswith("RFEM."):
+                del sys.modules[module_name]
+
+
+def run_script(path, call_latency=0.0, record=False) -> RFEMStub:
+    """Runs a generated script against the stub API and returns the stub (counts, calls)."""
+    stub = RFEMStub(call_latency, record)
+    stub.install()
+    try:
+        runpy.run_path(path, run_name="__main__")
+    finally:
+        stub.uninstall()
+    return stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("script")
+    parser.add_argument("--call-latency", type=float, default=0.0, help="Seconds per API call")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stub = run_script(args.script, args.call_latency)
+    print(f"\n{sum(stub.counts.values())} RFEM API calls in {time.perf_counter() - start:.2f} s:")
+    for name, count in stub.counts.most_common():
+        print(f"{count:>10}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Columnar (array-backed) form of an RFEMTemplate for large models.
+
+An RFEMTemplate holds every node, member and load as a Pydantic model, several hundred
+bytes each. TemplateArrays keeps those three lists as NumPy columns instead: node numbers
+and an N x 3 float64 coordinate array, member connectivity, sections, hinges and rotation
+angles, and load numbers, types, directions and magnitudes, with the tags the loads apply
+to as one flat array plus row offsets. Everything else (materials, sections, lines, ...)
+stays in an RFEMTemplate, with empty nodes, members and loads.
+
+The conversion to and from the models is lossless: rows the columns cannot hold exactly
+(a comment, WS parameters, load details that differ from the load) are kept as models in
+`objects`, by row, next to their column values. The JSON schema sent to the LLM is
+RFEMTemplate's and unchanged; TemplateArrays.from_json builds the columns from the function
+call arguments without creating a model per row (rows that are not plain numbers go
+through the models' validation), and rfem_script_generator writes scripts from it directly.
+"""
+import json
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from models import (LOAD_DETAILS, LineLoad, LineLoadDirection, LoadDefinition, LoadType, MemberDefinition,
+                    MemberLoad, MemberLoadDirection, NodalLoad, NodalLoadDirection, NodeDefinition, RFEMTemplate,
+                    SurfaceLoad)
+
+NO_LINE = np.iinfo(np.int64).min  # MemberArrays.line of members without a line
+NO_DIRECTION = -1  # LoadArrays.direction of surface loads
+
+LOAD_TYPES = list(LoadType)
+LOAD_TYPE_CODES = {load_type.value: code for code, load_type in enumerate(LOAD_TYPES)}
+DETAIL_MODELS = {"nodal_load": NodalLoad, "member_load": MemberLoad, "surface_load": SurfaceLoad, "line_load": LineLoad}
+DIRECTIONS = {LoadType.NODAL.value: list(NodalLoadDirection), LoadType.MEMBER.value: list(MemberLoadDirection),
+              LoadType.LINE.value: list(LineLoadDirection), LoadType.SURFACE.value: []}
+DIRECTION_CODES = {load_type: {direction.value: code for code, direction in enumerate(directions)}
+                   for load_type, directions in DIRECTIONS.items()}
+
+BULK_FIELDS = ("nodes", "members", "loads")
+
+
+def _is_number(value) -> bool:
+    """Whether a float field takes value as it is (int and float, not bool)."""
+    return type(value) is float or type(value) is int
+
+
+class NodeArrays:
+    """Nodes: no (N,) int64 and coordinates (N, 3) float64 (X, Y, Z)."""
+
+    def __init__(self, no: np.ndarray, coordinates: np.ndarray, objects: Optional[Dict[int, NodeDefinition]] = None):
+        self.no = no
+        self.coordinates = coordinates
+        self.objects = objects or {}  # nodes with a comment
+
+    def __len__(self):
+        return len(self.no)
+
+    def __iter__(self) -> Iterator[NodeDefinition]:
+        """The nodes as models."""
+        for i, (no, (x, y, z)) in enumerate(zip(self.no.tolist(), self.coordinates.tolist())):
+            yield self.objects.get(i) or NodeDefinition.model_construct(
+                no=no, coordinate_X=x, coordinate_Y=y, coordinate_Z=z)
+
+    @classmethod
+    def from_models(cls, nodes: List[NodeDefinition]) -> "NodeArrays":
+        return cls(np.array([n.no for n in nodes], dtype=np.int64).reshape(-1),
+                   np.array([(n.coordinate_X, n.coordinate_Y, n.coordinate_Z) for n in nodes],
+                            dtype=np.float64).reshape(-1, 3),
+                   {i: n for i, n in enumerate(nodes) if n.comment != ""})
+
+    @classmethod
+    def from_dicts(cls, rows: List[dict]) -> "NodeArrays":
+        """Nodes from their function call arguments, validated as NodeDefinition would."""
+        no, coordinates, objects = [], [], {}
+        for i, row in enumerate(rows):
+            if type(row) is dict:
+                fields = (row.get("no"), row.get("coordinate_X"), row.get("coordinate_Y"), row.get("coordinate_Z"))
+                if type(fields[0]) is int and all(map(_is_number, fields[1:])) and row.get("comment", "") == "":
+                    no.append(fields[0])
+                    coordinates.append(fields[1:])
+                    continue
+            node = NodeDefinition.model_validate(row)
+            no.append(node.no)
+            coordinates.append((node.coordinate_X, node.coordinate_Y, node.coordinate_Z))
+            if node.comment != "":
+                objects[i] = node
+        return cls(np.array(no, dtype=np.int64), np.array(coordinates, dtype=np.float64).reshape(-1, 3), objects)
+
+
+class MemberArrays:
+    """
+    Members: no (M,), nodes (M, 2) start and end node, sections (M, 2) start and end
+    section, hinges (M, 2) start and end hinge and line (M,) (NO_LINE for none), all
+    int64, and rotation_angle (M,) float64.
+    """
+
+    def __init__(self, no: np.ndarray, nodes: np.ndarray, sections: np.ndarray, hinges: np.ndarray,
+                 rotation_angle: np.ndarray, line: np.ndarray, objects: Optional[Dict[int, MemberDefinition]] = None):
+        self.no = no
+        self.nodes = nodes
+        self.sections = sections
+        self.hinges = hinges
+        self.rotation_angle = rotation_angle
+        self.line = line
+        self.objects = objects or {}  # members with a comment or params
+
+    def __len__(self):
+        return len(self.no)
+
+    def __iter__(self) -> Iterator[MemberDefinition]:
+        """The members as models."""
+        columns = zip(self.no.tolist(), self.nodes.tolist(), self.sections.tolist(), self.hinges.tolist(),
+                      self.rotation_angle.tolist(), self.line.tolist())
+        for i, (no, (start_node, end_node), (start_section, end_section), (start_hinge, end_hinge),
+                rotation_angle, line) in enumerate(columns):
+            yield self.objects.get(i) or MemberDefinition.model_construct(
+                no=no, start_node_no=start_node, end_node_no=end_node, rotation_angle=rotation_angle,
+                start_section_no=start_section, end_section_no=end_section, start_member_hinge_no=start_hinge,
+                end_member_hinge_no=end_hinge, line=None if line == NO_LINE else line)
+
+    @classmethod
+    def _from_rows(cls, rows, objects) -> "MemberArrays":
+        """From (no, start node, end node, start section, end section, start hinge, end hinge, rotation angle, line) rows."""
+        data = np.array([row[:7] for row in rows], dtype=np.int64).reshape(-1, 7)
+        return cls(data[:, 0].copy(), data[:, 1:3].copy(), data[:, 3:5].copy(), data[:, 5:7].copy(),
+                   np.array([row[7] for row in rows], dtype=np.float64),
+                   np.array([NO_LINE if row[8] is None else row[8] for row in rows], dtype=np.int64), objects)
+
+    @staticmethod
+    def _row(m: MemberDefinition) -> tuple:
+        return (m.no, m.start_node_no, m.end_node_no, m.start_section_no, m.end_section_no,
+                m.start_member_hinge_no, m.end_member_hinge_no, m.rotation_angle, m.line)
+
+    @classmethod
+    def from_models(cls, members: List[MemberDefinition]) -> "MemberArrays":
+        return cls._from_rows([cls._row(m) for m in members],
+                              {i: m for i, m in enumerate(members)
+                               if m.comment != "" or m.params is not None or m.line == NO_LINE})
+
+    @classmethod
+    def from_dicts(cls, rows: List[dict]) -> "MemberArrays":
+        """Members from their function call arguments, validated as MemberDefinition would."""
+        data, objects = [], {}
+        for i, row in enumerate(rows):
+            if type(row) is dict:
+                get = row.get
+                ints = (get("no"), get("start_node_no"), get("end_node_no"), get("start_section_no"),
+                        get("end_section_no"), get("start_member_hinge_no", 0), get("end_member_hinge_no", 0))
+                rotation_angle, line = get("rotation_angle", 0.0), get("line")
+                if (all(type(value) is int for value in ints) and _is_number(rotation_angle)
+                        and (line is None or type(line) is int and line != NO_LINE)
+                        and get("comment", "") == "" and get("params") is None):
+                    data.append(ints + (rotation_angle, line))
+                    continue
+            member = MemberDefinition.model_validate(row)
+            data.append(cls._row(member))
+            if member.comment != "" or member.params is not None or member.line == NO_LINE:
+                objects[i] = member
+        return cls._from_rows(data, objects)
+
+
+class LoadArrays:
+    """
+    Loads: no, load_case_no (L,) int64, load_type (L,) int8 (index into LOAD_TYPES),
+    direction (L,) int8 (index into DIRECTIONS of the load type, NO_DIRECTION for surface
+    loads), magnitude (L,) float64 and the tags of load i in
+    applied_to[offsets[i]:offsets[i + 1]] (int64).
+    """
+
+    def __init__(self, no: np.ndarray, load_case_no: np.ndarray, load_type: np.ndarray, direction: np.ndarray,
+                 magnitude: np.ndarray, applied_to: np.ndarray, offsets: np.ndarray,
+                 objects: Optional[Dict[int, LoadDefinition]] = None):
+        self.no = no
+        self.load_case_no = load_case_no
+        self.load_type = load_type
+        self.direction = direction
+        self.magnitude = magnitude
+        self.applied_to = applied_to
+        self.offsets = offsets
+        self.objects = objects or {}  # loads with a comment or details that differ from the load
+
+    def __len__(self):
+        return len(self.no)
+
+    def tags(self) -> Iterator[List[int]]:
+        """The tags (applied_to) of each load."""
+        applied_to, offsets = self.applied_to.tolist(), self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield applied_to[start:end]
+
+    def __iter__(self) -> Iterator[LoadDefinition]:
+        """The loads as models."""
+        columns = zip(self.no.tolist(), self.load_case_no.tolist(), self.load_type.tolist(),
+                      self.direction.tolist(), self.magnitude.tolist(), self.tags())
+        for i, (no, load_case_no, load_type, direction, magnitude, tags) in enumerate(columns):
+            load = self.objects.get(i)
+            if load is None:
+                load_type = LOAD_TYPES[load_type]
+                details_field, tags_field, has_direction = LOAD_DETAILS[load_type.value]
+                details = {"no": no, "load_case_no": load_case_no, tags_field: " ".join(map(str, tags)),
+                           "magnitude": magnitude, "comment": ""}
+                if has_direction:
+                    details["load_direction"] = DIRECTIONS[load_type.value][direction]
+                load = LoadDefinition.model_construct(
+                    no=no, load_case_no=load_case_no, load_type=load_type, magnitude=magnitude, applied_to=tags,
+                    comment="", **{details_field: DETAIL_MODELS[details_field].model_construct(**details)})
+            yield load
+
+    @classmethod
+    def _from_rows(cls, rows, objects) -> "LoadArrays":
+        """From (no, load case, load type code, direction code, magnitude, tags) rows."""
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row[5]) for row in rows], out=offsets[1:])
+        return cls(np.array([row[0] for row in rows], dtype=np.int64),
+                   np.array([row[1] for row in rows], dtype=np.int64),
+                   np.array([row[2] for row in rows], dtype=np.int8),
+                   np.array([row[3] for row in rows], dtype=np.int8),
+                   np.array([row[4] for row in rows], dtype=np.float64),
+                   np.array([tag for row in rows for tag in row[5]], dtype=np.int64), offsets, objects)
+
+    @staticmethod
+    def _row(load: LoadDefinition) -> tuple:
+        details_field, _, has_direction = LOAD_DETAILS[load.load_type.value]
+        details = getattr(load, details_field)
+        direction = NO_DIRECTION
+        if has_direction and details is not None:
+            direction = DIRECTION_CODES[load.load_type.value][details.load_direction.value]
+        return (load.no, load.load_case_no, LOAD_TYPE_CODES[load.load_type.value], direction, load.magnitude,
+                load.applied_to)
+
+    @staticmethod
+    def _is_plain(load: LoadDefinition) -> bool:
+        """Whether a load is what the columns make of its row (the details only add the direction)."""
+        details_field, tags_field, _ = LOAD_DETAILS[load.load_type.value]
+        details = getattr(load, details_field)
+        if (load.comment != "" or details is None
+                or any(getattr(load, field) is not None for field in DETAIL_MODELS if field != details_field)):
+            return False
+        return (details.no == load.no and details.load_case_no == load.load_case_no
+                and getattr(details, tags_field) == " ".join(map(str, load.applied_to))
+                and details.magnitude == load.magnitude and details.comment == "" and details.params is None)
+
+    @classmethod
+    def from_models(cls, loads: List[LoadDefinition]) -> "LoadArrays":
+        return cls._from_rows([cls._row(load) for load in loads],
+                              {i: load for i, load in enumerate(loads) if not cls._is_plain(load)})
+
+    @classmethod
+    def from_dicts(cls, rows: List[dict]) -> "LoadArrays":
+        """
+        Loads from their function call arguments, validated as LoadDefinition would (with
+        fill_in_load_details).
+        """
+        data, objects = [], {}
+        for i, row in enumerate(rows):
+            if type(row) is dict and type(row.get("load_type")) is str:
+                load_type = row["load_type"].upper()
+                get = row.get
+                if load_type in LOAD_DETAILS:
+                    details_field, _, has_direction = LOAD_DETAILS[load_type]
+                    details, no, load_case_no = get(details_field), get("no", 1), get("load_case_no", 1)
+                    magnitude, applied_to = get("magnitude"), get("applied_to")
+                    direction = details.get("load_direction") if type(details) is dict and has_direction else None
+                    # Details with more than the load direction are validated by the model
+                    if (type(details) is dict and details.keys() <= {"load_direction"}
+                            and type(no) is int and type(load_case_no) is int
+                            and _is_number(magnitude) and type(applied_to) is list
+                            and all(type(tag) is int for tag in applied_to) and get("comment", "") == ""
+                            and (not has_direction or type(direction) is str and direction in DIRECTION_CODES[load_type])
+                            and all(get(field) is None for field in DETAIL_MODELS if field != details_field)):
+                        data.append((no, load_case_no, LOAD_TYPE_CODES[load_type],
+                                     DIRECTION_CODES[load_type][direction] if has_direction else NO_DIRECTION,
+                                     float(magnitude), applied_to))
+                        continue
+            load = LoadDefinition.model_validate(row)
+            data.append(cls._row(load))
+            if not cls._is_plain(load):
+                objects[i] = load
+        return cls._from_rows(data, objects)
+
+
+class TemplateArrays:
+    """
+    An RFEMTemplate with its nodes, members and loads as columns (see the module docstring).
+    `template` holds the rest; its nodes, members and loads are empty.
+    """
+
+    def __init__(self, template: RFEMTemplate, nodes: NodeArrays, members: MemberArrays, loads: LoadArrays):
+        self.template = template
+        self.nodes = nodes
+        self.members = members
+        self.loads = loads
+
+    def __getattr__(self, name):
+        # project_name, materials, sections, lines, surfaces, supports, ... of the template
+        if name == "template":
+            raise AttributeError(name)
+        return getattr(self.template, name)
+
+    @classmethod
+    def from_template(cls, template: RFEMTemplate) -> "TemplateArrays":
+        return cls(template.model_copy(update={field: [] for field in BULK_FIELDS}),
+                   NodeArrays.from_models(template.nodes), MemberArrays.from_models(template.members),
+                   LoadArrays.from_models(template.loads))
+
+    @classmethod
+    def from_json(cls, data: Union[str, bytes]) -> "TemplateArrays":
+        """
+        From the fill_in_rfem_template function call arguments, as
+        RFEMTemplate.model_validate_json(data) followed by from_template would.
+        """
+        data = json.loads(data)
+        if not isinstance(data, dict):
+            RFEMTemplate.model_validate(data)  # raises the validation error
+        # The rest is validated by RFEMTemplate; lists of rows are replaced by empty ones (so
+        # that a missing or invalid nodes, members or loads field is still reported)
+        rows = {field: data[field] if isinstance(data.get(field), list) else [] for field in BULK_FIELDS}
+        template = RFEMTemplate.model_validate({**data, **{field: [] for field in BULK_FIELDS
+                                                           if isinstance(data.get(field), list)}})
+        return cls(template, NodeArrays.from_dicts(rows["nodes"]), MemberArrays.from_dicts(rows["members"]),
+                   LoadArrays.from_dicts(rows["loads"]))
+
+    def to_template(self) -> RFEMTemplate:
+        """The RFEMTemplate, equal to the one the arrays were made from."""
+        return self.template.model_copy(update={field: list(getattr(self, field)) for field in BULK_FIELDS})
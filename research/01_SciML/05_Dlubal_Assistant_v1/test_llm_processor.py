@@ -0,0 +1,85 @@
+"""
+Sync and async entity extraction against the local mock API (mock_openai_server.py), and
+the response cache: a repeated input is answered from the cache without a request.
+
+Usage:
+    python -m pytest test_llm_processor.py
+"""
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from llm_processor import LLMProcessor
+from mock_openai_server import BEAM_TEMPLATE, TRANSCRIPTION, start_mock_server
+from models import RFEMTemplate
+
+TEXT = "Design a concrete beam of C30/37, length 10 m, with a uniform load of 10 kN/m."
+
+
+@pytest.fixture
+def mock_api():
+    server, base_url = start_mock_server(chat_latency=0, transcription_latency=0)
+    yield server, base_url
+    server.shutdown()
+
+
+def extract(processor, text):
+    with contextlib.redirect_stdout(io.StringIO()):  # the sync methods print the raw responses
+        return processor.extract_entities_from_text(text)
+
+
+async def aextract(processor, *texts):
+    try:
+        return [await processor.aextract_entities_from_text(text) for text in texts]
+    finally:
+        await processor.aclose()
+
+
+def test_sync_and_async_extraction(mock_api):
+    server, base_url = mock_api
+    expected = RFEMTemplate.model_validate(BEAM_TEMPLATE)
+
+    template = extract(LLMProcessor("test", base_url=base_url), TEXT)
+    assert isinstance(template, RFEMTemplate)
+    assert template == expected
+    assert server.request_counts["completions"] == 1
+
+    templates = asyncio.run(aextract(LLMProcessor("test", base_url=base_url), TEXT, TEXT))
+    assert templates == [expected, expected]
+    assert server.request_counts["completions"] == 3
+
+
+def test_cached_extraction(mock_api, tmp_path):
+    server, base_url = mock_api
+    cache_path = str(tmp_path / "responses.sqlite")
+
+    processor = LLMProcessor("test", base_url=base_url, cache_path=cache_path)
+    first = extract(processor, TEXT)
+    assert extract(processor, TEXT) == first
+    assert server.request_counts["completions"] == 1
+    assert processor.cache.hits == 1
+
+    # A new processor on the same cache file, through the async path
+    processor = LLMProcessor("test", base_url=base_url, cache_path=cache_path)
+    assert asyncio.run(aextract(processor, TEXT, "another beam")) == [first, first]
+    assert server.request_counts["completions"] == 2
+    assert processor.cache.hits == 1
+
+
+def test_cached_transcription(mock_api, tmp_path):
+    server, base_url = mock_api
+    audio_path = tmp_path / "voice.mp3"
+    audio_path.write_bytes(b"not really audio")
+
+    async def transcribe_twice(processor):
+        try:
+            return [await processor.atranscribe_audio(str(audio_path)) for _ in range(2)]
+        finally:
+            await processor.aclose()
+
+    processor = LLMProcessor("test", base_url=base_url, cache_path=str(tmp_path / "responses.sqlite"))
+    assert [text.strip() for text in asyncio.run(transcribe_twice(processor))] == [TRANSCRIPTION] * 2
+    assert server.request_counts["transcriptions"] == 1
+    assert processor.cache.hits == 1